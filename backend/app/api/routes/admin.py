@@ -1,35 +1,81 @@
 # app/api/routes/admin.py
 import json
 import shutil
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status, Query
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Response, UploadFile, status, Query
+from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from bson.objectid import ObjectId
 from pydantic import ValidationError
 from pathlib import Path
 import aiofiles
 
+from app.core.constants import TIMESERIES_MAX_BUCKETS
 from app.core.security import get_current_user, get_current_admin_user
 from app.db.database import db
 from app.models.user import User, UserRole, UserUpdate
 from app.models.arena import Arena, ArenaCreateWithFiles
 from app.db.init_db import init_db
-from app.models.booking import Booking, BookingStatus, BookingType, BookingWithDetails, PaginatedBookingsResponse
+from app.db.rebuild import REBUILDERS, rebuild
+from app.models.booking import Booking, BookingStatus, BookingWithDetails, PaginatedBookingsResponse
 from app.models.court import Court
-from app.services.maps import geocode_address
+from app.models.payment import PaymentStatus
+from app.services.arena_stats import OWNER_SUMMARY_FIELDS, owner_summary, refresh_owner_summary, with_owner
+from app.services.autocomplete import index_arena
+from app.services.booking_search import BOOKING_USER_FIELDS, admin_bookings_filter, fetch_admin_bookings, refresh_user_bookings
+from app.services.cache import CACHES, cache_stats
+from app.services.dashboard import DASHBOARD_PERIODS, dashboard_snapshot, period_start
+from app.services.exports import (
+    BOOKING_EXPORT_FIELDS,
+    EXPORT_FORMATS,
+    PAYMENT_EXPORT_FIELDS,
+    USER_EXPORT_FIELDS,
+    admin_payments_filter,
+    export_filename,
+    stream_export,
+)
+from app.services.timeseries import BREAKDOWNS, GRANULARITIES, bucket_starts, fetch_timeseries
+from app.services.maps import geocode_address, to_geojson_point
+from app.services.search_cache import invalidate_search_arena
+from app.services.text_search import (
+    USER_SEARCH_FIELDS,
+    add_condition,
+    arena_search_keys,
+    prefix_match,
+    tokens_query,
+    touches_fields,
+    user_search_keys,
+)
+from app.utils.helpers import clamp_page_size, fetch_page
 
 router = APIRouter()
 
+def _parse_date_range(start_date: Optional[str], end_date: Optional[str]):
+    """Converter o intervalo de datas (YYYY-MM-DD) dos filtros."""
+    try:
+        start = date.fromisoformat(start_date) if start_date else None
+        end = date.fromisoformat(end_date) if end_date else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Formato de data inválido. Use YYYY-MM-DD"
+        )
+    return start, end
+
+
 @router.get("/admin/users", response_model=List[User])
 async def get_all_users(
+    response: Response,
     current_user = Depends(get_current_admin_user),
     page: int = 1,
     items_per_page: int = 20,
+    cursor: Optional[str] = None,
     role: Optional[str] = None,
     search: Optional[str] = None,
     is_active: Optional[bool] = None
 ):
     """Listar todos os usuários (somente admin)"""
+    items_per_page = clamp_page_size(items_per_page)
     # Construir filtro
     filter_query = {}
     
@@ -40,23 +86,20 @@ async def get_all_users(
         filter_query["is_active"] = is_active
     
     if search:
-        # Buscar por nome, sobrenome, email ou username
-        filter_query["$or"] = [
-            {"first_name": {"$regex": search, "$options": "i"}},
-            {"last_name": {"$regex": search, "$options": "i"}},
-            {"email": {"$regex": search, "$options": "i"}},
-            {"username": {"$regex": search, "$options": "i"}}
-        ]
-    
-    # Aplicar paginação
-    skip = (page - 1) * items_per_page
-    
-    # Buscar usuários
-    cursor = db.db.users.find(filter_query).sort("created_at", -1).skip(skip).limit(items_per_page)
+        # Buscar pelo início das palavras do nome, sobrenome, email ou username
+        filter_query = add_condition(filter_query, tokens_query(search))
+    
+    # Buscar usuários (mais recentes primeiro)
+    user_docs, next_cursor = await fetch_page(
+        db.db.users, filter_query,
+        cursor=cursor, page=page, items_per_page=items_per_page,
+        sort_field="created_at"
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
-    # Converter cursor para lista
     users = []
-    async for user in cursor:
+    for user in user_docs:
         # Converter ObjectId para string
         user["_id"] = str(user["_id"])
         users.append(user)
@@ -111,6 +154,11 @@ async def update_user(
     # Preparar os dados para atualização
     update_data = user_update.dict(exclude_unset=True)
     
+    # Manter as chaves de busca (nome, email, username)
+    if touches_fields(update_data, USER_SEARCH_FIELDS):
+        user_doc = await db.db.users.find_one({"_id": ObjectId(user_id)}) or {}
+        update_data["search"] = user_search_keys({**user_doc, **update_data})
+    
     # Adicionar data de atualização
     update_data["updated_at"] = datetime.utcnow()
     
@@ -120,9 +168,17 @@ async def update_user(
         {"$set": update_data}
     )
     
+    # Dados do proprietário gravados nas arenas dele
+    if touches_fields(update_data, OWNER_SUMMARY_FIELDS):
+        await refresh_owner_summary(user_id)
+    
     # Retornar usuário atualizado
     updated_user_doc = await db.db.users.find_one({"_id": ObjectId(user_id)})
     
+    # Nome e email do cliente gravados nas reservas dele
+    if touches_fields(update_data, BOOKING_USER_FIELDS):
+        await refresh_user_bookings(updated_user_doc)
+    
     return User.from_mongo(updated_user_doc)
 
 @router.put("/admin/users/{user_id}/role")
@@ -218,15 +274,18 @@ async def deactivate_user(
 
 @router.get("/admin/arenas", response_model=List[Arena])
 async def get_all_arenas(
+    response: Response,
     current_user = Depends(get_current_admin_user),
     page: int = 1,
     items_per_page: int = 20,
+    cursor: Optional[str] = None,
     search: Optional[str] = None,
     active_only: bool = None,
     city: Optional[str] = None,
     state: Optional[str] = None
 ):
     """Listar todas as arenas (somente admin)"""
+    items_per_page = clamp_page_size(items_per_page)
     # Construir filtro
     filter_query = {}
     
@@ -234,49 +293,26 @@ async def get_all_arenas(
         filter_query["active"] = active_only
     
     if city:
-        filter_query["address.city"] = {"$regex": city, "$options": "i"}
+        filter_query["search.city"] = prefix_match(city)
         
     if state:
-        filter_query["address.state"] = {"$regex": state, "$options": "i"}
+        filter_query["search.state"] = prefix_match(state)
     
     if search:
-        # Buscar por nome ou cidade
-        filter_query["$or"] = [
-            {"name": {"$regex": search, "$options": "i"}},
-            {"address.city": {"$regex": search, "$options": "i"}},
-            {"address.state": {"$regex": search, "$options": "i"}}
-        ]
-    
-    # Aplicar paginação
-    skip = (page - 1) * items_per_page
-    
-    # Buscar arenas
-    cursor = db.db.arenas.find(filter_query).sort("created_at", -1).skip(skip).limit(items_per_page)
-    
-    # Converter cursor para lista
-    arenas = []
-    async for arena in cursor:
-        arena = Arena.from_mongo(arena)
-        
-        # Adicionar informações do proprietário
-        owner = await db.db.users.find_one({"_id": ObjectId(arena.owner_id)})
-        user_owner = User.from_mongo(owner)
-        if user_owner:
-            arena.owner = {
-                "id": user_owner.id,
-                "name": f"{user_owner.first_name} {user_owner.last_name}",
-                "email": user_owner.email
-            }
-        
-        # Adicionar contagem de quadras
-        courts_count = await db.db.courts.count_documents({"arena_id": arena.id})
-        arena.courts_count = courts_count
-        
-        # Converter ObjectId para string
-        #arena["_id"] = str(arena["_id"])
-        arenas.append(arena)
+        # Buscar pelo início das palavras do nome ou da localização
+        filter_query = add_condition(filter_query, tokens_query(search))
+    
+    # Buscar arenas (mais recentes primeiro)
+    arena_docs, next_cursor = await fetch_page(
+        db.db.arenas, filter_query,
+        cursor=cursor, page=page, items_per_page=items_per_page,
+        sort_field="created_at"
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
-    return arenas
+    # Contagens de quadras e dados do proprietário já estão no documento da arena
+    return [Arena.from_mongo(with_owner(arena_doc)) for arena_doc in arena_docs]
 
 @router.get("/admin/arenas/{arena_id}", response_model=Arena)
 async def get_arena(
@@ -291,21 +327,7 @@ async def get_arena(
                 detail="Arena não encontrada"
             )
         
-        # Adicionar contagem de quadras
-        courts_count = await db.db.courts.count_documents({"arena_id": arena_id})
-        arena_doc["courts_count"] = courts_count
-        
-        # Adicionar informações do proprietário (básicas)
-        owner_doc = await db.db.users.find_one({"_id": ObjectId(arena_doc["owner_id"])})
-        if owner_doc:
-            arena_doc["owner"] = {
-                "id": str(owner_doc["_id"]),
-                "name": f"{owner_doc.get('first_name')} {owner_doc.get('last_name')}",
-                "email": owner_doc.get("email"),
-                "phone": owner_doc.get("phone")
-            }
-        
-        return Arena.from_mongo(arena_doc)
+        return Arena.from_mongo(with_owner(arena_doc))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -315,12 +337,15 @@ async def get_arena(
 @router.get("/admin/arenas/{arena_id}/courts", response_model=List[Court])
 async def get_arena_courts(
     arena_id: str,
+    response: Response,
     court_type: Optional[str] = None,
     is_available: Optional[bool] = None,
     page: int = 1,
-    items_per_page: int = 20
+    items_per_page: int = 20,
+    cursor: Optional[str] = None
 ):
     """Obter quadras de uma arena"""
+    items_per_page = clamp_page_size(items_per_page)
     # Verificar se a arena existe
     arena = await db.db.arenas.find_one({"_id": ObjectId(arena_id)})
     if not arena:
@@ -338,15 +363,17 @@ async def get_arena_courts(
     if is_available is not None:
         filter_query["is_available"] = is_available
     
-    # Aplicar paginação
-    skip = (page - 1) * items_per_page
-    
-    # Buscar quadras
-    cursor = db.db.courts.find(filter_query).skip(skip).limit(items_per_page)
+    # Buscar quadras (ordem de cadastro)
+    court_docs, next_cursor = await fetch_page(
+        db.db.courts, filter_query,
+        cursor=cursor, page=page, items_per_page=items_per_page,
+        direction=1
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
-    # Converter cursor para lista
     courts = []
-    async for court_doc in cursor:
+    for court_doc in court_docs:
         # Adicionar dados extra da arena
         court_doc["arena"] = {
             "id": arena_id,
@@ -397,10 +424,20 @@ async def create_arena(
         arena_dict["logo_url"] = None
         arena_dict["photos"] = []
         arena_dict["amenities"] = arena_dict.get("amenities", [])
+        arena_dict["search"] = arena_search_keys(arena_dict)
+        arena_dict["owner_summary"] = owner_summary(owner_doc)
+        arena_dict.update({"court_types": [], "courts_count": 0, "active_courts_count": 0})
+        
+        # Ponto GeoJSON usado na busca por proximidade (índice 2dsphere)
+        location = to_geojson_point(arena_dict.get("address", {}).get("coordinates"))
+        if location:
+            arena_dict["location"] = location
         
         # Salvar arena no banco de dados
         result = await db.db.arenas.insert_one(arena_dict)
         arena_id = str(result.inserted_id)
+        invalidate_search_arena(arena_dict)
+        index_arena(arena_dict)
         
         # Criar diretório para armazenar arquivos se não existir
         try:
@@ -485,155 +522,26 @@ async def get_all_bookings(
     current_user = Depends(get_current_admin_user),
     page: int = 1,
     items_per_page: int = 20,
+    cursor: Optional[str] = None,
     search: Optional[str] = None,
-    status: Optional[str] = None,
+    booking_status: Optional[str] = Query(None, alias="status"),
     start_date: Optional[str] = None,
     end_date: Optional[str] = None
 ):
     """Listar todas as reservas (somente admin)"""
-    # Construir filtro
-    filter_query = {}
+    items_per_page = clamp_page_size(items_per_page)
     
-    if status:
-        if status not in BookingStatus.__members__.values():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Status inválido"
-            )
-        filter_query["status"] = status
-    
-    if start_date or end_date:
-        date_filter = {}
-        try:
-            if start_date:
-                start_datetime = datetime.fromisoformat(start_date)
-                date_filter["$gte"] = start_datetime
-            if end_date:
-                end_datetime = datetime.fromisoformat(end_date) + timedelta(days=1)
-                date_filter["$lt"] = end_datetime
-            
-            filter_query["$or"] = [
-                {"booking_type": BookingType.SINGLE, "timeslot.date": {"$exists": True, **date_filter}},
-                {"booking_type": BookingType.MONTHLY, "monthly_config.start_date": {"$exists": True, **date_filter}}
-            ]
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Formato de data inválido. Use YYYY-MM-DD"
-            )
-    
-    if search:
-        regex = {"$regex": search, "$options": "i"}
-        filter_query["$or"] = [
-            {"user_name": regex},
-            {"user_email": regex},
-            {"court_name": regex},
-            {"arena_name": regex}
-        ]
-    
-    # Pipeline de agregação
-    pipeline = [
-        {"$match": filter_query},
-        {"$sort": {"created_at": -1}},
-        {"$skip": (page - 1) * items_per_page},
-        {"$limit": items_per_page},
-        # Lookup para usuário
-        {
-            "$lookup": {
-                "from": "users",
-                "localField": "user_id",
-                "foreignField": "_id",
-                "as": "user"
-            }
-        },
-        {"$unwind": "$user"},
-        # Lookup para quadra
-        {
-            "$lookup": {
-                "from": "courts",
-                "localField": "court_id",
-                "foreignField": "_id",
-                "as": "court"
-            }
-        },
-        {"$unwind": "$court"},
-        # Lookup para arena
-        {
-            "$lookup": {
-                "from": "arenas",
-                "localField": "arena_id",
-                "foreignField": "_id",
-                "as": "arena"
-            }
-        },
-        {"$unwind": "$arena"},
-        # Lookup para pagamento
-        {
-            "$lookup": {
-                "from": "payments",
-                "localField": "_id",
-                "foreignField": "booking_id",
-                "as": "payment"
-            }
-        },
-        {"$unwind": {"path": "$payment", "preserveNullAndEmptyArrays": True}},
-        # Projeção final
-        {
-            "$project": {
-                "_id": {"$toString": "$_id"},
-                "user_id": {"$toString": "$user_id"},
-                "court_id": {"$toString": "$court_id"},
-                "arena_id": {"$toString": "$arena_id"},
-                "booking_type": 1,
-                "timeslot": 1,
-                "monthly_config": 1,
-                "status": 1,
-                "price_per_hour": 1,
-                "total_hours": 1,
-                "subtotal": 1,
-                "extra_services": 1,
-                "total_amount": 1,
-                "discount_amount": 1,
-                "requires_payment": 1,
-                "payment_deadline": 1,
-                "created_at": 1,
-                "updated_at": 1,
-                "payment_status": "$payment.status",
-                "can_cancel": {
-                    "$and": [
-                        {"$ne": ["$status", BookingStatus.CANCELLED]},
-                        {"$ne": ["$status", BookingStatus.COMPLETED]}
-                    ]
-                },
-                "user": {
-                    "id": {"$toString": "$user._id"},
-                    "name": {"$concat": ["$user.first_name", " ", "$user.last_name"]},
-                    "email": "$user.email",
-                    "phone": "$user.phone",
-                    "username": "$user.username"
-                },
-                "court": {
-                    "id": {"$toString": "$court._id"},
-                    "name": "$court.name",
-                    "type": "$court.type",
-                    "cover_image": "$court.cover_image"
-                },
-                "arena": {
-                    "id": {"$toString": "$arena._id"},
-                    "name": "$arena.name",
-                    "city": "$arena.address.city",
-                    "neighborhood": "$arena.address.neighborhood"
-                }
-            }
-        }
-    ]
+    if booking_status and booking_status not in BookingStatus.__members__.values():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Status inválido"
+        )
     
-    # Executar a consulta
-    bookings_cursor = db.db.bookings.aggregate(pipeline)
-    bookings = await bookings_cursor.to_list(length=None)
+    start, end = _parse_date_range(start_date, end_date)
     
-    # Contar total de documentos
-    total_count = await db.db.bookings.count_documents(filter_query)
+    # Página e total em uma única agregação (ver app/services/booking_search.py)
+    filter_query = admin_bookings_filter(booking_status, start, end, search)
+    bookings, total_count, next_cursor = await fetch_admin_bookings(filter_query, cursor, page, items_per_page)
     total_pages = max(1, (total_count + items_per_page - 1) // items_per_page)
     
     # Criar objetos Pydantic para cada booking
@@ -660,7 +568,8 @@ async def get_all_bookings(
         total_pages=total_pages,
         current_page=page,
         total_items=total_count,
-        items_per_page=items_per_page
+        items_per_page=items_per_page,
+        next_cursor=next_cursor
     )
 
 @router.get("/admin/bookings/{booking_id}", response_model=Booking)
@@ -729,6 +638,102 @@ async def get_booking(
     
     return booking
 
+def _export_response(name: str, export_format: str, rows) -> StreamingResponse:
+    return StreamingResponse(
+        rows,
+        media_type=EXPORT_FORMATS[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{export_filename(name, export_format)}"',
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+def _check_export_format(export_format: str) -> None:
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato inválido. Valores permitidos: {', '.join(EXPORT_FORMATS)}"
+        )
+
+@router.get("/admin/exports/bookings")
+async def export_bookings(
+    current_user = Depends(get_current_admin_user),
+    export_format: str = Query("csv", alias="format"),
+    search: Optional[str] = None,
+    booking_status: Optional[str] = Query(None, alias="status"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
+    """
+    Exportar reservas em CSV ou NDJSON (somente admin), com os mesmos filtros
+    da listagem /admin/bookings. As linhas são enviadas em streaming.
+    """
+    _check_export_format(export_format)
+    
+    if booking_status and booking_status not in BookingStatus.__members__.values():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Status inválido"
+        )
+    
+    start, end = _parse_date_range(start_date, end_date)
+    filter_query = admin_bookings_filter(booking_status, start, end, search)
+    
+    return _export_response(
+        "reservas", export_format,
+        stream_export(db.db.bookings, filter_query, BOOKING_EXPORT_FIELDS, export_format)
+    )
+
+@router.get("/admin/exports/payments")
+async def export_payments(
+    current_user = Depends(get_current_admin_user),
+    export_format: str = Query("csv", alias="format"),
+    payment_status: Optional[str] = Query(None, alias="status"),
+    arena_id: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
+    """Exportar pagamentos em CSV ou NDJSON (somente admin), filtrando pela data de criação."""
+    _check_export_format(export_format)
+    
+    if payment_status and payment_status not in PaymentStatus.__members__.values():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Status inválido"
+        )
+    
+    start, end = _parse_date_range(start_date, end_date)
+    filter_query = admin_payments_filter(payment_status, start, end, arena_id)
+    
+    return _export_response(
+        "pagamentos", export_format,
+        stream_export(db.db.payments, filter_query, PAYMENT_EXPORT_FIELDS, export_format)
+    )
+
+@router.get("/admin/exports/users")
+async def export_users(
+    current_user = Depends(get_current_admin_user),
+    export_format: str = Query("csv", alias="format"),
+    role: Optional[str] = None,
+    search: Optional[str] = None,
+    is_active: Optional[bool] = None
+):
+    """Exportar usuários em CSV ou NDJSON (somente admin), com os filtros de /admin/users."""
+    _check_export_format(export_format)
+    
+    filter_query = {}
+    if role:
+        filter_query["role"] = role
+    if is_active is not None:
+        filter_query["is_active"] = is_active
+    if search:
+        filter_query = add_condition(filter_query, tokens_query(search))
+    
+    return _export_response(
+        "usuarios", export_format,
+        stream_export(db.db.users, filter_query, USER_EXPORT_FIELDS, export_format)
+    )
+
 @router.get("/admin/dashboard")
 async def admin_dashboard(
     current_user = Depends(get_current_admin_user),
@@ -736,135 +741,101 @@ async def admin_dashboard(
 ):
     """Obter dados para dashboard administrativo"""
     try:
-        now = datetime.now()
-        
-        # Definir período
-        if period == "day":
-            start_date = datetime(now.year, now.month, now.day)
-        elif period == "week":
-            # Início da semana atual (domingo)
-            start_date = now - timedelta(days=now.weekday())
-            start_date = datetime(start_date.year, start_date.month, start_date.day)
-        elif period == "month":
-            # Início do mês atual
-            start_date = datetime(now.year, now.month, 1)
-        elif period == "year":
-            # Início do ano atual
-            start_date = datetime(now.year, 1, 1)
-        else:
+        start_date = period_start(period)
+        if start_date is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Período inválido. Valores permitidos: day, week, month, year"
+                detail=f"Período inválido. Valores permitidos: {', '.join(DASHBOARD_PERIODS)}"
             )
         
-        # Estatísticas de usuários
-        total_users = await db.db.users.count_documents({})
-        new_users = await db.db.users.count_documents({"created_at": {"$gte": start_date}})
-        
-        users_by_role = []
-        for role in UserRole:
-            count = await db.db.users.count_documents({"role": role.value})
-            users_by_role.append({"role": role.value, "count": count})
-        
-        # Estatísticas de arenas
-        total_arenas = await db.db.arenas.count_documents({})
-        active_arenas = await db.db.arenas.count_documents({"active": True})
-        new_arenas = await db.db.arenas.count_documents({"created_at": {"$gte": start_date}})
-        
-        # Estatísticas de quadras
-        total_courts = await db.db.courts.count_documents({})
-        
-        # Agrupar quadras por tipo
-        pipeline = [
-            {"$group": {"_id": "$type", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}}
-        ]
-        courts_by_type_cursor = db.db.courts.aggregate(pipeline)
-        courts_by_type = []
-        async for item in courts_by_type_cursor:
-            courts_by_type.append({"type": item["_id"], "count": item["count"]})
-        
-        # Estatísticas de reservas
-        total_bookings = await db.db.bookings.count_documents({})
-        completed_bookings = await db.db.bookings.count_documents({"status": "completed"})
-        cancelled_bookings = await db.db.bookings.count_documents({"status": "cancelled"})
-        pending_bookings = await db.db.bookings.count_documents({"status": "pending"})
-        
-        # Reservas no período atual
-        bookings_in_period = await db.db.bookings.count_documents({"created_at": {"$gte": start_date}})
-        
-        # Pagamentos
-        total_payments = await db.db.payments.count_documents({})
-        approved_payments = await db.db.payments.count_documents({"status": "approved"})
-        
-        # Somar valor total de pagamentos aprovados
-        pipeline = [
-            {"$match": {"status": "approved"}},
-            {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
-        ]
-        total_revenue_cursor = db.db.payments.aggregate(pipeline)
-        total_revenue = 0
-        async for item in total_revenue_cursor:
-            total_revenue = item["total"]
-        
-        # Pagamentos no período atual
-        payments_in_period = await db.db.payments.count_documents({"created_at": {"$gte": start_date}})
-        
-        # Somar valor de pagamentos no período
-        pipeline = [
-            {"$match": {"status": "approved", "created_at": {"$gte": start_date}}},
-            {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
-        ]
-        period_revenue_cursor = db.db.payments.aggregate(pipeline)
-        period_revenue = 0
-        async for item in period_revenue_cursor:
-            period_revenue = item["total"]
-        
-        # Montar resposta
-        dashboard_data = {
-            "period": period,
-            "start_date": start_date.isoformat(),
-            "current_date": now.isoformat(),
-            "users": {
-                "total": total_users,
-                "new_in_period": new_users,
-                "by_role": users_by_role
-            },
-            "arenas": {
-                "total": total_arenas,
-                "active": active_arenas,
-                "new_in_period": new_arenas
-            },
-            "courts": {
-                "total": total_courts,
-                "by_type": courts_by_type
-            },
-            "bookings": {
-                "total": total_bookings,
-                "completed": completed_bookings,
-                "cancelled": cancelled_bookings,
-                "pending": pending_bookings,
-                "in_period": bookings_in_period
-            },
-            "payments": {
-                "total": total_payments,
-                "approved": approved_payments,
-                "total_revenue": total_revenue,
-                "in_period": payments_in_period,
-                "period_revenue": period_revenue
-            }
-        }
-        
-        return dashboard_data
+        # Uma agregação por coleção, executadas concorrentemente (ver app/services/dashboard.py)
+        return await dashboard_snapshot(period, start_date)
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao gerar dados do dashboard: {str(e)}"
         )
         
+@router.get("/admin/stats/timeseries")
+async def admin_timeseries(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    granularity: str = "day",  # day, week, month
+    arena_id: Optional[str] = None,
+    city: Optional[str] = None,
+    breakdown: Optional[str] = None,  # arena, city
+    current_user = Depends(get_current_admin_user)
+):
+    """Séries de receita, reservas e cancelamentos por dia, semana ou mês (somente admin)"""
+    if granularity not in GRANULARITIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Granularidade inválida. Valores permitidos: {', '.join(GRANULARITIES)}"
+        )
+    if breakdown and breakdown not in BREAKDOWNS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Detalhamento inválido. Valores permitidos: {', '.join(BREAKDOWNS)}"
+        )
+    
+    # Padrão: últimos 30 dias
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=29)
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A data inicial deve ser anterior à data final"
+        )
+    if len(bucket_starts(start_date, end_date, granularity)) > TIMESERIES_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Intervalo muito longo: no máximo {TIMESERIES_MAX_BUCKETS} períodos"
+        )
+    
+    return await fetch_timeseries(start_date, end_date, granularity, arena_id, city, breakdown)
+
 @router.get("/admin/init_db")
 async def init_db_route():
     print("Iniciando banco de dados...")
     await init_db()
-    return {"message": "Banco de dados inicializado com sucesso."}
\ No newline at end of file
+    return {"message": "Banco de dados inicializado com sucesso."}
+
+@router.post("/admin/rebuild/{target}")
+async def rebuild_route(
+    target: str,
+    current_user = Depends(get_current_admin_user)
+):
+    """Reconstruir uma estrutura derivada (backfill/reparo) (somente admin)"""
+    if target not in REBUILDERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Alvo inválido. Valores permitidos: {', '.join(REBUILDERS)}"
+        )
+    
+    result = await rebuild(target)
+    return {"message": f"{target} reconstruído com sucesso.", "result": result}
+
+@router.get("/admin/cache/stats")
+async def cache_stats_route(
+    current_user = Depends(get_current_admin_user)
+):
+    """Estatísticas dos caches em memória deste worker (somente admin)"""
+    return cache_stats()
+
+@router.post("/admin/cache/{name}/clear")
+async def clear_cache_route(
+    name: str,
+    current_user = Depends(get_current_admin_user)
+):
+    """Limpar um cache em memória deste worker (ex.: após editar serviços extras direto no banco) (somente admin)"""
+    if name not in CACHES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cache inválido. Valores permitidos: {', '.join(CACHES)}"
+        )
+    
+    CACHES[name].clear()
+    return {"message": f"Cache {name} limpo com sucesso."}
\ No newline at end of file
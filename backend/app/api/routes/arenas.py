@@ -1,8 +1,9 @@
 # app/api/routes/arenas.py
 import base64
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, status, BackgroundTasks
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response, status, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Dict, Any, Union
+from datetime import date, datetime
 from bson.objectid import ObjectId
 import json
 import shutil
@@ -11,14 +12,27 @@ from pathlib import Path
 
 from app.core.security import get_current_user, get_current_active_user, get_current_admin_user, get_current_arena_owner
 from app.db.database import db
-from app.models.arena import Arena, ArenaCreate, ArenaCreateWithFiles, ArenaUpdate, ArenaFilter, Address, ArenaUpdateWithFiles
+from app.models.arena import Arena, ArenaSearchPage, AutocompleteSuggestion, ArenaCreate, ArenaCreateWithFiles, ArenaUpdate, ArenaFilter, Address, ArenaUpdateWithFiles
 from app.models.court import Court
-from app.services.maps import geocode_address
+from app.core.constants import AUTOCOMPLETE_MAX_SUGGESTIONS, MAX_BOOKING_ADVANCE_DAYS
+from app.services.arena_stats import with_owner
+from app.services.autocomplete import suggest
+from app.services.availability import invalidate_arena
+from app.services.booking_search import refresh_booking_names
+from app.services.court_search import remove_arena, sync_arena
+from app.services.dashboard import DASHBOARD_PERIODS, arena_dashboard_snapshot, period_start
+from app.services.events import stream_availability
+from app.services.facets import ARENA_FACETS, count_facets, fetch_faceted_page, parse_facets, within_radius
+from app.services.maps import fetch_ranked_page, geocode_address, to_geojson_point
+from app.services.search_cache import cache_search, get_cached_search, invalidate_search_arena, search_cache, search_cache_key
+from app.services.text_search import ARENA_SEARCH_FIELDS, add_condition, arena_search_keys, prefix_match, tokens_query, touches_fields
+from app.utils.helpers import clamp_page_size, fetch_near_page, fetch_page
 
 router = APIRouter()
 
-@router.get("/arenas/", response_model=List[Arena])
+@router.get("/arenas/", response_model=Union[List[Arena], ArenaSearchPage])
 async def search_arenas(
+    response: Response,
     name: Optional[str] = None,
     city: Optional[str] = None,
     state: Optional[str] = None,
@@ -30,24 +44,64 @@ async def search_arenas(
     longitude: Optional[float] = None,
     distance_km: Optional[float] = None,
     active: bool = True,
+    sort_by: Optional[str] = None,  # distance (padrão com coordenadas), relevance
     page: int = 1,
-    items_per_page: int = 20
+    items_per_page: int = 20,
+    cursor: Optional[str] = None,
+    facets: Optional[str] = None  # court_type,city,neighborhood
 ):
-    """Buscar arenas com filtros"""
+    """
+    Buscar arenas com filtros
+    A ordenação "relevance" combina distância e avaliação (paginada por número de página)
+    e pontua no máximo SEARCH_RANKING_MAX_CANDIDATES (2000) arenas: as mais próximas, com
+    latitude/longitude, ou as mais bem avaliadas, sem elas. As facetas contam todo o filtro.
+    O header X-Cache indica se o resultado veio do cache de buscas (HIT/MISS).
+    Com facets, retorna {"items": [...], "facets": {faceta: [{"value", "count"}]}}.
+    """
+    items_per_page = clamp_page_size(items_per_page)
+    facet_names = parse_facets(facets, ARENA_FACETS)
+    
+    # Buscas repetidas (ex.: cidades da página inicial) são servidas do cache
+    # As contagens das facetas não dependem da página e têm chave própria
+    filters = dict(
+        name=name, city=city, state=state, neighborhood=neighborhood,
+        amenities=amenities, court_type=court_type, min_rating=min_rating,
+        latitude=latitude, longitude=longitude, distance_km=distance_km,
+        active=active
+    )
+    cache_key = search_cache_key(
+        "arenas", **filters,
+        sort_by=sort_by, page=page, items_per_page=items_per_page, cursor=cursor
+    )
+    facets_key = search_cache_key("arenas_facets", **filters, facets=facet_names)
+    cached = get_cached_search(cache_key)
+    cached_facets = get_cached_search(facets_key) if facet_names else None
+    if cached is not None and (cached_facets is not None or not facet_names):
+        arenas, next_cursor = cached
+        response.headers["X-Cache"] = "HIT"
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        if facet_names:
+            return {"items": arenas, "facets": cached_facets[0]}
+        return arenas
+    
+    response.headers["X-Cache"] = "MISS"
+    generation = search_cache.generation
     # Construir filtro
     filter_query = {"active": active}
     
+    # Nome e localização: prefixo das chaves normalizadas (sem acentos)
     if name:
-        filter_query["name"] = {"$regex": name, "$options": "i"}
+        filter_query = add_condition(filter_query, tokens_query(name))
     
     if city:
-        filter_query["address.city"] = {"$regex": city, "$options": "i"}
+        filter_query["search.city"] = prefix_match(city)
     
     if state:
-        filter_query["address.state"] = {"$regex": state, "$options": "i"}
+        filter_query["search.state"] = prefix_match(state)
     
     if neighborhood:
-        filter_query["address.neighborhood"] = {"$regex": neighborhood, "$options": "i"}
+        filter_query["search.neighborhood"] = prefix_match(neighborhood)
     
     if amenities:
         filter_query["amenities"] = {"$all": amenities}
@@ -55,58 +109,71 @@ async def search_arenas(
     if min_rating is not None:
         filter_query["rating"] = {"$gte": min_rating}
     
-    # Busca geoespacial
-    if latitude and longitude and distance_km:
-        filter_query["address.coordinates"] = {
-            "$near": {
-                "$geometry": {
-                    "type": "Point",
-                    "coordinates": [longitude, latitude]
-                },
-                "$maxDistance": distance_km * 1000  # Converter km para metros
-            }
-        }
-    
-    # Se filtrar por tipo de quadra, primeiro encontrar as arenas com esse tipo
-    arena_ids = []
+    # Tipos de quadra mantidos no documento da arena (ver app/services/arena_stats.py)
     if court_type:
-        # Buscar quadras do tipo especificado
-        courts_cursor = db.db.courts.find({"type": court_type})
-        async for court in courts_cursor:
-            arena_ids.append(ObjectId(court["arena_id"]))
-        
-        if arena_ids:
-            filter_query["_id"] = {"$in": arena_ids}
-        else:
-            # Se não houver arenas com esse tipo de quadra, retornar lista vazia
-            return []
-    
-    # Aplicar paginação
-    skip = (page - 1) * items_per_page
+        filter_query["court_types"] = court_type
     
     # Buscar arenas com filtro
-    cursor = db.db.arenas.find(filter_query).skip(skip).limit(items_per_page)
-    
-    # Converter cursor para lista
-    arenas = []
-    async for arena_doc in cursor:
-        # Adicionar contagem de quadras
-        courts_count = await db.db.courts.count_documents({"arena_id": str(arena_doc["_id"])})
-        arena_doc["courts_count"] = courts_count
-        
-        # Adicionar informações do proprietário (básicas)
-        owner_doc = await db.db.users.find_one({"_id": ObjectId(arena_doc["owner_id"])})
-        if owner_doc:
-            arena_doc["owner"] = {
-                "id": str(owner_doc["_id"]),
-                "name": f"{owner_doc.get('first_name')} {owner_doc.get('last_name')}",
-                "email": owner_doc.get("email"),
-                "phone": owner_doc.get("phone")
-            }
-        
-        arenas.append(Arena.from_mongo(arena_doc))
+    next_cursor = None
+    facet_counts = None
+    if sort_by == "relevance":
+        arena_docs = await fetch_ranked_page(
+            db.db.arenas, filter_query, latitude, longitude,
+            page=page, items_per_page=items_per_page,
+            max_distance_km=distance_km
+        )
+    elif latitude is not None and longitude is not None:
+        # Busca geoespacial: $geoNear ordena por distância (calculada pelo banco)
+        arena_docs, next_cursor = await fetch_near_page(
+            db.db.arenas, filter_query, longitude, latitude,
+            cursor=cursor, page=page, items_per_page=items_per_page,
+            max_distance_km=distance_km
+        )
+    elif facet_names:
+        # Página e contagens das facetas na mesma agregação
+        arena_docs, next_cursor, facet_counts = await fetch_faceted_page(
+            db.db.arenas, filter_query, ARENA_FACETS, facet_names,
+            cursor=cursor, page=page, items_per_page=items_per_page,
+            direction=1
+        )
+    else:
+        arena_docs, next_cursor = await fetch_page(
+            db.db.arenas, filter_query,
+            cursor=cursor, page=page, items_per_page=items_per_page,
+            direction=1
+        )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    # Contagens de quadras e dados do proprietário já estão no documento da arena
+    arenas = [Arena.from_mongo(with_owner(arena_doc)) for arena_doc in arena_docs]
+    
+    cache_search(cache_key, city, arenas, next_cursor, generation)
     
-    return arenas
+    if not facet_names:
+        return arenas
+    
+    if facet_counts is None:
+        # Buscas por proximidade/relevância: contagens sobre o mesmo filtro (e raio)
+        facet_counts = await count_facets(
+            db.db.arenas,
+            within_radius(filter_query, latitude, longitude, distance_km),
+            ARENA_FACETS, facet_names
+        )
+    cache_search(facets_key, city, facet_counts, None, generation)
+    return {"items": arenas, "facets": facet_counts}
+
+@router.get("/arenas/autocomplete", response_model=List[AutocompleteSuggestion])
+async def autocomplete(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(AUTOCOMPLETE_MAX_SUGGESTIONS, ge=1, le=AUTOCOMPLETE_MAX_SUGGESTIONS)
+):
+    """
+    Sugestões para a caixa de busca: cidades, bairros e arenas com uma palavra
+    iniciada pelo texto digitado (sem acentos), das mais populares para as menos
+    populares. Atendido pelo índice em memória, sem consultar o banco.
+    """
+    return suggest(q, limit)
 
 @router.get("/arenas/{arena_id}", response_model=Arena)
 async def get_arena(arena_id: str):
@@ -119,21 +186,7 @@ async def get_arena(arena_id: str):
                 detail="Arena não encontrada"
             )
         
-        # Adicionar contagem de quadras
-        courts_count = await db.db.courts.count_documents({"arena_id": arena_id})
-        arena_doc["courts_count"] = courts_count
-        
-        # Adicionar informações do proprietário (básicas)
-        owner_doc = await db.db.users.find_one({"_id": ObjectId(arena_doc["owner_id"])})
-        if owner_doc:
-            arena_doc["owner"] = {
-                "id": str(owner_doc["_id"]),
-                "name": f"{owner_doc.get('first_name')} {owner_doc.get('last_name')}",
-                "email": owner_doc.get("email"),
-                "phone": owner_doc.get("phone")
-            }
-        
-        return Arena.from_mongo(arena_doc)
+        return Arena.from_mongo(with_owner(arena_doc))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -178,15 +231,38 @@ async def update_arena(
             if coordinates:
                 update_data["address"]["coordinates"] = coordinates
         
+        # Manter as chaves de busca (nome e localização)
+        if touches_fields(update_data, ARENA_SEARCH_FIELDS):
+            update_data["search"] = arena_search_keys({**arena, **update_data})
+        
         # Adicionar data de atualização
         update_data["updated_at"] = datetime.now()
+        update_ops = {"$set": update_data}
+        
+        # Manter o ponto GeoJSON usado na busca por proximidade
+        if "address" in update_data:
+            # Buscas da cidade antiga (a nova é invalidada por sync_arena)
+            invalidate_search_arena(arena)
+            location = to_geojson_point(update_data["address"].get("coordinates"))
+            if location:
+                update_data["location"] = location
+            else:
+                update_ops["$unset"] = {"location": ""}
         
         # Atualizar arena no banco de dados
         await db.db.arenas.update_one(
             {"_id": ObjectId(arena_id)},
-            {"$set": update_data}
+            update_ops
         )
         
+        # Horários de funcionamento alterados mudam a disponibilidade das quadras
+        if "business_hours" in update_data:
+            invalidate_arena(arena_id)
+        
+        # Nome da arena gravado nas reservas
+        if "name" in update_data and update_data["name"] != arena.get("name"):
+            await refresh_booking_names({"arena_id": arena_id}, {"arena_name": update_data["name"]})
+        
         # Processar upload de logo se existir
         if logo:
             # Criar diretório para armazenar arquivos se não existir
@@ -235,25 +311,12 @@ async def update_arena(
                 {"$set": {"photos": combined_photos}}
             )
         
-        # Buscar arena atualizada
-        updated_arena = await db.db.arenas.find_one({"_id": ObjectId(arena_id)})
-        
-        # Adicionar contagem de quadras
-        courts_count = await db.db.courts.count_documents({"arena_id": arena_id})
-        updated_arena["courts_count"] = courts_count
+        # Atualizar a projeção de busca das quadras da arena
+        await sync_arena(arena_id)
         
-        # Adicionar informações do proprietário
-        owner = await db.db.users.find_one({"_id": ObjectId(updated_arena["owner_id"])})
-        if owner:
-            updated_arena["owner"] = {
-                "id": str(owner["_id"]),
-                "name": f"{owner.get('first_name')} {owner.get('last_name')}",
-                "email": owner.get("email"),
-                "phone": owner.get("phone")
-            }
-        
-        # Retornar arena atualizada
-        return Arena.from_mongo(updated_arena)
+        # Retornar arena atualizada (com contagens e proprietário desnormalizados)
+        updated_arena = await db.db.arenas.find_one({"_id": ObjectId(arena_id)})
+        return Arena.from_mongo(with_owner(updated_arena))
     
     except Exception as e:
         raise HTTPException(
@@ -264,12 +327,15 @@ async def update_arena(
 @router.get("/arenas/{arena_id}/courts", response_model=List[Court])
 async def get_arena_courts(
     arena_id: str,
+    response: Response,
     court_type: Optional[str] = None,
     is_available: Optional[bool] = None,
     page: int = 1,
-    items_per_page: int = 20
+    items_per_page: int = 20,
+    cursor: Optional[str] = None
 ):
     """Obter quadras de uma arena"""
+    items_per_page = clamp_page_size(items_per_page)
     # Verificar se a arena existe
     arena = await db.db.arenas.find_one({"_id": ObjectId(arena_id)})
     if not arena:
@@ -287,15 +353,17 @@ async def get_arena_courts(
     if is_available is not None:
         filter_query["is_available"] = is_available
     
-    # Aplicar paginação
-    skip = (page - 1) * items_per_page
-    
-    # Buscar quadras
-    cursor = db.db.courts.find(filter_query).skip(skip).limit(items_per_page)
+    # Buscar quadras (ordem de cadastro)
+    court_docs, next_cursor = await fetch_page(
+        db.db.courts, filter_query,
+        cursor=cursor, page=page, items_per_page=items_per_page,
+        direction=1
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
-    # Converter cursor para lista
     courts = []
-    async for court_doc in cursor:
+    for court_doc in court_docs:
         # Adicionar dados extra da arena
         court_doc["arena"] = {
             "id": arena_id,
@@ -307,6 +375,46 @@ async def get_arena_courts(
     
     return courts
 
+@router.get("/arenas/{arena_id}/availability/stream")
+async def stream_arena_availability(
+    arena_id: str,
+    request: Request,
+    start_date: date,
+    end_date: Optional[date] = None
+):
+    """
+    Acompanhar em tempo real (Server-Sent Events) as mudanças de ocupação das quadras de uma arena.
+    Cada evento "slots" traz a quadra e o bitmap dos slots ocupados/liberados em um dia.
+    """
+    if not end_date:
+        end_date = start_date
+    
+    if end_date < start_date or (end_date - start_date).days > MAX_BOOKING_ADVANCE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Intervalo de datas inválido (máximo de {MAX_BOOKING_ADVANCE_DAYS} dias)"
+        )
+    
+    # Verificar se a arena existe
+    arena = await db.db.arenas.find_one({"_id": ObjectId(arena_id)}, {"_id": 1})
+    if not arena:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Arena não encontrada"
+        )
+    
+    # Quadras da arena no momento da assinatura
+    court_ids = [
+        str(court["_id"])
+        async for court in db.db.courts.find({"arena_id": {"$in": [arena_id, ObjectId(arena_id)]}}, {"_id": 1})
+    ]
+    
+    return StreamingResponse(
+        stream_availability(court_ids, start_date, end_date, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.delete("/arenas/{arena_id}")
 async def delete_arena(
     arena_id: str,
@@ -346,6 +454,9 @@ async def delete_arena(
             detail="Arena não encontrada"
         )
     
+    await remove_arena(arena_id)
+    invalidate_search_arena(arena)
+    
     # Excluir arquivos associados
     upload_dir = Path("static/arenas") / arena_id
     if upload_dir.exists():
@@ -383,6 +494,7 @@ async def deactivate_arena(
         {"_id": ObjectId(arena_id)},
         {"$set": {"active": False, "updated_at": datetime.now()}}
     )
+    await sync_arena(arena_id)
     
     return {"message": "Arena desativada com sucesso"}
 
@@ -416,5 +528,39 @@ async def activate_arena(
         {"_id": ObjectId(arena_id)},
         {"$set": {"active": True, "updated_at": datetime.now()}}
     )
+    await sync_arena(arena_id)
+    
+    return {"message": "Arena ativada com sucesso"}
+@router.get("/arenas/{arena_id}/dashboard")
+async def arena_dashboard(
+    arena_id: str,
+    period: str = "month",  # day, week, month, year
+    current_user = Depends(get_current_active_user)
+):
+    """Obter dados para o dashboard da arena (somente dono ou admin)"""
+    arena = await db.db.arenas.find_one({"_id": ObjectId(arena_id)}, {"owner_id": 1})
+    if not arena:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Arena não encontrada"
+        )
+    
+    # Verificar permissões
+    is_owner = arena["owner_id"] == str(current_user["id"])
+    is_admin = current_user.get("role") == "admin"
+    
+    if not (is_owner or is_admin):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Permissão negada"
+        )
+    
+    start_date = period_start(period)
+    if start_date is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Período inválido. Valores permitidos: {', '.join(DASHBOARD_PERIODS)}"
+        )
     
-    return {"message": "Arena ativada com sucesso"}
\ No newline at end of file
+    # Reservas e pagamentos a partir dos agregados diários da arena
+    return await arena_dashboard_snapshot(arena_id, period, start_date)
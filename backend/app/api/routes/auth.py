@@ -13,6 +13,7 @@ from app.core.config import settings
 from app.db.database import db
 from app.models.user import User, UserCreate, Token, TokenPayload
 from app.services.email import send_verification_email, send_password_reset_email
+from app.services.text_search import user_search_keys
 
 from pydantic import BaseModel
 
@@ -70,6 +71,7 @@ async def register_user(user_data: UserCreate, background_tasks: BackgroundTasks
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow()
     }
+    new_user["search"] = user_search_keys(new_user)
     
     result = await db.db.users.insert_one(new_user)
     new_user["_id"] = result.inserted_id
@@ -166,6 +168,7 @@ async def google_login(token_data: GoogleToken):
                 "created_at": datetime.utcnow(),
                 "updated_at": datetime.utcnow()
             }
+            new_user["search"] = user_search_keys(new_user)
             
             result = await db.db.users.insert_one(new_user)
             user_id = str(result.inserted_id)
@@ -1,19 +1,29 @@
 # app/api/routes/bookings.py
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Response, status, BackgroundTasks
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta, time
+from datetime import date, datetime, timedelta, time
 from bson.objectid import ObjectId
 
 from app.core.security import get_current_user, get_current_active_user
 from app.db.database import db
+from app.db.loader import BatchLoader, get_loader
+from app.core.constants import MAX_BATCH_BOOKING_ITEMS
 from app.models.booking import (
     Booking, BookingCreate, BookingUpdate, BookingStatusUpdate, 
-    BookingCancellation, BookingType, BookingStatus
+    BookingCancellation, BookingType, BookingStatus,
+    BookingBatch, BookingBatchCreate
 )
+from app.services.booking_search import with_booking_names
+from app.services.court_search import effective_price
+from app.services.daily_stats import record_bookings_created, record_payment
 from app.services.email import send_booking_confirmation_email, send_booking_update_email
 from app.services.whatsapp import send_booking_confirmation_whatsapp, send_booking_request_to_arena
+from app.services.extra_services import get_services, price_extra_services, price_selected_services
+from app.services.occurrences import insert_bookings, materialize_booking, sync_booking_status, trim_booking
+from app.services.slot_claims import SlotUnavailableError
 from app.models.court import Court
 from app.models.arena import Arena
+from app.utils.helpers import clamp_page_size, fetch_page
 
 router = APIRouter()
 
@@ -42,10 +52,8 @@ async def create_booking(
             detail="Arena não encontrada"
         )
     
-    # Verificar disponibilidade
-    is_available = True
-    error_message = ""
-    
+    # Validar dados da reserva
+    # A disponibilidade é garantida ao reivindicar os slots (ver materialize_booking)
     if booking_data.booking_type == BookingType.SINGLE and booking_data.timeslot:
         # Verificar disponibilidade para reserva avulsa
         date_str = booking_data.timeslot.date
@@ -66,47 +74,6 @@ async def create_booking(
                 detail="Não é possível agendar para uma data/hora no passado"
             )
         
-        # Verificar se há reservas conflitantes
-        conflicts = await db.db.bookings.find_one({
-            "court_id": booking_data.court_id,
-            "status": {"$in": ["pending", "confirmed"]},
-            "$or": [
-                # Reservas avulsas no mesmo dia e com horários sobrepostos
-                {
-                    "booking_type": "single",
-                    "timeslot.date": date_str,
-                    "$or": [
-                        # Reserva existente começa durante o novo período
-                        {
-                            "timeslot.start_time": {"$lt": end_time_str},
-                            "timeslot.end_time": {"$gt": start_time_str}
-                        },
-                        # Reserva existente termina durante o novo período
-                        {
-                            "timeslot.start_time": {"$lt": end_time_str},
-                            "timeslot.end_time": {"$gt": start_time_str}
-                        }
-                    ]
-                },
-                # Reservas mensais que incluem este dia da semana e com horários sobrepostos
-                {
-                    "booking_type": "monthly",
-                    "monthly_config.weekdays": booking_date.weekday(),
-                    "monthly_config.start_date": {"$lte": date_str},
-                    "$or": [
-                        {"monthly_config.end_date": {"$gte": date_str}},
-                        {"monthly_config.end_date": None}
-                    ],
-                    "monthly_config.start_time": {"$lt": end_time_str},
-                    "monthly_config.end_time": {"$gt": start_time_str}
-                }
-            ]
-        })
-        
-        if conflicts:
-            is_available = False
-            error_message = "Este horário já está reservado"
-        
         # Calcular horas e valores
         hours_diff = (
             datetime.combine(datetime.min, end_time) - 
@@ -140,33 +107,6 @@ async def create_booking(
                 detail="Selecione pelo menos um dia da semana"
             )
         
-        # Verificar se há reservas conflitantes para cada dia da semana
-        for weekday in weekdays:
-            # Buscar reservas mensais conflitantes
-            conflicts = await db.db.bookings.find_one({
-                "court_id": booking_data.court_id,
-                "status": {"$in": ["pending", "confirmed"]},
-                "$or": [
-                    # Outras reservas mensais no mesmo dia da semana
-                    {
-                        "booking_type": "monthly",
-                        "monthly_config.weekdays": weekday,
-                        "$or": [
-                            # Reserva começa antes do fim da nova reserva
-                            {
-                                "monthly_config.start_time": {"$lt": end_time_str},
-                                "monthly_config.end_time": {"$gt": start_time_str}
-                            }
-                        ]
-                    }
-                ]
-            })
-            
-            if conflicts:
-                is_available = False
-                error_message = f"Há conflitos para o dia {weekday}"
-                break
-        
         # Calcular horas por dia e valores
         hours_diff = (
             datetime.combine(datetime.min, end_time) - 
@@ -181,44 +121,14 @@ async def create_booking(
             detail="Dados incompletos para o tipo de reserva selecionado"
         )
     
-    if not is_available:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=error_message
-        )
-    
     # Calcular valores
-    price_per_hour = court_doc["discounted_price"] or court_doc["price_per_hour"]
+    price_per_hour = effective_price(court_doc)
     subtotal = price_per_hour * hours_diff
     
-    # Processar serviços extras
-    extra_services_data = []
-    extra_services_total = 0
-    
-    if booking_data.extra_services:
-        for extra in booking_data.extra_services:
-            service_id = extra.get("service_id")
-            quantity = extra.get("quantity", 1)
-            
-            # Ignorar serviços com quantidade 0
-            if quantity <= 0:
-                continue
-            
-            # Buscar serviço
-            service = await db.db.extra_services.find_one({"_id": ObjectId(service_id)})
-            if service:
-                price = service.get("discounted_price") or service.get("price")
-                total_price = price * quantity
-                
-                extra_services_data.append({
-                    "service_id": service_id,
-                    "name": service.get("name"),
-                    "quantity": quantity,
-                    "unit_price": price,
-                    "total_price": total_price
-                })
-                
-                extra_services_total += total_price
+    # Processar serviços extras (catálogo da arena em cache; no máximo uma consulta)
+    extra_services_data, extra_services_total = await price_selected_services(
+        str(arena_doc["_id"]), booking_data.extra_services
+    )
     
     # Calcular valor total
     total_amount = subtotal + extra_services_total
@@ -235,6 +145,7 @@ async def create_booking(
     
     # Criar a reserva
     new_booking = {
+        "_id": ObjectId(),
         "user_id": user_id,
         "court_id": booking_data.court_id,
         "arena_id": str(arena_doc["_id"]),
@@ -254,9 +165,31 @@ async def create_booking(
         "updated_at": datetime.now()
     }
     
+    # Nomes de cliente, quadra e arena usados na busca da listagem administrativa
+    with_booking_names(new_booking, current_user.dict(), court_doc, arena_doc)
+    
+    # Reivindicar os horários (escrita única com índice único), materializar as
+    # ocorrências e marcar o índice de ocupação antes de gravar a reserva
+    try:
+        await materialize_booking(new_booking)
+    except SlotUnavailableError as e:
+        if booking_data.booking_type == BookingType.MONTHLY:
+            detail = f"Há conflitos para o dia {e.date}"
+        else:
+            detail = "Este horário já está reservado"
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail
+        )
+    
      # Inserir no banco de dados
-    result = await db.db.bookings.insert_one(new_booking)
+    try:
+        result = await db.db.bookings.insert_one(new_booking)
+    except Exception:
+        await trim_booking(new_booking["_id"], from_date=date.min)
+        raise
     booking_id = str(result.inserted_id)
+    await record_bookings_created([new_booking])
     
     # Buscar a reserva criada
     created_booking_doc = await db.db.bookings.find_one({"_id": ObjectId(booking_id)})
@@ -293,14 +226,201 @@ async def create_booking(
     
     return new_booking
 
+@router.post("/bookings/batch", response_model=BookingBatch)
+async def create_booking_batch(
+    batch_data: BookingBatchCreate,
+    background_tasks: BackgroundTasks,
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Criar várias reservas avulsas de uma vez (carrinho), em quadras da mesma arena.
+    Os horários são validados juntos, gravados em uma única operação (tudo ou nada)
+    e pagos com um único pagamento (booking_group_id em POST /payments/).
+    """
+    user_id = current_user.id
+    items = batch_data.items
+    
+    if not items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Selecione pelo menos um horário"
+        )
+    
+    if len(items) > MAX_BATCH_BOOKING_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Selecione no máximo {MAX_BATCH_BOOKING_ITEMS} horários por reserva"
+        )
+    
+    # Buscar todas as quadras de uma vez
+    try:
+        court_ids = {ObjectId(item.court_id) for item in items}
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Quadra não encontrada"
+        )
+    
+    courts = {
+        str(court_doc["_id"]): court_doc
+        async for court_doc in db.db.courts.find({"_id": {"$in": list(court_ids)}})
+    }
+    if len(courts) != len(court_ids):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Quadra não encontrada"
+        )
+    
+    arena_ids = {str(court_doc["arena_id"]) for court_doc in courts.values()}
+    if len(arena_ids) != 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Todas as quadras devem pertencer à mesma arena"
+        )
+    
+    # Obter informações da arena
+    arena_doc = await db.db.arenas.find_one({"_id": ObjectId(arena_ids.pop())})
+    if not arena_doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Arena não encontrada"
+        )
+    
+    # Buscar todos os serviços extras do carrinho de uma vez (catálogo da arena em cache)
+    services = await get_services(str(arena_doc["_id"]), [
+        extra.get("service_id")
+        for item in items
+        for extra in item.extra_services
+        if extra.get("quantity", 1) > 0
+    ])
+    
+    # Validar e precificar cada horário
+    current_datetime = datetime.now()
+    booking_group_id = str(ObjectId())
+    new_bookings = []
+    requires_payment = False
+    
+    for item in items:
+        court_doc = courts[str(ObjectId(item.court_id))]
+        
+        try:
+            booking_date = datetime.fromisoformat(item.timeslot.date)
+            start_time = datetime.strptime(item.timeslot.start_time, "%H:%M").time()
+            end_time = datetime.strptime(item.timeslot.end_time, "%H:%M").time()
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Formato de data ou horário inválido"
+            )
+        
+        # Verificar se a data/hora não está no passado
+        if datetime.combine(booking_date.date(), start_time) < current_datetime:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Não é possível agendar para uma data/hora no passado"
+            )
+        
+        # Calcular horas e valores
+        hours_diff = (
+            datetime.combine(datetime.min, end_time) - 
+            datetime.combine(datetime.min, start_time)
+        ).seconds / 3600
+        
+        price_per_hour = effective_price(court_doc)
+        subtotal = price_per_hour * hours_diff
+        
+        # Processar serviços extras
+        extra_services_data, extra_services_total = price_extra_services(item.extra_services, services)
+        
+        # Verificar se a quadra requer pagamento antecipado
+        court_requires_payment = court_doc.get("advance_payment_required", True)
+        if court_requires_payment is None:
+            court_requires_payment = arena_doc.get("advance_payment_required", True)
+        requires_payment = requires_payment or court_requires_payment
+        
+        new_bookings.append({
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "court_id": item.court_id,
+            "arena_id": str(arena_doc["_id"]),
+            "booking_type": BookingType.SINGLE,
+            "timeslot": item.timeslot.dict(),
+            "monthly_config": None,
+            "price_per_hour": price_per_hour,
+            "total_hours": hours_diff,
+            "subtotal": subtotal,
+            "extra_services": extra_services_data,
+            "total_amount": subtotal + extra_services_total,
+            "discount_amount": 0.0,
+            "booking_group_id": booking_group_id,
+            "created_at": current_datetime,
+            "updated_at": current_datetime
+        })
+    
+    # O carrinho é pago de uma vez: se algum horário requer pagamento, todos aguardam
+    payment_deadline = None
+    if requires_payment and arena_doc["payment_deadline_hours"]:
+        payment_deadline = current_datetime + timedelta(hours=arena_doc["payment_deadline_hours"])
+    
+    for new_booking in new_bookings:
+        new_booking["status"] = BookingStatus.WAITING_PAYMENT if requires_payment else BookingStatus.PENDING
+        new_booking["requires_payment"] = requires_payment
+        new_booking["payment_deadline"] = payment_deadline
+    
+    # Nomes de cliente, quadra e arena usados na busca da listagem administrativa
+    user_doc = current_user.dict()
+    for new_booking in new_bookings:
+        with_booking_names(new_booking, user_doc, courts[str(ObjectId(new_booking["court_id"]))], arena_doc)
+    
+    # Reivindicar todos os horários de uma vez e gravar as reservas (tudo ou nada)
+    try:
+        await insert_bookings(new_bookings)
+    except SlotUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"O horário das {e.slot_start} do dia {e.date} já está reservado"
+        )
+    await record_bookings_created(new_bookings)
+    
+    # Notificar arena sobre a nova solicitação (apenas se não requer pagamento antecipado)
+    if not requires_payment:
+        arena_owner = await db.db.users.find_one({"_id": ObjectId(arena_doc["owner_id"])})
+        if arena_owner:
+            background_tasks.add_task(
+                send_booking_request_to_arena,
+                phone=arena_owner.get("phone"),
+                booking_data={
+                    "booking_id": str(new_bookings[0]["_id"]),
+                    "court_name": ", ".join(sorted({court_doc["name"] for court_doc in courts.values()})),
+                    "date": ", ".join(sorted({item.timeslot.date for item in items})),
+                    "time": ", ".join(f"{item.timeslot.start_time} - {item.timeslot.end_time}" for item in items),
+                    "client_name": f"{current_user.first_name} {current_user.last_name}"
+                }
+            )
+    
+    return {
+        "booking_group_id": booking_group_id,
+        "bookings": new_bookings,
+        "total_amount": sum(new_booking["total_amount"] for new_booking in new_bookings),
+        "requires_payment": requires_payment,
+        "payment_deadline": payment_deadline
+    }
+
 @router.get("/bookings/user/me", response_model=List[Booking])
 async def get_user_bookings(
+    response: Response,
     current_user = Depends(get_current_active_user),
     status: Optional[str] = None,
     page: int = 1,
-    items_per_page: int = 20
+    items_per_page: int = 20,
+    cursor: Optional[str] = None,
+    loader: BatchLoader = Depends(get_loader)
 ):
-    """Obter agendamentos do usuário logado"""
+    """
+    Obter agendamentos do usuário logado
+    A próxima página pode ser obtida com o cursor retornado no header X-Next-Cursor.
+    """
+    items_per_page = clamp_page_size(items_per_page)
     user_id = str(current_user.id)
     
     # Construir filtro
@@ -308,25 +428,32 @@ async def get_user_bookings(
     if status:
         filter_query["status"] = status
     
-    # Aplicar paginação
-    skip = (page - 1) * items_per_page
-    
     # Buscar bookings ordenados por data de criação (mais recentes primeiro)
-    cursor = db.db.bookings.find(filter_query).sort("created_at", -1).skip(skip).limit(items_per_page)
+    booking_docs, next_cursor = await fetch_page(
+        db.db.bookings, filter_query,
+        cursor=cursor, page=page, items_per_page=items_per_page,
+        sort_field="created_at"
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    # Carregar quadras e arenas da página de uma vez
+    loader.queue("courts", [booking["court_id"] for booking in booking_docs])
+    loader.queue("arenas", [booking["arena_id"] for booking in booking_docs])
+    await loader.dispatch()
     
-    # Converter cursor para lista
     bookings = []
-    async for booking in cursor:
+    for booking in booking_docs:
         
         new_booking = Booking.from_mongo(booking)
         
         # Adicionar dados relacionados
-        court = await db.db.courts.find_one({"_id": ObjectId(booking["court_id"])})
+        court = loader.get("courts", booking["court_id"])
         if court:
             court = Court.from_mongo(court)
             new_booking.court = court
         
-        arena = await db.db.arenas.find_one({"_id": ObjectId(booking["arena_id"])})
+        arena = loader.get("arenas", booking["arena_id"])
         if arena:
             arena = Arena.from_mongo(arena)
             new_booking.arena = arena
@@ -338,12 +465,19 @@ async def get_user_bookings(
 @router.get("/bookings/arena/{arena_id}", response_model=List[Booking])
 async def get_arena_bookings(
     arena_id: str,
+    response: Response,
     current_user = Depends(get_current_active_user),
     status: Optional[str] = None,
     page: int = 1,
-    items_per_page: int = 20
+    items_per_page: int = 20,
+    cursor: Optional[str] = None,
+    loader: BatchLoader = Depends(get_loader)
 ):
-    """Obter agendamentos de uma arena (somente para donos da arena)"""
+    """
+    Obter agendamentos de uma arena (somente para donos da arena)
+    A próxima página pode ser obtida com o cursor retornado no header X-Next-Cursor.
+    """
+    items_per_page = clamp_page_size(items_per_page)
     user_id = str(current_user["id"])
     
     # Verificar se o usuário tem permissão (dono da arena ou admin)
@@ -365,17 +499,24 @@ async def get_arena_bookings(
     if status:
         filter_query["status"] = status
     
-    # Aplicar paginação
-    skip = (page - 1) * items_per_page
-    
     # Buscar bookings ordenados por data (mais recentes primeiro)
-    cursor = db.db.bookings.find(filter_query).sort("created_at", -1).skip(skip).limit(items_per_page)
+    booking_docs, next_cursor = await fetch_page(
+        db.db.bookings, filter_query,
+        cursor=cursor, page=page, items_per_page=items_per_page,
+        sort_field="created_at"
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    # Carregar quadras e usuários da página de uma vez
+    loader.queue("courts", [booking["court_id"] for booking in booking_docs])
+    loader.queue("users", [booking["user_id"] for booking in booking_docs])
+    await loader.dispatch()
     
-    # Converter cursor para lista
     bookings = []
-    async for booking in cursor:
+    for booking in booking_docs:
         # Adicionar dados relacionados
-        court = await db.db.courts.find_one({"_id": ObjectId(booking["court_id"])})
+        court = loader.get("courts", booking["court_id"])
         if court:
             booking["court"] = {
                 "id": str(court["_id"]),
@@ -383,7 +524,7 @@ async def get_arena_bookings(
                 "type": court["type"]
             }
         
-        user = await db.db.users.find_one({"_id": ObjectId(booking["user_id"])})
+        user = loader.get("users", booking["user_id"])
         if user:
             booking["user"] = {
                 "id": str(user["_id"]),
@@ -469,6 +610,9 @@ async def update_booking_status(
         {"$set": update_data}
     )
     
+    # Atualizar ocorrências e índice de ocupação (ex.: liberar horários ao cancelar)
+    await sync_booking_status(booking, new_status)
+    
     # Buscar a reserva atualizada
     updated_booking = await db.db.bookings.find_one({"_id": ObjectId(booking_id)})
     updated_booking["_id"] = booking_id
@@ -573,6 +717,9 @@ async def cancel_booking(
         {"$set": update_data}
     )
     
+    # Remover as ocorrências futuras e liberar os horários no índice de ocupação
+    await sync_booking_status(booking, BookingStatus.CANCELLED)
+    
     # Processar reembolso se necessário e solicitado
     if cancel_data.request_refund:
         # Verificar se há pagamento associado
@@ -593,6 +740,7 @@ async def cancel_booking(
                     "updated_at": datetime.now()
                 }}
             )
+            await record_payment({**payment, "status": "refunded"}, booking["court_id"], old_status="approved")
     
     # Buscar a reserva atualizada
     updated_booking = await db.db.bookings.find_one({"_id": ObjectId(booking_id)})
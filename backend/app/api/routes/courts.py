@@ -1,20 +1,29 @@
 # app/api/routes/courts.py
-from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Union
 from datetime import date, datetime, timedelta
 from bson.objectid import ObjectId
 import pymongo
-from streamlit import status
 
 from app.core.security import get_current_user, get_current_active_user
 from app.db.database import db
-from app.models.court import Court, CourtCreate, CourtUpdate, CourtType
-from app.services.maps import calculate_distance
+from app.models.court import Court, CourtCreate, CourtSearchPage, CourtUpdate, CourtType
+from app.core.constants import MAX_BOOKING_ADVANCE_DAYS
+from app.services.availability import WEEKDAY_FIELDS, compute_availability, date_range, fully_booked_courts, get_cached_availability
+from app.services.events import stream_availability
+from app.services.facets import COURT_FACETS, count_facets, fetch_faceted_page, parse_facets, within_radius
+from app.services.maps import fetch_ranked_page
+from app.services.occupancy import minutes_to_time_str, occupied_courts, slot_mask, time_to_minutes
+from app.services.search_cache import cache_search, get_cached_search, search_cache, search_cache_key
+from app.services.text_search import prefix_match
+from app.utils.helpers import clamp_page_size, fetch_near_page, fetch_page, keyset_query, keyset_sort, split_page
 
 router = APIRouter()
 
-@router.get("/courts", response_model=List[Court])
+@router.get("/courts", response_model=Union[List[Court], CourtSearchPage])
 async def search_courts(
+    response: Response,
     court_type: Optional[str] = None,
     city: Optional[str] = None,
     state: Optional[str] = None,
@@ -28,14 +37,54 @@ async def search_courts(
     latitude: Optional[float] = None,
     longitude: Optional[float] = None,
     distance_km: Optional[float] = None,
-    sort_by: Optional[str] = "distance",  # distance, price, rating
+    sort_by: Optional[str] = "distance",  # distance, price_asc, price_desc, rating, relevance
     page: int = 1,
-    items_per_page: int = 20
+    items_per_page: int = 20,
+    cursor: Optional[str] = None,
+    facets: Optional[str] = None  # type,city,neighborhood,price
 ):
     """
     Buscar quadras disponíveis com filtros
+    A próxima página pode ser obtida com o cursor retornado no header X-Next-Cursor.
+    Com latitude/longitude, cada quadra traz a distância (km) calculada pelo banco.
+    A ordenação "relevance" combina distância, preço e avaliação (paginada por número de página)
+    e pontua no máximo SEARCH_RANKING_MAX_CANDIDATES (2000) quadras: as mais próximas, com
+    latitude/longitude, ou as mais bem avaliadas, sem elas. As facetas contam todo o filtro.
+    Com date (e start_time/end_time), retorna apenas quadras livres e com a arena aberta no horário.
+    O header X-Cache indica se o resultado veio do cache de buscas (HIT/MISS).
+    Com facets, retorna {"items": [...], "facets": {faceta: [{"value", "count"}]}}.
     """
-    # Construir o filtro de busca
+    items_per_page = clamp_page_size(items_per_page)
+    facet_names = parse_facets(facets, COURT_FACETS)
+    
+    # Buscas repetidas (ex.: cidade e modalidade da página inicial) são servidas do cache
+    # As contagens das facetas não dependem da página e têm chave própria
+    filters = dict(
+        court_type=court_type, city=city, state=state, neighborhood=neighborhood,
+        date=date, start_time=start_time, end_time=end_time,
+        min_price=min_price, max_price=max_price, amenities=amenities,
+        latitude=latitude, longitude=longitude, distance_km=distance_km
+    )
+    cache_key = search_cache_key(
+        "courts", **filters,
+        sort_by=sort_by, page=page, items_per_page=items_per_page, cursor=cursor
+    )
+    facets_key = search_cache_key("courts_facets", **filters, facets=facet_names)
+    cached = get_cached_search(cache_key)
+    cached_facets = get_cached_search(facets_key) if facet_names else None
+    if cached is not None and (cached_facets is not None or not facet_names):
+        courts, next_cursor = cached
+        response.headers["X-Cache"] = "HIT"
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        if facet_names:
+            return {"items": courts, "facets": cached_facets[0]}
+        return courts
+    
+    response.headers["X-Cache"] = "MISS"
+    generation = search_cache.generation
+    
+    # Construir o filtro de busca sobre a projeção court_search (quadra + dados da arena)
     filter_query = {}
     
     # Filtrar por tipo de quadra
@@ -44,101 +93,167 @@ async def search_courts(
     
     # Filtrar por localização (cidade, estado, bairro)
     if city:
-        filter_query["arena.address.city"] = {"$regex": city, "$options": "i"}
+        filter_query["search.city"] = prefix_match(city)
     if state:
-        filter_query["arena.address.state"] = {"$regex": state, "$options": "i"}
+        filter_query["search.state"] = prefix_match(state)
     if neighborhood:
-        filter_query["arena.address.neighborhood"] = {"$regex": neighborhood, "$options": "i"}
+        filter_query["search.neighborhood"] = prefix_match(neighborhood)
     
-    # Filtrar por preço
+    # Filtrar pelo preço efetivamente cobrado
     price_filter = {}
     if min_price is not None:
         price_filter["$gte"] = min_price
     if max_price is not None:
         price_filter["$lte"] = max_price
     if price_filter:
-        filter_query["price_per_hour"] = price_filter
+        filter_query["effective_price"] = price_filter
     
     # Filtrar por comodidades (amenities)
     if amenities:
-        filter_query["arena.amenities"] = {"$all": amenities}
+        filter_query["amenities"] = {"$all": amenities}
     
-    # Filtrar apenas quadras disponíveis
+    # Filtrar apenas quadras disponíveis de arenas ativas
     filter_query["is_available"] = True
-    
-    # Busca por proximidade (geoespacial)
-    if latitude and longitude and distance_km:
-        # Buscar arenas próximas usando coordenadas geoespaciais
-        filter_query["arena.address.coordinates"] = {
-            "$near": {
-                "$geometry": {
-                    "type": "Point",
-                    "coordinates": [longitude, latitude]
-                },
-                "$maxDistance": distance_km * 1000  # Converter km para metros
-            }
-        }
+    filter_query["arena_active"] = True
     
     # Verificar disponibilidade por data e horário
-    # Isso requer uma lógica adicional para verificar os agendamentos existentes
     if date:
-        # Lógica para filtrar quadras disponíveis na data especificada
-        # Este é um exemplo simplificado - na prática, você precisaria verificar
-        # se não há agendamentos conflitantes para o horário solicitado
-        date_str = date.isoformat()
+        weekday_field = f"business_hours.{WEEKDAY_FIELDS[date.weekday()]}"
         
-        # Para ser totalmente implementado, essa parte precisa ser mais elaborada,
-        # verificando os agendamentos existentes no banco de dados
-        pass
-    
-    # Aplicar paginação
-    skip = (page - 1) * items_per_page
+        if start_time or end_time:
+            # Sem término, considerar 1 hora a partir do início (e vice-versa)
+            try:
+                start_minutes = time_to_minutes(start_time) if start_time else time_to_minutes(end_time) - 60
+                end_minutes = time_to_minutes(end_time) if end_time else start_minutes + 60
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Formato de horário inválido. Use HH:MM"
+                )
+            if end_minutes == 0:
+                end_minutes = 24 * 60  # "00:00" como término representa o fim do dia
+            if not 0 <= start_minutes < end_minutes <= 24 * 60:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Horário inválido: o término deve ser posterior ao início"
+                )
+            window_start = minutes_to_time_str(start_minutes)
+            window_end = minutes_to_time_str(end_minutes % (24 * 60))
+            
+            # A arena deve estar aberta durante todo o horário pedido
+            end_condition = [{"end": "00:00"}]
+            if window_end != "00:00":
+                end_condition.append({"end": {"$gte": window_end}})
+            filter_query[weekday_field] = {"$elemMatch": {
+                "start": {"$lte": window_start},
+                "$or": end_condition
+            }}
+            
+            # Quadras com algum slot ocupado no horário: uma consulta ao índice de ocupação
+            busy_court_ids = await occupied_courts(date.isoformat(), slot_mask(window_start, window_end))
+            if busy_court_ids:
+                filter_query["_id"] = {"$nin": [
+                    ObjectId(court_id) for court_id in busy_court_ids if ObjectId.is_valid(court_id)
+                ]}
+        else:
+            # Apenas a data: a arena deve abrir nesse dia da semana e a quadra
+            # precisa ter algum slot livre no horário de funcionamento do dia
+            filter_query[f"{weekday_field}.0"] = {"$exists": True}
+            busy_court_ids = await fully_booked_courts(date)
+            if busy_court_ids:
+                filter_query["_id"] = {"$nin": [
+                    ObjectId(court_id) for court_id in busy_court_ids if ObjectId.is_valid(court_id)
+                ]}
     
     # Determinar ordenação
     sort_options = {
-        "price_asc": [("price_per_hour", pymongo.ASCENDING)],
-        "price_desc": [("price_per_hour", pymongo.DESCENDING)],
-        "rating": [("arena.rating", pymongo.DESCENDING)]
+        "price_asc": ("effective_price", pymongo.ASCENDING),
+        "price_desc": ("effective_price", pymongo.DESCENDING),
+        "rating": ("rating", pymongo.DESCENDING)
     }
     
-    # Para ordenação por distância, não precisamos especificar aqui
-    # pois já é aplicada automaticamente pela consulta $near
-    if sort_by == "distance" and not (latitude and longitude):
+    has_coordinates = latitude is not None and longitude is not None
+    if sort_by == "distance" and not has_coordinates:
         # Se sort_by é distance mas não temos coordenadas, usar rating como fallback
         sort_option = sort_options.get("rating")
     else:
         sort_option = sort_options.get(sort_by, None)
     
     # Executar a consulta
-    cursor = db.db.courts.find(filter_query)
-    if sort_option:
-        cursor = cursor.sort(sort_option)
-    cursor = cursor.skip(skip).limit(items_per_page)
-    
-    # Converter cursor para lista
-    courts = []
-    async for court_doc in cursor:
-        # Adicionar dados da arena
-        arena_doc = await db.db.arenas.find_one({"_id": ObjectId(court_doc["arena_id"])})
-        if arena_doc:
-            court_doc["arena"] = {
-                "id": str(arena_doc["_id"]),
-                "name": arena_doc["name"],
-                "address": arena_doc["address"],
-                "rating": arena_doc.get("rating", 0.0)
+    next_cursor = None
+    facet_counts = None
+    if sort_by == "relevance":
+        # Pontuação combinada de distância, preço e avaliação, calculada localmente
+        court_docs = await fetch_ranked_page(
+            db.db.court_search, filter_query, latitude, longitude,
+            page=page, items_per_page=items_per_page,
+            max_distance_km=distance_km
+        )
+    elif has_coordinates and (distance_km or not sort_option):
+        # Busca por proximidade: $geoNear filtra pelo raio e calcula a distância (km)
+        if sort_option:
+            # Ordenação por preço/avaliação dentro do raio, paginada por cursor
+            sort_field, direction = sort_option
+            geo_near = {
+                "near": {"type": "Point", "coordinates": [longitude, latitude]},
+                "key": "location",
+                "distanceField": "distance",
+                "distanceMultiplier": 0.001,
+                "spherical": True,
+                "maxDistance": distance_km * 1000,  # Converter km para metros
+                "query": keyset_query(filter_query, cursor, sort_field, direction)
             }
-            
-            # Calcular distância se coordenadas foram fornecidas
-            if latitude and longitude and "coordinates" in arena_doc["address"]:
-                court_doc["distance"] = calculate_distance(
-                    (latitude, longitude),
-                    (arena_doc["address"]["coordinates"]["latitude"], arena_doc["address"]["coordinates"]["longitude"])
-                )
-        
-        # Usar from_mongo para converter o documento
-        courts.append(Court.from_mongo(court_doc))
+            pipeline = [
+                {"$geoNear": geo_near},
+                {"$sort": dict(keyset_sort(sort_field, direction))},
+                {"$skip": 0 if cursor else (max(page, 1) - 1) * items_per_page},
+                {"$limit": items_per_page + 1}
+            ]
+            court_docs = await db.db.court_search.aggregate(pipeline).to_list(length=None)
+            court_docs, next_cursor = split_page(court_docs, items_per_page, sort_field)
+        else:
+            # Ordenação por distância, paginada por cursor (distância, _id)
+            court_docs, next_cursor = await fetch_near_page(
+                db.db.court_search, filter_query, longitude, latitude,
+                cursor=cursor, page=page, items_per_page=items_per_page,
+                max_distance_km=distance_km
+            )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+    else:
+        sort_field, direction = sort_option or ("_id", pymongo.ASCENDING)
+        if facet_names:
+            # Página e contagens das facetas na mesma agregação
+            court_docs, next_cursor, facet_counts = await fetch_faceted_page(
+                db.db.court_search, filter_query, COURT_FACETS, facet_names,
+                cursor=cursor, page=page, items_per_page=items_per_page,
+                sort_field=sort_field, direction=direction
+            )
+        else:
+            court_docs, next_cursor = await fetch_page(
+                db.db.court_search, filter_query,
+                cursor=cursor, page=page, items_per_page=items_per_page,
+                sort_field=sort_field, direction=direction
+            )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+    
+    # Os documentos de busca já trazem os dados da arena
+    courts = [Court.from_mongo(court_doc) for court_doc in court_docs]
+    cache_search(cache_key, city, courts, next_cursor, generation, date=date)
+    
+    if not facet_names:
+        return courts
     
-    return courts
+    if facet_counts is None:
+        # Buscas por proximidade/relevância: contagens sobre o mesmo filtro (e raio)
+        facet_counts = await count_facets(
+            db.db.court_search,
+            within_radius(filter_query, latitude, longitude, distance_km),
+            COURT_FACETS, facet_names
+        )
+    cache_search(facets_key, city, facet_counts, None, generation, date=date)
+    return {"items": courts, "facets": facet_counts}
 
 @router.get("/courts/{court_id}", response_model=Court)
 async def get_court(court_id: str):
@@ -175,6 +290,11 @@ async def get_court_availability(
     if not end_date:
         end_date = start_date
     
+    # Dias já calculados vêm do cache; os demais são calculados juntos
+    availability, missing_dates = get_cached_availability(court_id, date_range(start_date, end_date))
+    if not missing_dates:
+        return availability
+    
     # Verificar se a quadra existe
     court_doc = await db.db.courts.find_one({"_id": ObjectId(court_id)})
     if not court_doc:
@@ -191,101 +311,42 @@ async def get_court_availability(
             detail="Arena não encontrada"
         )
     
-    # Criar um dicionário de disponibilidade por dia
-    availability = {}
+    # Calcular os dias restantes com uma única consulta ao índice de ocupação
+    availability.update(await compute_availability(court_id, arena_doc, missing_dates))
     
-    # Para cada dia no intervalo
-    current_date = start_date
-    while current_date <= end_date:
-        date_str = current_date.isoformat()
-        weekday = current_date.weekday()  # 0 é segunda-feira, 6 é domingo
-        
-        # Mapear weekday para o campo correspondente no business_hours
-        weekday_map = {
-            0: "monday",
-            1: "tuesday",
-            2: "wednesday",
-            3: "thursday",
-            4: "friday",
-            5: "saturday",
-            6: "sunday"
-        }
-        
-        # Obter horários de funcionamento para este dia da semana
-        day_hours = arena_doc["business_hours"].get(weekday_map[weekday], [])
-        
-        # Obter reservas existentes para este dia
-        existing_bookings = await db.db.bookings.find({
-            "court_id": court_id,
-            "status": {"$in": ["confirmed", "pending"]},
-            "$or": [
-                # Reservas avulsas neste dia
-                {
-                    "booking_type": "single",
-                    "timeslot.date": date_str
-                },
-                # Reservas mensais que incluem este dia da semana
-                {
-                    "booking_type": "monthly",
-                    "monthly_config.weekdays": weekday,
-                    "monthly_config.start_date": {"$lte": date_str},
-                    "$or": [
-                        {"monthly_config.end_date": {"$gte": date_str}},
-                        {"monthly_config.end_date": None}
-                    ]
-                }
-            ]
-        }).to_list(length=None)
-        
-        # Criar slots de tempo disponíveis
-        time_slots = []
-        
-        for hour_range in day_hours:
-            start_time_str = hour_range["start"]  # '07:00'
-            end_time_str = hour_range["end"]     # '23:00'
-            
-            # Converter strings para objetos time
-            start_time = datetime.strptime(start_time_str, "%H:%M").time()
-            end_time = datetime.strptime(end_time_str, "%H:%M").time()
-            
-            # Criar slots de 1 hora
-            current_time = start_time
-            while current_time < end_time:
-                try:
-                    next_time = (datetime.combine(date.min, current_time) + timedelta(hours=1)).time()
-                    # ... resto do seu código ...
-                    current_time = next_time
-                except Exception as e:
-                    raise
-                
-                # Verificar se este slot está livre
-                is_available = True
-                
-                for booking in existing_bookings:
-                    if booking["booking_type"] == "single":
-                        booking_start = booking["timeslot"]["start_time"]
-                        booking_end = booking["timeslot"]["end_time"]
-                    else:  # monthly
-                        booking_start = booking["monthly_config"]["start_time"]
-                        booking_end = booking["monthly_config"]["end_time"]
-                    
-                    # Verificar se há sobreposição
-                    if (current_time < booking_end and next_time > booking_start):
-                        is_available = False
-                        break
-                
-                time_slots.append({
-                    "start": current_time.strftime("%H:%M"),
-                    "end": next_time.strftime("%H:%M"),
-                    "is_available": is_available
-                })
-                
-                current_time = next_time
-        
-        # Adicionar slots ao dicionário de disponibilidade
-        availability[date_str] = time_slots
-        
-        # Avançar para o próximo dia
-        current_date += timedelta(days=1)
+    # Manter a ordem cronológica das datas
+    return {day: availability[day] for day in sorted(availability)}
+
+@router.get("/courts/{court_id}/availability/stream")
+async def stream_court_availability(
+    court_id: str,
+    request: Request,
+    start_date: date,
+    end_date: Optional[date] = None
+):
+    """
+    Acompanhar em tempo real (Server-Sent Events) as mudanças de ocupação de uma quadra.
+    Cada evento "slots" traz o bitmap dos slots ocupados/liberados em um dia.
+    """
+    if not end_date:
+        end_date = start_date
+    
+    if end_date < start_date or (end_date - start_date).days > MAX_BOOKING_ADVANCE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Intervalo de datas inválido (máximo de {MAX_BOOKING_ADVANCE_DAYS} dias)"
+        )
+    
+    # Verificar se a quadra existe
+    court_doc = await db.db.courts.find_one({"_id": ObjectId(court_id)}, {"_id": 1})
+    if not court_doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Quadra não encontrada"
+        )
     
-    return availability
\ No newline at end of file
+    return StreamingResponse(
+        stream_availability([court_id], start_date, end_date, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
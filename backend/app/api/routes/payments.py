@@ -1,6 +1,7 @@
 # app/api/routes/payments.py
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from bson.objectid import ObjectId
 
@@ -8,10 +9,13 @@ from app.core.security import get_current_user, get_current_active_user
 from app.db.database import db
 from app.models.payment import Payment, PaymentCreate, PaymentUpdate, PaymentStatus, PaymentMethod
 from app.models.booking import BookingStatus
+from app.services.daily_stats import record_booking_status, record_payment
 from app.services.payment import create_payment as service_create_payment, process_webhook
 from app.services.email import send_booking_request_to_arena, send_payment_confirmation_email
 from app.services.whatsapp import send_payment_confirmation_whatsapp
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 @router.post("/payments/", response_model=Payment)
@@ -23,12 +27,38 @@ async def create_payment(
     """Iniciar um novo pagamento"""
     user_id = str(current_user["id"])
     
-    # Buscar a reserva
-    booking = await db.db.bookings.find_one({"_id": ObjectId(payment_data.booking_id)})
-    if not booking:
+    # Buscar a reserva (ou as reservas de um carrinho, pagas juntas)
+    if payment_data.booking_group_id:
+        # Apenas os itens que ainda aguardam pagamento (itens cancelados não são cobrados)
+        group_bookings = await db.db.bookings.find({
+            "booking_group_id": payment_data.booking_group_id,
+            "status": BookingStatus.WAITING_PAYMENT
+        }).to_list(length=None)
+        if not group_bookings:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Nenhuma reserva deste carrinho está aguardando pagamento"
+            )
+        
+        # O carrinho é tratado como uma reserva com o valor total dos horários pendentes
+        booking = {
+            **group_bookings[0],
+            "total_amount": sum(group_booking["total_amount"] for group_booking in group_bookings)
+        }
+        payment_data.booking_id = str(group_bookings[0]["_id"])
+        booking_filter = {"booking_group_id": payment_data.booking_group_id}
+    elif payment_data.booking_id:
+        booking = await db.db.bookings.find_one({"_id": ObjectId(payment_data.booking_id)})
+        if not booking:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Reserva não encontrada"
+            )
+        booking_filter = {"_id": ObjectId(payment_data.booking_id)}
+    else:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Reserva não encontrada"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe a reserva a ser paga"
         )
     
     # Verificar se o usuário tem permissão (dono da reserva)
@@ -45,9 +75,21 @@ async def create_payment(
             detail="Esta reserva não requer pagamento antecipado"
         )
     
+    # Verificar se a reserva ainda aguarda pagamento (ex.: não foi cancelada)
+    if booking["status"] != BookingStatus.WAITING_PAYMENT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Esta reserva não está aguardando pagamento"
+        )
+    
     # Verificar se já existe um pagamento
+    if payment_data.booking_group_id:
+        payment_filter = {"booking_group_id": payment_data.booking_group_id}
+    else:
+        payment_filter = {"booking_id": payment_data.booking_id}
+    
     existing_payment = await db.db.payments.find_one({
-        "booking_id": payment_data.booking_id,
+        **payment_filter,
         "status": {"$in": ["pending", "approved"]}
     })
     
@@ -98,6 +140,7 @@ async def create_payment(
         # Criar registro de pagamento
         new_payment = {
             "booking_id": payment_data.booking_id,
+            "booking_group_id": payment_data.booking_group_id,
             "user_id": user_id,
             "arena_id": booking["arena_id"],
             "amount": payment_data.amount,
@@ -129,21 +172,16 @@ async def create_payment(
         result = await db.db.payments.insert_one(new_payment)
         payment_id = str(result.inserted_id)
         new_payment["_id"] = payment_id
+        await record_payment(new_payment, booking["court_id"])
         
         # Se o pagamento foi aprovado imediatamente (cartão), atualizar status da reserva
         if new_payment["status"] == PaymentStatus.APPROVED:
-            await db.db.bookings.update_one(
-                {"_id": ObjectId(payment_data.booking_id)},
-                {"$set": {
-                    "status": BookingStatus.PENDING,
-                    "updated_at": datetime.now()
-                }}
-            )
+            confirmed = await confirm_paid_bookings(booking_filter)
             
-            # Notificar arena sobre nova reserva
-            booking_with_details = await get_booking_with_details(payment_data.booking_id)
+            # Notificar arena sobre nova reserva (se alguma reserva foi confirmada)
+            booking_with_details = await get_booking_with_details(payment_data.booking_id) if confirmed else None
             
-            arena_owner = await db.db.users.find_one({"_id": ObjectId(booking_with_details["arena"]["owner_id"])})
+            arena_owner = await db.db.users.find_one({"_id": ObjectId(booking_with_details["arena"]["owner_id"])}) if booking_with_details else None
             if arena_owner:
                 background_tasks.add_task(
                     send_booking_request_to_arena,
@@ -200,20 +238,42 @@ async def payment_webhook(
             {"$set": update_data}
         )
         
+        booking = await db.db.bookings.find_one({"_id": ObjectId(payment["booking_id"])})
+        await record_payment(
+            {**payment, **update_data},
+            booking["court_id"] if booking else None,
+            old_status=payment["status"]
+        )
+        
         # Se o pagamento foi aprovado, atualizar status da reserva
         if new_status == PaymentStatus.APPROVED:
-            booking = await db.db.bookings.find_one({"_id": ObjectId(payment["booking_id"])})
             if booking:
-                await db.db.bookings.update_one(
-                    {"_id": ObjectId(payment["booking_id"])},
-                    {"$set": {
-                        "status": BookingStatus.PENDING,
-                        "updated_at": datetime.now()
-                    }}
-                )
+                # Pagamentos de carrinho confirmam todas as reservas do grupo
+                if payment.get("booking_group_id"):
+                    booking_filter = {"booking_group_id": payment["booking_group_id"]}
+                else:
+                    booking_filter = {"_id": ObjectId(payment["booking_id"])}
+                
+                confirmed = await confirm_paid_bookings(booking_filter)
+                
+                # Pagamento de reserva já cancelada: marcar para reembolso
+                cancelled_ids = [
+                    str(paid_booking["_id"])
+                    for paid_booking in await db.db.bookings.find(
+                        {**booking_filter, "status": BookingStatus.CANCELLED}, {"_id": 1}
+                    ).to_list(length=None)
+                ]
+                if cancelled_ids:
+                    await db.db.payments.update_one(
+                        {"_id": payment["_id"]},
+                        {"$set": {"refund_required": True, "refund_booking_ids": cancelled_ids}}
+                    )
+                    logger.warning(
+                        f"Pagamento {payment['_id']} aprovado para reservas canceladas {cancelled_ids}: reembolso necessário"
+                    )
                 
                 # Notificar cliente sobre confirmação de pagamento
-                user = await db.db.users.find_one({"_id": ObjectId(payment["user_id"])})
+                user = await db.db.users.find_one({"_id": ObjectId(payment["user_id"])}) if confirmed else None
                 if user:
                     booking_with_details = await get_booking_with_details(payment["booking_id"])
                     
@@ -242,21 +302,21 @@ async def payment_webhook(
                             "arena_name": booking_with_details["arena"]["name"]
                         }
                     )
-                
-                # Notificar arena sobre nova reserva
-                arena_owner = await db.db.users.find_one({"_id": ObjectId(booking_with_details["arena"]["owner_id"])})
-                if arena_owner:
-                    background_tasks.add_task(
-                        send_booking_request_to_arena,
-                        phone=arena_owner.get("phone"),
-                        booking_data={
-                            "booking_id": payment["booking_id"],
-                            "court_name": booking_with_details["court"]["name"],
-                            "date": booking_with_details["date_str"],
-                            "time": booking_with_details["time_str"],
-                            "client_name": f"{user.get('first_name')} {user.get('last_name')}"
-                        }
-                    )
+                    
+                    # Notificar arena sobre nova reserva
+                    arena_owner = await db.db.users.find_one({"_id": ObjectId(booking_with_details["arena"]["owner_id"])})
+                    if arena_owner:
+                        background_tasks.add_task(
+                            send_booking_request_to_arena,
+                            phone=arena_owner.get("phone"),
+                            booking_data={
+                                "booking_id": payment["booking_id"],
+                                "court_name": booking_with_details["court"]["name"],
+                                "date": booking_with_details["date_str"],
+                                "time": booking_with_details["time_str"],
+                                "client_name": f"{user.get('first_name')} {user.get('last_name')}"
+                            }
+                        )
         
         return {"success": True}
     
@@ -329,6 +389,37 @@ async def get_payment(
     
     return payment
 
+# Função auxiliar para confirmar as reservas de um pagamento aprovado
+async def confirm_paid_bookings(booking_filter: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Passar para pendentes as reservas pagas que ainda aguardam pagamento.
+    
+    O filtro por status em cada atualização evita reativar uma reserva cancelada
+    (pelo usuário ou por prazo expirado), cujos horários já foram liberados.
+    Retorna apenas as reservas que mudaram de status.
+    """
+    paid_bookings = await db.db.bookings.find(
+        booking_filter,
+        {"status": 1, "court_id": 1, "arena_id": 1, "created_at": 1}
+    ).to_list(length=None)
+    
+    confirmed = []
+    for paid_booking in paid_bookings:
+        if paid_booking["status"] != BookingStatus.WAITING_PAYMENT:
+            continue
+        result = await db.db.bookings.update_one(
+            {"_id": paid_booking["_id"], "status": BookingStatus.WAITING_PAYMENT},
+            {"$set": {
+                "status": BookingStatus.PENDING,
+                "updated_at": datetime.now()
+            }}
+        )
+        if result.modified_count:
+            confirmed.append(paid_booking)
+    
+    await record_booking_status(confirmed, BookingStatus.PENDING)
+    return confirmed
+
 # Função auxiliar para obter detalhes completos de uma reserva
 async def get_booking_with_details(booking_id: str) -> Dict[str, Any]:
     """Obter reserva com detalhes relacionados"""
@@ -1,12 +1,15 @@
 # app/api/routes/reviews.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from bson.objectid import ObjectId
 
 from app.core.security import get_current_user, get_current_active_user
 from app.db.database import db
+from app.db.loader import BatchLoader, get_loader
 from app.models.review import Review, ReviewCreate, ReviewUpdate
+from app.services.court_search import sync_arena
+from app.utils.helpers import clamp_page_size, fetch_page
 
 router = APIRouter()
 
@@ -121,10 +124,17 @@ async def get_booking_review(
 @router.get("/reviews/arena/{arena_id}", response_model=List[Review])
 async def get_arena_reviews(
     arena_id: str,
+    response: Response,
     page: int = 1,
-    items_per_page: int = 20
+    items_per_page: int = 20,
+    cursor: Optional[str] = None,
+    loader: BatchLoader = Depends(get_loader)
 ):
-    """Obter avaliações de uma arena específica"""
+    """
+    Obter avaliações de uma arena específica
+    A próxima página pode ser obtida com o cursor retornado no header X-Next-Cursor.
+    """
+    items_per_page = clamp_page_size(items_per_page)
     # Verificar se a arena existe
     arena_doc = await db.db.arenas.find_one({"_id": ObjectId(arena_id)})
     if not arena_doc:
@@ -133,17 +143,23 @@ async def get_arena_reviews(
             detail="Arena não encontrada"
         )
     
-    # Aplicar paginação
-    skip = (page - 1) * items_per_page
-    
     # Buscar avaliações ordenadas por data (mais recentes primeiro)
-    cursor = db.db.reviews.find({"arena_id": arena_id}).sort("created_at", -1).skip(skip).limit(items_per_page)
+    review_docs, next_cursor = await fetch_page(
+        db.db.reviews, {"arena_id": arena_id},
+        cursor=cursor, page=page, items_per_page=items_per_page,
+        sort_field="created_at"
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    # Carregar os autores da página de uma vez
+    loader.queue("users", [review_doc["user_id"] for review_doc in review_docs])
+    await loader.dispatch()
     
-    # Converter cursor para lista
     reviews = []
-    async for review_doc in cursor:
+    for review_doc in review_docs:
         # Adicionar dados do usuário
-        user_doc = await db.db.users.find_one({"_id": ObjectId(review_doc["user_id"])})
+        user_doc = loader.get("users", review_doc["user_id"])
         if user_doc:
             review_doc["user"] = {
                 "name": f"{user_doc.get('first_name')} {user_doc.get('last_name')[0]}.",  # Apenas inicial do sobrenome
@@ -157,10 +173,17 @@ async def get_arena_reviews(
 @router.get("/reviews/court/{court_id}", response_model=List[Review])
 async def get_court_reviews(
     court_id: str,
+    response: Response,
     page: int = 1,
-    items_per_page: int = 20
+    items_per_page: int = 20,
+    cursor: Optional[str] = None,
+    loader: BatchLoader = Depends(get_loader)
 ):
-    """Obter avaliações de uma quadra específica"""
+    """
+    Obter avaliações de uma quadra específica
+    A próxima página pode ser obtida com o cursor retornado no header X-Next-Cursor.
+    """
+    items_per_page = clamp_page_size(items_per_page)
     # Verificar se a quadra existe
     court_doc = await db.db.courts.find_one({"_id": ObjectId(court_id)})
     if not court_doc:
@@ -169,17 +192,23 @@ async def get_court_reviews(
             detail="Quadra não encontrada"
         )
     
-    # Aplicar paginação
-    skip = (page - 1) * items_per_page
-    
     # Buscar avaliações ordenadas por data (mais recentes primeiro)
-    cursor = db.db.reviews.find({"court_id": court_id}).sort("created_at", -1).skip(skip).limit(items_per_page)
+    review_docs, next_cursor = await fetch_page(
+        db.db.reviews, {"court_id": court_id},
+        cursor=cursor, page=page, items_per_page=items_per_page,
+        sort_field="created_at"
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    # Carregar os autores da página de uma vez
+    loader.queue("users", [review_doc["user_id"] for review_doc in review_docs])
+    await loader.dispatch()
     
-    # Converter cursor para lista
     reviews = []
-    async for review_doc in cursor:
+    for review_doc in review_docs:
         # Adicionar dados do usuário
-        user_doc = await db.db.users.find_one({"_id": ObjectId(review_doc["user_id"])})
+        user_doc = loader.get("users", review_doc["user_id"])
         if user_doc:
             review_doc["user"] = {
                 "name": f"{user_doc.get('first_name')} {user_doc.get('last_name')[0]}.",  # Apenas inicial do sobrenome
@@ -192,25 +221,39 @@ async def get_court_reviews(
 
 @router.get("/reviews/user/me", response_model=List[Review])
 async def get_user_reviews(
+    response: Response,
     current_user = Depends(get_current_active_user),
     page: int = 1,
-    items_per_page: int = 20
+    items_per_page: int = 20,
+    cursor: Optional[str] = None,
+    loader: BatchLoader = Depends(get_loader)
 ):
-    """Obter avaliações feitas pelo usuário logado"""
+    """
+    Obter avaliações feitas pelo usuário logado
+    A próxima página pode ser obtida com o cursor retornado no header X-Next-Cursor.
+    """
+    items_per_page = clamp_page_size(items_per_page)
     user_id = current_user.id  # Usando id em vez de _id
     
-    # Aplicar paginação
-    skip = (page - 1) * items_per_page
-    
     # Buscar avaliações ordenadas por data (mais recentes primeiro)
-    cursor = db.db.reviews.find({"user_id": user_id}).sort("created_at", -1).skip(skip).limit(items_per_page)
+    review_docs, next_cursor = await fetch_page(
+        db.db.reviews, {"user_id": user_id},
+        cursor=cursor, page=page, items_per_page=items_per_page,
+        sort_field="created_at"
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    # Carregar quadras e arenas da página de uma vez
+    loader.queue("courts", [review_doc["court_id"] for review_doc in review_docs])
+    loader.queue("arenas", [review_doc["arena_id"] for review_doc in review_docs])
+    await loader.dispatch()
     
-    # Converter cursor para lista
     reviews = []
-    async for review_doc in cursor:
+    for review_doc in review_docs:
         # Buscar dados da quadra e arena
-        court_doc = await db.db.courts.find_one({"_id": ObjectId(review_doc["court_id"])})
-        arena_doc = await db.db.arenas.find_one({"_id": ObjectId(review_doc["arena_id"])})
+        court_doc = loader.get("courts", review_doc["court_id"])
+        arena_doc = loader.get("arenas", review_doc["arena_id"])
         
         if court_doc and arena_doc:
             review_doc["court"] = {
@@ -333,4 +376,7 @@ async def update_arena_rating(arena_id: str):
             "rating": round(avg_rating, 1),
             "rating_count": review_count
         }}
-    )
\ No newline at end of file
+    )
+    
+    # A avaliação da arena também é usada na busca de quadras
+    await sync_arena(arena_id)
\ No newline at end of file
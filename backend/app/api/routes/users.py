@@ -7,6 +7,9 @@ from datetime import datetime
 from app.core.security import get_current_user, get_current_active_user, get_password_hash
 from app.db.database import db
 from app.models.user import User, UserUpdate, UserInDB
+from app.services.arena_stats import OWNER_SUMMARY_FIELDS, refresh_owner_summary
+from app.services.booking_search import BOOKING_USER_FIELDS, refresh_user_bookings
+from app.services.text_search import USER_SEARCH_FIELDS, touches_fields, user_search_keys
 
 router = APIRouter()
 
@@ -48,6 +51,10 @@ async def update_user_me(
     if "password" in update_data:
         update_data["password_hash"] = get_password_hash(update_data.pop("password"))
     
+    # Manter as chaves de busca (nome, email, username)
+    if touches_fields(update_data, USER_SEARCH_FIELDS):
+        update_data["search"] = user_search_keys({**current_user.dict(), **update_data})
+    
     # Adicionar data de atualização
     update_data["updated_at"] = datetime.utcnow()
     
@@ -57,9 +64,17 @@ async def update_user_me(
         {"$set": update_data}
     )
     
+    # Dados do proprietário gravados nas arenas dele
+    if touches_fields(update_data, OWNER_SUMMARY_FIELDS):
+        await refresh_owner_summary(user_id)
+    
     # Retornar usuário atualizado
     updated_user_doc = await db.db.users.find_one({"_id": ObjectId(user_id)})
     
+    # Nome e email do cliente gravados nas reservas dele
+    if touches_fields(update_data, BOOKING_USER_FIELDS):
+        await refresh_user_bookings(updated_user_doc)
+    
     return User.from_mongo(updated_user_doc)
 
 @router.get("/users/{user_id}", response_model=User)
@@ -214,4 +214,59 @@ MIN_BOOKING_ADVANCE_HOURS = 2
 MAX_BOOKING_ADVANCE_DAYS = 60
 
 # Número máximo de reservas ativas por usuário
-MAX_ACTIVE_BOOKINGS_PER_USER = 10
\ No newline at end of file
+MAX_ACTIVE_BOOKINGS_PER_USER = 10
+
+# Granularidade (em minutos) dos slots do índice de ocupação das quadras
+BOOKING_SLOT_MINUTES = 30
+
+# Status de reserva que ocupam o horário da quadra
+OCCUPYING_BOOKING_STATUSES = ["pending", "waiting_payment", "confirmed"]
+
+# Horizonte (em dias) para materializar reservas mensais sem data de término
+OPEN_ENDED_MONTHLY_HORIZON_DAYS = 365
+
+# Número máximo de horários em uma reserva em lote (carrinho)
+MAX_BATCH_BOOKING_ITEMS = 50
+
+# Cache de disponibilidade das quadras (por quadra/dia)
+AVAILABILITY_CACHE_MAX_ENTRIES = 10000
+AVAILABILITY_CACHE_TTL_SECONDS = 300
+
+# Cache do catálogo de serviços extras (por arena)
+EXTRA_SERVICES_CACHE_MAX_ARENAS = 1000
+EXTRA_SERVICES_CACHE_TTL_SECONDS = 600
+
+# Eventos de disponibilidade em tempo real (SSE)
+AVAILABILITY_STREAM_QUEUE_SIZE = 100
+AVAILABILITY_STREAM_KEEPALIVE_SECONDS = 15
+
+# Ranking local dos resultados de busca (ver app/services/maps.py)
+# Pesos dos componentes da pontuação: proximidade, preço e avaliação
+SEARCH_RANKING_WEIGHTS = {"distance": 0.5, "price": 0.25, "rating": 0.25}
+# Número máximo de candidatos carregados para reordenação
+SEARCH_RANKING_MAX_CANDIDATES = 2000
+
+# Cache de resultados da busca pública de arenas e quadras
+SEARCH_CACHE_MAX_ENTRIES = 2000
+SEARCH_CACHE_TTL_SECONDS = 120
+
+# Facetas da busca (contagens por tipo, cidade, bairro e faixa de preço)
+SEARCH_FACET_MAX_VALUES = 50
+COURT_PRICE_FACET_BOUNDARIES = [0, 50, 100, 150, 200, 300, 500]
+
+# Sugestões da caixa de busca (ver app/services/autocomplete.py)
+AUTOCOMPLETE_MAX_SUGGESTIONS = 10
+AUTOCOMPLETE_MAX_CANDIDATES = 5000
+AUTOCOMPLETE_REFRESH_SECONDS = 600
+
+# Tempo de vida (segundos) do resumo em cache do dashboard administrativo
+DASHBOARD_CACHE_TTL_SECONDS = 30
+
+# Séries temporais do admin (ver app/services/timeseries.py)
+TIMESERIES_MAX_BUCKETS = 400
+TIMESERIES_CACHE_TTL_SECONDS = 60
+
+# Exportações administrativas em streaming (ver app/services/exports.py)
+# Documentos por lote do cursor e linhas por bloco enviado ao cliente
+EXPORT_CURSOR_BATCH_SIZE = 1000
+EXPORT_CHUNK_ROWS = 500
\ No newline at end of file
@@ -1,5 +1,6 @@
 # ARQUIVO: backend/app/db/database.py
 import logging
+from contextlib import asynccontextmanager
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.config import settings
 
@@ -8,6 +9,7 @@ logger = logging.getLogger(__name__)
 class Database:
     client: AsyncIOMotorClient = None
     db = None
+    supports_transactions: bool = None
 
 db = Database()
 
@@ -16,6 +18,7 @@ async def connect_to_mongo():
     logger.info("Conectando ao MongoDB...")
     db.client = AsyncIOMotorClient(settings.MONGODB_URL)
     db.db = db.client[settings.MONGODB_DB]
+    db.supports_transactions = None
     logger.info("Conectado ao MongoDB.")
 
 async def close_mongo_connection():
@@ -26,3 +29,32 @@ async def close_mongo_connection():
     logger.info("Conexão com MongoDB fechada.")
 
 
+
+async def transactions_supported() -> bool:
+    """Verificar (uma vez por conexão) se o servidor suporta transações (replica set ou sharded)."""
+    if db.supports_transactions is None:
+        try:
+            hello = await db.client.admin.command("hello")
+            db.supports_transactions = bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+        except Exception as e:
+            logger.warning(f"Não foi possível verificar suporte a transações: {e}")
+            db.supports_transactions = False
+    return db.supports_transactions
+
+@asynccontextmanager
+async def transaction():
+    """
+    Abrir uma sessão com transação, quando o servidor suportar.
+    Em servidores standalone, fornece None e as operações são executadas sem sessão.
+
+    Uso:
+        async with transaction() as session:
+            await db.db.bookings.insert_many(docs, session=session)
+    """
+    if not await transactions_supported():
+        yield None
+        return
+
+    async with await db.client.start_session() as session:
+        async with session.start_transaction():
+            yield session
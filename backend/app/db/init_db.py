@@ -4,7 +4,9 @@ import asyncio
 from app.db.database import db
 from app.core.security import get_password_hash
 from app.models.user import UserRole
+from app.services.text_search import user_search_keys
 from datetime import datetime
+from pymongo.errors import OperationFailure
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +31,7 @@ async def init_db():
             "created_at": datetime.now(),
             "updated_at": datetime.now()
         }
+        admin_user["search"] = user_search_keys(admin_user)
         await db.db.users.insert_one(admin_user)
         logger.info("Usuário admin criado com sucesso.")
     
@@ -39,8 +42,22 @@ async def init_db():
     await db.db.users.create_index("username", unique=True)
     await db.db.users.create_index("cpf", unique=True)
     
-    # Índice para busca geoespacial de arenas
-    await db.db.arenas.create_index([("address.coordinates", "2dsphere")])
+    # Chaves de busca normalizadas (ver app/services/text_search.py)
+    await db.db.users.create_index("search.tokens")
+    await db.db.arenas.create_index("search.tokens")
+    await db.db.arenas.create_index([("search.city", 1), ("search.neighborhood", 1)])
+    await db.db.arenas.create_index("search.state")
+    
+    # Índice para busca geoespacial de arenas (ponto GeoJSON em location)
+    # O índice antigo sobre address.coordinates ({latitude, longitude}) não é GeoJSON
+    try:
+        await db.db.arenas.drop_index("address.coordinates_2dsphere")
+    except OperationFailure:
+        pass
+    await db.db.arenas.create_index([("location", "2dsphere")])
+    
+    # Filtro por tipo de quadra (resumo de quadras da arena)
+    await db.db.arenas.create_index([("active", 1), ("court_types", 1)])
     
     # Índices para agendamentos
     await db.db.bookings.create_index("user_id")
@@ -52,9 +69,90 @@ async def init_db():
         ("timeslot.date", 1)
     ])
     
+    # Ocorrências materializadas das reservas (avulsas e mensais)
+    await db.db.booking_occurrences.create_index([
+        ("court_id", 1),
+        ("date", 1),
+        ("start_time", 1),
+        ("end_time", 1)
+    ])
+    await db.db.booking_occurrences.create_index([("booking_id", 1), ("date", 1)])
+    await db.db.bookings.create_index([
+        ("booking_type", 1),
+        ("monthly_config.end_date", 1),
+        ("occurrences_until", 1)
+    ])
+    
+    # Slots reivindicados: o índice único garante que um horário tenha um único dono
+    await db.db.slot_claims.create_index([
+        ("court_id", 1),
+        ("date", 1),
+        ("slot_start", 1)
+    ], unique=True)
+    await db.db.slot_claims.create_index([("booking_id", 1), ("date", 1)])
+    
+    # Reservas aguardando pagamento (expiração do prazo)
+    await db.db.bookings.create_index([("status", 1), ("payment_deadline", 1)])
+    
+    # Índice de ocupação das quadras (um bitmap por quadra/dia)
+    await db.db.court_occupancy.create_index([
+        ("court_id", 1),
+        ("date", 1)
+    ], unique=True)
+    # Quadras ocupadas em uma data (filtro por horário da busca de quadras)
+    await db.db.court_occupancy.create_index([("date", 1), ("court_id", 1)])
+    
     # Índices para avaliações
     await db.db.reviews.create_index([("arena_id", 1), ("rating", -1)])
     
+    # Projeção de busca das quadras (ver app/services/court_search.py)
+    await db.db.court_search.create_index([("location", "2dsphere")])
+    await db.db.court_search.create_index("arena_id")
+    await db.db.court_search.create_index([
+        ("is_available", 1),
+        ("arena_active", 1),
+        ("type", 1),
+        ("search.city", 1),
+        ("effective_price", 1)
+    ])
+    await db.db.court_search.create_index([("type", 1), ("rating", -1), ("_id", -1)])
+    await db.db.court_search.create_index([("type", 1), ("effective_price", 1), ("_id", 1)])
+    # Filtro por cidade com ordenação por preço efetivo (percurso do índice)
+    await db.db.court_search.create_index([("search.city", 1), ("effective_price", 1), ("_id", 1)])
+    
+    # Agregados diários de reservas e pagamentos (ver app/services/daily_stats.py)
+    await db.db.stats_daily.create_index([
+        ("day", 1),
+        ("arena_id", 1),
+        ("court_type", 1)
+    ], unique=True)
+    await db.db.stats_daily.create_index([("arena_id", 1), ("day", 1)])
+    await db.db.stats_daily.create_index([("city_key", 1), ("day", 1)])
+    
+    # Reservas criadas juntas (carrinho) e seus pagamentos
+    await db.db.bookings.create_index("booking_group_id", sparse=True)
+    await db.db.payments.create_index("booking_group_id", sparse=True)
+    
+    # Paginação por cursor das listagens (chave de ordenação + _id)
+    await db.db.bookings.create_index([("user_id", 1), ("created_at", -1), ("_id", -1)])
+    await db.db.bookings.create_index([("arena_id", 1), ("created_at", -1), ("_id", -1)])
+    await db.db.bookings.create_index([("created_at", -1), ("_id", -1)])
+    # Listagem administrativa: filtros de status e busca textual na mesma ordenação
+    await db.db.bookings.create_index([("status", 1), ("created_at", -1), ("_id", -1)])
+    await db.db.bookings.create_index([("search.tokens", 1), ("created_at", -1), ("_id", -1)])
+    await db.db.payments.create_index("booking_id")
+    # Exportação de pagamentos (mais recentes primeiro)
+    await db.db.payments.create_index([("created_at", -1), ("_id", -1)])
+    await db.db.reviews.create_index([("arena_id", 1), ("created_at", -1), ("_id", -1)])
+    await db.db.reviews.create_index([("court_id", 1), ("created_at", -1), ("_id", -1)])
+    await db.db.reviews.create_index([("user_id", 1), ("created_at", -1), ("_id", -1)])
+    await db.db.users.create_index([("created_at", -1), ("_id", -1)])
+    await db.db.arenas.create_index([("created_at", -1), ("_id", -1)])
+    await db.db.courts.create_index([("arena_id", 1), ("_id", 1)])
+    await db.db.courts.create_index([("price_per_hour", 1), ("_id", 1)])
+    # Preço efetivamente cobrado (promocional, se houver)
+    await db.db.courts.create_index([("type", 1), ("effective_price", 1), ("_id", 1)])
+    
     logger.info("Índices do banco de dados criados com sucesso.")
 
 # if __name__ == "__main__":
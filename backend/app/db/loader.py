@@ -0,0 +1,93 @@
+# ARQUIVO: backend/app/db/loader.py
+import asyncio
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional, Set
+
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+
+from app.db.database import db
+
+class BatchLoader:
+    """
+    Carregador de documentos por requisição, no espírito do DataLoader.
+
+    Os ids de cada coleção são acumulados com queue() e resolvidos com uma única
+    consulta $in por coleção em dispatch(). Os documentos ficam memorizados até o
+    fim da requisição, e query_count informa quantas consultas foram feitas.
+
+    Uso:
+        loader.queue("courts", [b["court_id"] for b in bookings])
+        loader.queue("arenas", [b["arena_id"] for b in bookings])
+        await loader.dispatch()
+        court = loader.get("courts", booking["court_id"])
+    """
+
+    def __init__(self):
+        self.query_count = 0
+        self._cache: Dict[str, Dict[str, Optional[Dict[str, Any]]]] = defaultdict(dict)
+        self._pending: Dict[str, Set[str]] = defaultdict(set)
+
+    def queue(self, collection: str, ids: Iterable[Any]) -> None:
+        """Agendar o carregamento de ids ainda não memorizados."""
+        cache = self._cache[collection]
+        for id_ in ids:
+            if id_ is None:
+                continue
+            key = str(id_)
+            if key not in cache:
+                self._pending[collection].add(key)
+
+    async def dispatch(self) -> None:
+        """Resolver todos os ids pendentes (uma consulta por coleção, em paralelo)."""
+        pending = {collection: ids for collection, ids in self._pending.items() if ids}
+        self._pending = defaultdict(set)
+
+        await asyncio.gather(*[
+            self._fetch(collection, ids) for collection, ids in pending.items()
+        ])
+
+    async def _fetch(self, collection: str, ids: Set[str]) -> None:
+        cache = self._cache[collection]
+
+        object_ids = []
+        for key in ids:
+            # Ids inválidos são memorizados como inexistentes
+            cache[key] = None
+            try:
+                object_ids.append(ObjectId(key))
+            except (InvalidId, TypeError):
+                continue
+
+        if not object_ids:
+            return
+
+        self.query_count += 1
+        cursor = db.db[collection].find({"_id": {"$in": object_ids}})
+        async for doc in cursor:
+            cache[str(doc["_id"])] = doc
+
+    async def load_many(self, collection: str, ids: Iterable[Any]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Carregar vários documentos de uma coleção (no máximo uma consulta)."""
+        ids = [str(id_) for id_ in ids if id_ is not None]
+        self.queue(collection, ids)
+        await self.dispatch()
+        return {id_: self._cache[collection].get(id_) for id_ in ids}
+
+    async def load(self, collection: str, id_: Any) -> Optional[Dict[str, Any]]:
+        """Carregar um documento de uma coleção."""
+        return (await self.load_many(collection, [id_])).get(str(id_))
+
+    def get(self, collection: str, id_: Any) -> Optional[Dict[str, Any]]:
+        """Obter um documento já carregado (None se inexistente ou não carregado)."""
+        if id_ is None:
+            return None
+        return self._cache[collection].get(str(id_))
+
+def get_loader() -> BatchLoader:
+    """
+    Dependência que fornece um BatchLoader novo a cada requisição.
+    Testes podem substituí-la (app.dependency_overrides) por uma instância
+    própria e verificar query_count após a chamada.
+    """
+    return BatchLoader()
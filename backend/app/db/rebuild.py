@@ -0,0 +1,58 @@
+# ARQUIVO: backend/app/db/rebuild.py
+import asyncio
+import logging
+import sys
+
+from app.db.database import connect_to_mongo, close_mongo_connection
+from app.services.arena_stats import rebuild_arena_courts, rebuild_owner_summaries
+from app.services.autocomplete import rebuild_autocomplete
+from app.services.booking_search import rebuild_booking_search
+from app.services.court_search import rebuild_court_search, rebuild_effective_prices
+from app.services.daily_stats import rebuild_stats_daily
+from app.services.maps import rebuild_arena_locations
+from app.services.occupancy import rebuild_occupancy
+from app.services.occurrences import rebuild_occurrences
+from app.services.slot_claims import rebuild_claims
+from app.services.text_search import rebuild_search_keys
+
+logger = logging.getLogger(__name__)
+
+# Estruturas derivadas que podem ser reconstruídas (backfill/reparo)
+# A ordem importa: slots reivindicados e índice de ocupação são derivados das ocorrências,
+# e os agregados diários usam o tipo da quadra e a cidade da projeção court_search
+REBUILDERS = {
+    "occurrences": rebuild_occurrences,
+    "claims": rebuild_claims,
+    "occupancy": rebuild_occupancy,
+    "arena_locations": rebuild_arena_locations,
+    "search_keys": rebuild_search_keys,
+    "arena_courts": rebuild_arena_courts,
+    "arena_owners": rebuild_owner_summaries,
+    "effective_prices": rebuild_effective_prices,
+    "court_search": rebuild_court_search,
+    "autocomplete": rebuild_autocomplete,
+    "stats_daily": rebuild_stats_daily,
+    "booking_search": rebuild_booking_search,
+}
+
+async def rebuild(target: str):
+    """Reconstruir uma estrutura derivada a partir dos dados originais."""
+    if target not in REBUILDERS:
+        raise ValueError(f"Alvo inválido. Valores permitidos: {', '.join(REBUILDERS)}")
+    
+    logger.info(f"Reconstruindo {target}...")
+    return await REBUILDERS[target]()
+
+async def main(targets):
+    await connect_to_mongo()
+    try:
+        for target in targets:
+            result = await rebuild(target)
+            print(f"{target}: {result}")
+    finally:
+        await close_mongo_connection()
+
+# Uso: python -m app.db.rebuild [alvo ...]  (sem argumentos reconstrói tudo)
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(sys.argv[1:] or list(REBUILDERS)))
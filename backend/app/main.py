@@ -1,4 +1,5 @@
 # ARQUIVO: backend/app/main.py
+import asyncio
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -11,7 +12,9 @@ import pydantic
 from app.api.api import api_router
 from app.core.config import settings
 from app.db.database import connect_to_mongo, close_mongo_connection
+from app.services.autocomplete import rebuild_autocomplete
 from app.services.email import configure_email_templates
+from app.services.tasks import run_periodic_tasks
 
 app = FastAPI(
     title="Quadras API",
@@ -30,6 +33,7 @@ if settings.ENVIRONMENT == "development":
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "X-Cache"],
     )
 else:
     # Em produção, use uma lista específica
@@ -39,6 +43,7 @@ else:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "X-Cache"],
     )
 
 # Eventos de inicialização e encerramento
@@ -46,9 +51,14 @@ else:
 async def startup_db_client():
     await connect_to_mongo()
     configure_email_templates()
+    # Índice em memória das sugestões da busca
+    await rebuild_autocomplete()
+    # Tarefas periódicas (expiração de pagamentos, reservas mensais sem término)
+    app.state.periodic_tasks = asyncio.create_task(run_periodic_tasks())
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    app.state.periodic_tasks.cancel()
     await close_mongo_connection()
 
 # Arquivos estáticos
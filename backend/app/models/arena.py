@@ -80,11 +80,30 @@ class Arena(ArenaBase):
     # Dados relacionados
     owner: Optional[Dict[str, Any]] = None
     courts_count: Optional[int] = None
+    active_courts_count: Optional[int] = None
+    court_types: List[str] = []
+    distance: Optional[float] = None  # Distância em km (busca por proximidade)
+    score: Optional[float] = None  # Pontuação de ranking (ordenação "relevance")
 
     class Config:
         orm_mode = True
         arbitrary_types_allowed = True
 
+class ArenaSearchPage(BaseModel):
+    """Página da busca de arenas com as contagens das facetas pedidas."""
+    items: List[Arena]
+    facets: Dict[str, List[Dict[str, Any]]]
+
+class AutocompleteSuggestion(BaseModel):
+    """Sugestão da caixa de busca (cidade, bairro ou arena)."""
+    type: str  # "city", "neighborhood" ou "arena"
+    label: str
+    city: Optional[str] = None
+    state: Optional[str] = None
+    neighborhood: Optional[str] = None
+    arena_id: Optional[str] = None
+    weight: int = 0
+
 # Modelo para busca de arenas
 class ArenaFilter(MongoBaseModel):
     name: Optional[str] = None
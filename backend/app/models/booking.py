@@ -51,6 +51,14 @@ class BookingStatusUpdate(MongoBaseModel):
     status: BookingStatus
     notes: Optional[str] = None
 
+class BookingBatchItem(MongoBaseModel):
+    court_id: str
+    timeslot: BookingTimeslot
+    extra_services: List[Dict[str, Any]] = []  # Lista de {service_id, quantity}
+
+class BookingBatchCreate(MongoBaseModel):
+    items: List[BookingBatchItem]  # Horários (avulsos) em quadras da mesma arena
+
 class BookingCancellation(MongoBaseModel):
     reason: Optional[str] = None
     request_refund: bool = False
@@ -70,6 +78,7 @@ class BookingInDB(BookingBase):
     payment_deadline: Optional[datetime] = None
     confirmation_deadline: Optional[datetime] = None
     notes: Optional[str] = None
+    booking_group_id: Optional[str] = None  # Reservas criadas juntas (carrinho)
     created_at: datetime
     updated_at: datetime
 
@@ -88,6 +97,7 @@ class Booking(BookingBase):
     payment_deadline: Optional[datetime] = None
     confirmation_deadline: Optional[datetime] = None
     notes: Optional[str] = None
+    booking_group_id: Optional[str] = None  # Reservas criadas juntas (carrinho)
     created_at: datetime
     updated_at: datetime
     
@@ -152,4 +162,12 @@ class PaginatedBookingsResponse(BaseModel):
     total_pages: int
     current_page: int
     total_items: int
-    items_per_page: int
\ No newline at end of file
+    items_per_page: int
+    next_cursor: Optional[str] = None
+
+class BookingBatch(BaseModel):
+    booking_group_id: str
+    bookings: List[Booking]
+    total_amount: float
+    requires_payment: bool
+    payment_deadline: Optional[datetime] = None
\ No newline at end of file
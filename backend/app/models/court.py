@@ -1,6 +1,6 @@
 # app/models/court.py
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
 from app.models.base import MongoBaseModel, MongoId
@@ -61,10 +61,22 @@ class Court(CourtBase):
     extra_services: List[str] = []
     created_at: datetime
     updated_at: datetime
+    
+    effective_price: Optional[float] = None  # Preço cobrado por hora (promocional, se houver)
+    
+    # Dados relacionados (busca)
+    arena: Optional[Dict[str, Any]] = None
+    distance: Optional[float] = None  # Distância em km (busca por proximidade)
+    score: Optional[float] = None  # Pontuação de ranking (ordenação "relevance")
 
     class Config:
         orm_mode = True
 
+class CourtSearchPage(BaseModel):
+    """Página da busca de quadras com as contagens das facetas pedidas."""
+    items: List[Court]
+    facets: Dict[str, List[Dict[str, Any]]]
+
 class CourtSearch(MongoBaseModel):
     """Modelo para parâmetros de busca de quadras."""
     court_type: Optional[str] = None
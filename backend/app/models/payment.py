@@ -20,8 +20,10 @@ class PaymentBase(MongoBaseModel):
     booking_id: str
     payment_method: PaymentMethod
     amount: float
+    booking_group_id: Optional[str] = None  # Pagamento único das reservas de um carrinho
 
 class PaymentCreate(PaymentBase):
+    booking_id: Optional[str] = None  # Opcional quando booking_group_id é informado
     card_data: Optional[Dict[str, Any]] = None  # Para pagamentos com cartão
 
 class PaymentUpdate(MongoBaseModel):
@@ -40,6 +42,8 @@ class PaymentInDB(PaymentBase):
     credit_card_last4: Optional[str] = None
     payment_date: Optional[datetime] = None
     expires_at: Optional[datetime] = None
+    # Aprovado depois que a reserva foi cancelada (ex.: prazo expirado)
+    refund_required: bool = False
     created_at: datetime
     updated_at: datetime
 
@@ -54,6 +58,8 @@ class Payment(PaymentBase):
     credit_card_last4: Optional[str] = None
     payment_date: Optional[datetime] = None
     expires_at: Optional[datetime] = None
+    # Aprovado depois que a reserva foi cancelada (ex.: prazo expirado)
+    refund_required: bool = False
     created_at: datetime
     updated_at: datetime
     
@@ -0,0 +1,167 @@
+# app/services/arena_stats.py
+import logging
+from typing import Any, Dict, Optional
+
+from bson.objectid import ObjectId
+from pymongo import UpdateMany, UpdateOne
+
+from app.db.database import db
+from app.services.search_cache import invalidate_search_arena
+
+logger = logging.getLogger(__name__)
+
+# Dados desnormalizados no documento da arena, para que as listagens de arenas
+# sejam atendidas por uma única consulta:
+#   court_types:         tipos de quadra da arena (filtro court_type da busca de arenas)
+#   courts_count:        número de quadras
+#   active_courts_count: número de quadras disponíveis para reserva
+#   owner_summary:       {"id", "name", "email", "phone"} do proprietário
+# O resumo das quadras é mantido pelos ganchos de escrita de quadras (ver sync_court
+# e remove_court em app/services/court_search.py) e o do proprietário pelas
+# atualizações de perfil (refresh_owner_summary). Ambos podem ser reconstruídos
+# (rebuild_arena_courts e rebuild_owner_summaries).
+
+_COURTS_SUMMARY_GROUP = {
+    "court_types": {"$addToSet": "$type"},
+    "courts_count": {"$sum": 1},
+    "active_courts_count": {"$sum": {"$cond": [{"$eq": ["$is_available", False]}, 0, 1]}}
+}
+
+
+def _courts_summary(result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    result = result or {}
+    return {
+        "court_types": sorted(result.get("court_types", [])),
+        "courts_count": result.get("courts_count", 0),
+        "active_courts_count": result.get("active_courts_count", 0)
+    }
+
+
+def owner_summary(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Dados básicos do proprietário gravados na arena."""
+    return {
+        "id": str(user["_id"]),
+        "name": f"{user.get('first_name')} {user.get('last_name')}",
+        "email": user.get("email"),
+        "phone": user.get("phone")
+    }
+
+
+OWNER_SUMMARY_FIELDS = ("first_name", "last_name", "email", "phone")
+
+
+def with_owner(arena: Dict[str, Any]) -> Dict[str, Any]:
+    """Preencher o campo "owner" da resposta da arena a partir de owner_summary."""
+    arena["owner"] = arena.get("owner_summary")
+    return arena
+
+
+def arena_courts_query(arena_id: str) -> Dict[str, Any]:
+    """Filtro das quadras de uma arena (arena_id pode estar gravado como string ou ObjectId)."""
+    return {"arena_id": {"$in": [str(arena_id), ObjectId(arena_id)]}}
+
+
+async def refresh_arena_courts(arena_id: str) -> Dict[str, Any]:
+    """
+    Recalcular o resumo das quadras de uma arena (uma agregação e uma escrita).
+
+    Returns:
+        Campos gravados na arena
+    """
+    pipeline = [
+        {"$match": arena_courts_query(arena_id)},
+        {"$group": {"_id": None, **_COURTS_SUMMARY_GROUP}}
+    ]
+    results = await db.db.courts.aggregate(pipeline).to_list(length=1)
+
+    summary = _courts_summary(results[0] if results else None)
+    await db.db.arenas.update_one({"_id": ObjectId(arena_id)}, {"$set": summary})
+    return summary
+
+
+async def rebuild_arena_courts() -> int:
+    """
+    Recalcular o resumo das quadras de todas as arenas (backfill/reparo).
+
+    Returns:
+        Número de arenas atualizadas
+    """
+    pipeline = [
+        {"$group": {"_id": {"$toString": "$arena_id"}, **_COURTS_SUMMARY_GROUP}}
+    ]
+    summaries = {
+        result["_id"]: result
+        async for result in db.db.courts.aggregate(pipeline)
+    }
+
+    requests = []
+    total = 0
+    async for arena in db.db.arenas.find({}, {"_id": 1}):
+        summary = _courts_summary(summaries.get(str(arena["_id"])))
+        requests.append(UpdateOne({"_id": arena["_id"]}, {"$set": summary}))
+
+        if len(requests) >= 1000:
+            await db.db.arenas.bulk_write(requests, ordered=False)
+            total += len(requests)
+            requests = []
+
+    if requests:
+        await db.db.arenas.bulk_write(requests, ordered=False)
+        total += len(requests)
+
+    logger.info(f"Resumo de quadras recalculado em {total} arenas.")
+    return total
+
+
+async def refresh_owner_summary(user_id: str) -> int:
+    """
+    Atualizar os dados do proprietário nas arenas dele (após alteração do perfil).
+
+    Returns:
+        Número de arenas atualizadas
+    """
+    user = await db.db.users.find_one({"_id": ObjectId(user_id)})
+    if not user:
+        return 0
+
+    arenas = await db.db.arenas.find({"owner_id": str(user_id)}, {"address.city": 1}).to_list(length=None)
+    if not arenas:
+        return 0
+
+    await db.db.arenas.update_many(
+        {"owner_id": str(user_id)},
+        {"$set": {"owner_summary": owner_summary(user)}}
+    )
+    # As buscas de arenas em cache trazem os dados do proprietário
+    for arena in arenas:
+        invalidate_search_arena(arena)
+    return len(arenas)
+
+
+async def rebuild_owner_summaries() -> int:
+    """
+    Gravar os dados do proprietário em todas as arenas (backfill/reparo).
+
+    Returns:
+        Número de arenas atualizadas
+    """
+    owner_ids = await db.db.arenas.distinct("owner_id")
+    owners = {
+        str(user["_id"]): owner_summary(user)
+        async for user in db.db.users.find(
+            {"_id": {"$in": [ObjectId(owner_id) for owner_id in owner_ids if ObjectId.is_valid(str(owner_id))]}},
+            {"first_name": 1, "last_name": 1, "email": 1, "phone": 1}
+        )
+    }
+
+    requests = [
+        UpdateMany({"owner_id": owner_id}, {"$set": {"owner_summary": summary}})
+        for owner_id, summary in owners.items()
+    ]
+    total = 0
+    for start in range(0, len(requests), 1000):
+        result = await db.db.arenas.bulk_write(requests[start:start + 1000], ordered=False)
+        total += result.matched_count
+
+    logger.info(f"Dados do proprietário gravados em {total} arenas.")
+    return total
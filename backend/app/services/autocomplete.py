@@ -0,0 +1,193 @@
+# app/services/autocomplete.py
+import logging
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Tuple
+
+from app.core.constants import AUTOCOMPLETE_MAX_CANDIDATES, AUTOCOMPLETE_MAX_SUGGESTIONS
+from app.db.database import db
+from app.services.text_search import fold, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Sugestões da caixa de busca (cidades, bairros e nomes de arenas)
+# Índice de prefixos em memória, construído a partir das arenas ativas na
+# inicialização e atualizado nas escritas de arenas (sync_arena, remove_arena e
+# criação pelo admin), sem consultar o banco a cada tecla digitada. Cada
+# sugestão é indexada por todos os sufixos de palavra do texto normalizado
+# ("Vila Olímpia" -> "vila olimpia", "olimpia") em uma lista ordenada, e a busca
+# por prefixo é um bisect seguido de uma varredura do intervalo.
+# A popularidade de uma arena é 1 + número de avaliações; a de uma cidade ou
+# bairro é a soma da popularidade das suas arenas. Cada processo tem seu próprio
+# índice; o índice é reconstruído periodicamente (ver run_periodic_tasks) para
+# incluir escritas feitas por outros processos.
+
+SuggestionKey = Tuple[str, ...]
+
+_ARENA_PROJECTION = {"name": 1, "address": 1, "active": 1, "rating_count": 1}
+
+
+def _terms(text: str) -> List[str]:
+    """Sufixos de palavra do texto normalizado."""
+    tokens = tokenize(text)
+    return [" ".join(tokens[start:]) for start in range(len(tokens))]
+
+
+def _normalize_query(text: str) -> str:
+    return " ".join(tokenize(text))
+
+
+class AutocompleteIndex:
+    """Índice de prefixos das sugestões, ordenado por termo."""
+
+    def __init__(self):
+        # (termo, chave da sugestão), ordenado
+        self._terms: List[Tuple[str, SuggestionKey]] = []
+        # chave -> {"type", "label", ..., "weight", "arenas": {arena_id: peso}}
+        self._suggestions: Dict[SuggestionKey, Dict[str, Any]] = {}
+        # arena_id -> chaves das sugestões para as quais a arena contribui
+        self._arenas: Dict[str, List[SuggestionKey]] = {}
+
+    def __len__(self) -> int:
+        return len(self._suggestions)
+
+    def _contribute(
+        self,
+        key: SuggestionKey,
+        text: str,
+        data: Dict[str, Any],
+        arena_id: str,
+        weight: int
+    ) -> None:
+        """Somar a popularidade de uma arena à sugestão (indexada pelas palavras de text)."""
+        suggestion = self._suggestions.get(key)
+        if suggestion is None:
+            suggestion = {**data, "weight": 0, "text": text, "arenas": {}}
+            self._suggestions[key] = suggestion
+            for term in _terms(text):
+                insort(self._terms, (term, key))
+
+        suggestion["arenas"][arena_id] = weight
+        suggestion["weight"] += weight
+
+    def _withdraw(self, key: SuggestionKey, arena_id: str) -> None:
+        suggestion = self._suggestions.get(key)
+        if suggestion is None:
+            return
+
+        suggestion["weight"] -= suggestion["arenas"].pop(arena_id, 0)
+        if suggestion["arenas"]:
+            return
+
+        del self._suggestions[key]
+        for term in _terms(suggestion["text"]):
+            position = bisect_left(self._terms, (term, key))
+            if position < len(self._terms) and self._terms[position] == (term, key):
+                del self._terms[position]
+
+    def remove_arena(self, arena_id: str) -> None:
+        """Retirar as contribuições de uma arena."""
+        for key in self._arenas.pop(str(arena_id), []):
+            self._withdraw(key, str(arena_id))
+
+    def update_arena(self, arena: Dict[str, Any]) -> None:
+        """Indexar (ou reindexar) uma arena; arenas inativas são retiradas."""
+        arena_id = str(arena["_id"])
+        self.remove_arena(arena_id)
+        if not arena.get("active", True):
+            return
+
+        weight = 1 + (arena.get("rating_count") or 0)
+        address = arena.get("address") or {}
+        city, state, neighborhood = address.get("city"), address.get("state"), address.get("neighborhood")
+        keys = []
+
+        if arena.get("name"):
+            key = ("arena", arena_id)
+            self._contribute(key, arena["name"], {
+                "type": "arena", "label": arena["name"], "arena_id": arena_id,
+                "city": city, "state": state, "neighborhood": neighborhood
+            }, arena_id, weight)
+            keys.append(key)
+
+        if city:
+            key = ("city", fold(city), fold(state))
+            self._contribute(key, city, {
+                "type": "city", "label": f"{city} - {state}" if state else city, "arena_id": None,
+                "city": city, "state": state, "neighborhood": None
+            }, arena_id, weight)
+            keys.append(key)
+
+            if neighborhood:
+                key = ("neighborhood", fold(city), fold(state), fold(neighborhood))
+                self._contribute(key, neighborhood, {
+                    "type": "neighborhood", "label": f"{city} / {neighborhood}", "arena_id": None,
+                    "city": city, "state": state, "neighborhood": neighborhood
+                }, arena_id, weight)
+                keys.append(key)
+
+        self._arenas[arena_id] = keys
+
+    def suggest(self, text: str, limit: int = AUTOCOMPLETE_MAX_SUGGESTIONS) -> List[Dict[str, Any]]:
+        """
+        Sugestões cujo texto tem uma palavra iniciada pelo texto digitado, das
+        mais populares para as menos populares.
+        """
+        prefix = _normalize_query(text)
+        if not prefix:
+            return []
+
+        # Para prefixos muito curtos, apenas os primeiros candidatos do intervalo são ordenados
+        candidates = set()
+        position = bisect_left(self._terms, (prefix,))
+        while position < len(self._terms) and len(candidates) < AUTOCOMPLETE_MAX_CANDIDATES:
+            term, key = self._terms[position]
+            if not term.startswith(prefix):
+                break
+            candidates.add(key)
+            position += 1
+
+        ranked = sorted(
+            (self._suggestions[key] for key in candidates),
+            key=lambda suggestion: (-suggestion["weight"], suggestion["label"])
+        )
+        return [
+            {field: value for field, value in suggestion.items() if field not in ("text", "arenas")}
+            for suggestion in ranked[:limit]
+        ]
+
+
+autocomplete_index = AutocompleteIndex()
+
+
+def suggest(text: str, limit: int = AUTOCOMPLETE_MAX_SUGGESTIONS) -> List[Dict[str, Any]]:
+    """Sugestões para o texto digitado (ver AutocompleteIndex.suggest)."""
+    return autocomplete_index.suggest(text, limit)
+
+
+def index_arena(arena: Dict[str, Any]) -> None:
+    """Atualizar as sugestões de uma arena após uma escrita."""
+    autocomplete_index.update_arena(arena)
+
+
+def unindex_arena(arena_id: str) -> None:
+    """Retirar as sugestões de uma arena excluída."""
+    autocomplete_index.remove_arena(arena_id)
+
+
+async def rebuild_autocomplete() -> int:
+    """
+    Reconstruir o índice de sugestões deste processo a partir das arenas ativas.
+
+    Returns:
+        Número de sugestões indexadas
+    """
+    global autocomplete_index
+
+    index = AutocompleteIndex()
+    async for arena in db.db.arenas.find({"active": {"$ne": False}}, _ARENA_PROJECTION):
+        index.update_arena(arena)
+
+    # Troca atômica: as buscas em andamento continuam usando o índice anterior
+    autocomplete_index = index
+    logger.info(f"Índice de sugestões reconstruído com {len(index)} sugestões.")
+    return len(index)
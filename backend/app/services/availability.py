@@ -0,0 +1,183 @@
+# app/services/availability.py
+import asyncio
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson.objectid import ObjectId
+
+from app.core.constants import AVAILABILITY_CACHE_MAX_ENTRIES, AVAILABILITY_CACHE_TTL_SECONDS
+from app.db.database import db
+from app.services.cache import register_cache
+from app.services.occupancy import (
+    SLOTS_PER_DAY,
+    get_occupancy,
+    minutes_to_time_str,
+    occupied_courts,
+    on_occupancy_change,
+    slot_mask,
+    time_to_minutes,
+)
+
+# Disponibilidade calculada por quadra/dia
+# A disponibilidade de um dia depende apenas do índice de ocupação da quadra e dos
+# horários de funcionamento da arena. O cache é invalidado exatamente quando um
+# deles muda: mudanças de ocupação são notificadas pelo índice (ver
+# _invalidate_occupancy) e as rotas de arena chamam invalidate_arena.
+
+availability_cache = register_cache(
+    "availability",
+    max_entries=AVAILABILITY_CACHE_MAX_ENTRIES,
+    ttl_seconds=AVAILABILITY_CACHE_TTL_SECONDS
+)
+
+# Mapear weekday para o campo correspondente no business_hours
+WEEKDAY_FIELDS = {
+    0: "monday",
+    1: "tuesday",
+    2: "wednesday",
+    3: "thursday",
+    4: "friday",
+    5: "saturday",
+    6: "sunday"
+}
+
+
+def date_range(start_date: date, end_date: date) -> List[date]:
+    """Datas de start_date a end_date (inclusive)."""
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+
+def open_mask(day_hours: List[Dict[str, str]]) -> int:
+    """Bitmap dos slots em que a arena está aberta no dia."""
+    mask = 0
+    for hour_range in day_hours:
+        mask |= slot_mask(hour_range["start"], hour_range["end"])
+    return mask
+
+
+async def fully_booked_courts(day: date) -> List[str]:
+    """
+    Quadras sem nenhum slot livre no horário de funcionamento do dia (busca só
+    pela data). Apenas as quadras com alguma ocupação no dia são verificadas, e
+    as que têm o mesmo horário de funcionamento são consultadas juntas.
+    """
+    date_str = day.isoformat()
+    busy_court_ids = await occupied_courts(date_str, (1 << SLOTS_PER_DAY) - 1)
+    if not busy_court_ids:
+        return []
+
+    weekday = WEEKDAY_FIELDS[day.weekday()]
+    courts_by_mask: Dict[int, List[str]] = defaultdict(list)
+    cursor = db.db.court_search.find(
+        {"_id": {"$in": [ObjectId(court_id) for court_id in busy_court_ids if ObjectId.is_valid(court_id)]}},
+        {f"business_hours.{weekday}": 1}
+    )
+    async for court in cursor:
+        mask = open_mask((court.get("business_hours") or {}).get(weekday) or [])
+        if mask:
+            courts_by_mask[mask].append(str(court["_id"]))
+
+    results = await asyncio.gather(*(
+        occupied_courts(date_str, mask, court_ids=court_ids, all_slots=True)
+        for mask, court_ids in courts_by_mask.items()
+    ))
+    return [court_id for court_ids in results for court_id in court_ids]
+
+
+def build_time_slots(day_hours: List[Dict[str, str]], occupied_mask: int) -> List[Dict[str, Any]]:
+    """Montar os slots de 1 hora de um dia a partir do horário de funcionamento e do bitmap de ocupação."""
+    time_slots = []
+
+    for hour_range in day_hours:
+        start_minutes = time_to_minutes(hour_range["start"])  # '07:00'
+        end_minutes = time_to_minutes(hour_range["end"])      # '23:00'
+        if end_minutes == 0:
+            end_minutes = 24 * 60  # '00:00' fecha à meia-noite
+
+        # Criar slots de 1 hora
+        current_minutes = start_minutes
+        while current_minutes + 60 <= end_minutes:
+            next_minutes = current_minutes + 60
+            slot_start = minutes_to_time_str(current_minutes)
+            slot_end = minutes_to_time_str(next_minutes)
+
+            # O slot está livre se nenhum dos seus bits estiver ocupado
+            time_slots.append({
+                "start": slot_start,
+                "end": slot_end,
+                "is_available": not (occupied_mask & slot_mask(slot_start, slot_end))
+            })
+
+            current_minutes = next_minutes
+
+    return time_slots
+
+
+def get_cached_availability(court_id: str, dates: Iterable[date]) -> Tuple[Dict[str, List], List[date]]:
+    """
+    Obter do cache a disponibilidade de uma quadra nas datas informadas.
+
+    Returns:
+        (disponibilidade dos dias em cache, datas que precisam ser calculadas)
+    """
+    availability = {}
+    missing = []
+    for day in dates:
+        entry = availability_cache.get((court_id, day.isoformat()))
+        if entry is None:
+            missing.append(day)
+        else:
+            availability[day.isoformat()] = entry["slots"]
+    return availability, missing
+
+
+async def compute_availability(
+    court_id: str,
+    arena_doc: Dict[str, Any],
+    dates: List[date]
+) -> Dict[str, List]:
+    """Calcular (com uma única consulta ao índice de ocupação) e guardar em cache a disponibilidade dos dias informados."""
+    if not dates:
+        return {}
+
+    generation = availability_cache.generation
+    occupancy = await get_occupancy(court_id, min(dates), max(dates))
+
+    arena_id = str(arena_doc["_id"])
+    business_hours = arena_doc.get("business_hours") or {}
+
+    availability = {}
+    for day in dates:
+        date_str = day.isoformat()
+        day_hours = business_hours.get(WEEKDAY_FIELDS[day.weekday()], [])
+        slots = build_time_slots(day_hours, occupancy.get(date_str, 0))
+
+        availability[date_str] = slots
+        availability_cache.set(
+            (court_id, date_str),
+            {"arena_id": arena_id, "slots": slots},
+            generation=generation
+        )
+
+    return availability
+
+
+def invalidate_court_dates(court_dates: Iterable[Tuple[str, str]]) -> None:
+    """Invalidar a disponibilidade de pares (court_id, data) cuja ocupação mudou."""
+    for court_id, date_str in court_dates:
+        availability_cache.invalidate((str(court_id), date_str))
+
+
+def invalidate_arena(arena_id: str) -> None:
+    """Invalidar a disponibilidade de todas as quadras de uma arena (ex.: horário de funcionamento alterado)."""
+    arena_id = str(arena_id)
+    availability_cache.invalidate_where(lambda key, entry: entry["arena_id"] == arena_id)
+
+
+@on_occupancy_change
+def _invalidate_occupancy(masks: Optional[Dict[tuple, int]], occupy: bool) -> None:
+    if masks is None:
+        availability_cache.clear()
+    else:
+        invalidate_court_dates(masks.keys())
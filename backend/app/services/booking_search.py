@@ -0,0 +1,318 @@
+# app/services/booking_search.py
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+from app.db.database import db
+from app.models.booking import BookingStatus, BookingType
+from app.services.text_search import add_condition, tokenize, tokens_query
+from app.utils.helpers import encode_cursor, keyset_query
+
+logger = logging.getLogger(__name__)
+
+# Listagem administrativa de reservas
+# As reservas guardam os nomes usados na busca, copiados na criação e mantidos
+# quando usuário, quadra ou arena mudam de nome:
+#   {"user_name", "user_email", "court_name", "arena_name",
+#    "search": {"tokens"}}  (palavras normalizadas, índice multikey; ver text_search.py)
+# A página e o total saem de uma única agregação: o filtro e a ordenação usam
+# índices e apenas (_id, created_at) seguem para o $facet, então a contagem não
+# busca os documentos (sem busca textual, a projeção é coberta pelo índice). O
+# $facet divide o resultado em "items" (cursor, página, documento completo só dos
+# itens da página e $lookup apenas dos campos exibidos) e "total" ($count).
+
+BOOKING_NAME_FIELDS = ("user_name", "user_email", "court_name", "arena_name")
+
+# Campos do usuário copiados para as reservas
+BOOKING_USER_FIELDS = ("first_name", "last_name", "email")
+
+
+def booking_names(
+    user: Optional[Dict[str, Any]] = None,
+    court: Optional[Dict[str, Any]] = None,
+    arena: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Nomes desnormalizados de uma reserva (apenas dos documentos informados)."""
+    names = {}
+    if user is not None:
+        names["user_name"] = f"{user.get('first_name') or ''} {user.get('last_name') or ''}".strip()
+        names["user_email"] = user.get("email")
+    if court is not None:
+        names["court_name"] = court.get("name")
+    if arena is not None:
+        names["arena_name"] = arena.get("name")
+    return names
+
+
+def booking_search_keys(names: Dict[str, Any]) -> Dict[str, Any]:
+    """Chaves de busca de uma reserva (campo "search")."""
+    return {"tokens": tokenize(*(names.get(field) for field in BOOKING_NAME_FIELDS))}
+
+
+def with_booking_names(
+    booking: Dict[str, Any],
+    user: Dict[str, Any],
+    court: Dict[str, Any],
+    arena: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Gravar nomes e chaves de busca em uma reserva nova."""
+    booking.update(booking_names(user, court, arena))
+    booking["search"] = booking_search_keys(booking)
+    return booking
+
+
+async def refresh_booking_names(query: Dict[str, Any], names: Dict[str, Any]) -> int:
+    """
+    Atualizar nomes (e chaves de busca) das reservas do filtro após uma mudança
+    de nome do usuário, da quadra ou da arena.
+
+    Returns:
+        Número de reservas atualizadas
+    """
+    requests = []
+    total = 0
+    async for booking in db.db.bookings.find(query, {field: 1 for field in BOOKING_NAME_FIELDS}):
+        updated = {**booking, **names}
+        requests.append(UpdateOne(
+            {"_id": booking["_id"]},
+            {"$set": {**names, "search": booking_search_keys(updated)}}
+        ))
+        if len(requests) >= 1000:
+            await db.db.bookings.bulk_write(requests, ordered=False)
+            total += len(requests)
+            requests = []
+
+    if requests:
+        await db.db.bookings.bulk_write(requests, ordered=False)
+        total += len(requests)
+    return total
+
+
+async def refresh_user_bookings(user: Dict[str, Any]) -> int:
+    """Atualizar nome e email do cliente nas reservas dele."""
+    return await refresh_booking_names({"user_id": str(user["_id"])}, booking_names(user=user))
+
+
+async def rebuild_booking_search() -> int:
+    """
+    Gravar nomes e chaves de busca em todas as reservas (backfill/reparo).
+
+    Returns:
+        Número de reservas atualizadas
+    """
+    async def load(collection, ids, projection):
+        object_ids = [ObjectId(str(_id)) for _id in ids if ObjectId.is_valid(str(_id))]
+        cursor = collection.find({"_id": {"$in": object_ids}}, projection)
+        return {str(doc["_id"]): doc async for doc in cursor}
+
+    arenas = {str(arena["_id"]): arena async for arena in db.db.arenas.find({}, {"name": 1})}
+    courts = {str(court["_id"]): court async for court in db.db.courts.find({}, {"name": 1})}
+
+    total = 0
+    batch: List[Dict[str, Any]] = []
+
+    async def flush():
+        users = await load(db.db.users, {booking.get("user_id") for booking in batch}, {
+            "first_name": 1, "last_name": 1, "email": 1
+        })
+        requests = []
+        for booking in batch:
+            names = booking_names(
+                users.get(str(booking.get("user_id")), {}),
+                courts.get(str(booking.get("court_id")), {}),
+                arenas.get(str(booking.get("arena_id")), {})
+            )
+            requests.append(UpdateOne(
+                {"_id": booking["_id"]},
+                {"$set": {**names, "search": booking_search_keys(names)}}
+            ))
+        await db.db.bookings.bulk_write(requests, ordered=False)
+        return len(requests)
+
+    async for booking in db.db.bookings.find({}, {"user_id": 1, "court_id": 1, "arena_id": 1}):
+        batch.append(booking)
+        if len(batch) >= 1000:
+            total += await flush()
+            batch = []
+
+    if batch:
+        total += await flush()
+
+    logger.info(f"Nomes e chaves de busca gravados em {total} reservas.")
+    return total
+
+
+def admin_bookings_filter(
+    status: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    search: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Filtro da listagem administrativa de reservas.
+
+    Args:
+        start_date, end_date: Intervalo (inclusive) da data da reserva avulsa ou do
+            início da reserva mensal
+        search: Texto livre sobre cliente (nome/email), quadra e arena
+    """
+    filter_query: Dict[str, Any] = {}
+
+    if status:
+        filter_query["status"] = status
+
+    if start_date or end_date:
+        # Datas das reservas são gravadas como "YYYY-MM-DD"
+        date_filter = {}
+        if start_date:
+            date_filter["$gte"] = start_date.isoformat()
+        if end_date:
+            date_filter["$lt"] = (end_date + timedelta(days=1)).isoformat()
+
+        filter_query = add_condition(filter_query, {"$or": [
+            {"booking_type": BookingType.SINGLE, "timeslot.date": date_filter},
+            {"booking_type": BookingType.MONTHLY, "monthly_config.start_date": date_filter}
+        ]})
+
+    if search:
+        filter_query = add_condition(filter_query, tokens_query(search))
+
+    return filter_query
+
+
+def _lookup_by_id(collection: str, local_field: str, projection: Dict[str, Any], alias: str) -> List[Dict[str, Any]]:
+    """$lookup de um documento pelo _id (gravado na reserva como string), só com os campos exibidos."""
+    return [
+        {"$lookup": {
+            "from": collection,
+            "let": {"id": {"$convert": {"input": f"${local_field}", "to": "objectId", "onError": None, "onNull": None}}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$id"]}}},
+                {"$project": projection}
+            ],
+            "as": alias
+        }},
+        {"$unwind": {"path": f"${alias}", "preserveNullAndEmptyArrays": True}}
+    ]
+
+
+def admin_bookings_pipeline(
+    filter_query: Dict[str, Any],
+    cursor: Optional[str] = None,
+    page: int = 1,
+    items_per_page: int = 20
+) -> List[Dict[str, Any]]:
+    """Agregação da listagem administrativa: página ("items") e total ("total") juntos."""
+    items = []
+    if cursor:
+        items.append({"$match": keyset_query({}, cursor, "created_at")})
+    items += [
+        {"$skip": 0 if cursor else (max(page, 1) - 1) * items_per_page},
+        {"$limit": items_per_page + 1},
+        # Documento completo apenas dos itens da página
+        {"$lookup": {"from": "bookings", "localField": "_id", "foreignField": "_id", "as": "booking"}},
+        {"$unwind": "$booking"},
+        {"$replaceRoot": {"newRoot": "$booking"}},
+        *_lookup_by_id("users", "user_id", {"first_name": 1, "last_name": 1, "email": 1, "phone": 1, "username": 1}, "user"),
+        *_lookup_by_id("courts", "court_id", {"name": 1, "type": 1, "cover_image": 1}, "court"),
+        *_lookup_by_id("arenas", "arena_id", {"name": 1, "address.city": 1, "address.neighborhood": 1}, "arena"),
+        # Pagamento mais recente da reserva
+        {"$lookup": {
+            "from": "payments",
+            "let": {"id": {"$toString": "$_id"}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$booking_id", "$$id"]}}},
+                {"$sort": {"created_at": -1}},
+                {"$limit": 1},
+                {"$project": {"status": 1}}
+            ],
+            "as": "payment"
+        }},
+        {"$unwind": {"path": "$payment", "preserveNullAndEmptyArrays": True}},
+        {"$project": {
+            "_id": {"$toString": "$_id"},
+            "user_id": {"$toString": "$user_id"},
+            "court_id": {"$toString": "$court_id"},
+            "arena_id": {"$toString": "$arena_id"},
+            "booking_type": 1,
+            "timeslot": 1,
+            "monthly_config": 1,
+            "status": 1,
+            "price_per_hour": 1,
+            "total_hours": 1,
+            "subtotal": 1,
+            "extra_services": 1,
+            "total_amount": 1,
+            "discount_amount": 1,
+            "requires_payment": 1,
+            "payment_deadline": 1,
+            "created_at": 1,
+            "updated_at": 1,
+            "payment_status": "$payment.status",
+            "can_cancel": {"$and": [
+                {"$ne": ["$status", BookingStatus.CANCELLED]},
+                {"$ne": ["$status", BookingStatus.COMPLETED]}
+            ]},
+            # Sem o documento relacionado, usar os nomes gravados na reserva
+            "user": {
+                "id": {"$toString": "$user_id"},
+                "name": {"$ifNull": [{"$concat": ["$user.first_name", " ", "$user.last_name"]}, "$user_name"]},
+                "email": {"$ifNull": ["$user.email", "$user_email"]},
+                "phone": "$user.phone",
+                "username": "$user.username"
+            },
+            "court": {
+                "id": {"$toString": "$court_id"},
+                "name": {"$ifNull": ["$court.name", "$court_name"]},
+                "type": "$court.type",
+                "cover_image": "$court.cover_image"
+            },
+            "arena": {
+                "id": {"$toString": "$arena_id"},
+                "name": {"$ifNull": ["$arena.name", "$arena_name"]},
+                "city": "$arena.address.city",
+                "neighborhood": "$arena.address.neighborhood"
+            }
+        }}
+    ]
+
+    return [
+        {"$match": filter_query},
+        {"$sort": {"created_at": -1, "_id": -1}},
+        {"$project": {"_id": 1, "created_at": 1}},
+        {"$facet": {
+            "items": items,
+            "total": [{"$count": "count"}]
+        }}
+    ]
+
+
+async def fetch_admin_bookings(
+    filter_query: Dict[str, Any],
+    cursor: Optional[str] = None,
+    page: int = 1,
+    items_per_page: int = 20
+) -> Tuple[List[Dict[str, Any]], int, Optional[str]]:
+    """
+    Buscar uma página da listagem administrativa e o total do filtro.
+
+    Returns:
+        (reservas da página, total de reservas do filtro, cursor da próxima página)
+    """
+    results = await db.db.bookings.aggregate(
+        admin_bookings_pipeline(filter_query, cursor, page, items_per_page),
+        allowDiskUse=True
+    ).to_list(length=1)
+    result = results[0] if results else {"items": [], "total": []}
+
+    bookings = result["items"]
+    total = result["total"][0]["count"] if result["total"] else 0
+
+    next_cursor = None
+    if len(bookings) > items_per_page:
+        bookings = bookings[:items_per_page]
+        next_cursor = encode_cursor(bookings[-1].get("created_at"), bookings[-1]["_id"])
+    return bookings, total, next_cursor
@@ -0,0 +1,110 @@
+# app/services/cache.py
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Caches em memória do processo
+# Cada cache tem limite de entradas (LRU) e tempo de vida (TTL). A invalidação é
+# feita pelos pontos de escrita; o TTL limita a defasagem entre workers, já que
+# cada processo tem seus próprios caches.
+
+CACHES: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """Cache LRU com tempo de vida por entrada e contadores de acertos/falhas."""
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Incrementado a cada invalidação; ver set()
+        self.generation = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Obter um valor (None se ausente ou expirado)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """
+        Gravar um valor.
+
+        Args:
+            generation: Valor de self.generation lido antes de calcular o valor. Se
+                houve invalidação desde então, o valor pode estar desatualizado e
+                não é gravado.
+        """
+        if generation is not None and generation != self.generation:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remover uma entrada."""
+        self.generation += 1
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Remover as entradas para as quais predicate(chave, valor) é verdadeiro."""
+        self.generation += 1
+        keys = [key for key, (_, value) in self._entries.items() if predicate(key, value)]
+        for key in keys:
+            del self._entries[key]
+        self.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self) -> None:
+        """Remover todas as entradas."""
+        self.generation += 1
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores do cache."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+def register_cache(name: str, max_entries: int, ttl_seconds: float) -> TTLCache:
+    """Criar um cache e registrá-lo para as estatísticas (ver cache_stats)."""
+    cache = TTLCache(name, max_entries, ttl_seconds)
+    CACHES[name] = cache
+    return cache
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Estatísticas de todos os caches registrados."""
+    return {name: cache.stats() for name, cache in CACHES.items()}
@@ -0,0 +1,207 @@
+# app/services/court_search.py
+import logging
+from typing import Any, Dict, List, Optional
+
+from bson.objectid import ObjectId
+from pymongo import DeleteMany, ReplaceOne
+
+from app.db.database import db
+from app.services.arena_stats import arena_courts_query, refresh_arena_courts
+from app.services.autocomplete import index_arena, unindex_arena
+from app.services.booking_search import refresh_booking_names
+from app.services.maps import to_geojson_point
+from app.services.search_cache import invalidate_search_arena
+from app.services.text_search import address_search_keys
+
+logger = logging.getLogger(__name__)
+
+# Projeção de busca das quadras
+# Cada documento da coleção court_search é a quadra (mesmo _id) com os dados da
+# arena necessários para filtrar e ordenar a busca:
+#   {...campos da quadra, "arena": {"id", "name", "address", "rating"},
+#    "city", "state", "neighborhood", "search" (localização normalizada), "amenities",
+#    "business_hours", "rating", "effective_price", "location" (ponto GeoJSON),
+#    "arena_active"}
+# A busca de quadras vira uma única consulta indexada, sem buscar a arena de cada
+# resultado. A projeção é atualizada nas escritas de arenas e quadras (sync_arena,
+# sync_court), que também invalidam as buscas em cache da cidade da arena e
+# atualizam as sugestões da busca (autocomplete), e pode ser reconstruída com
+# rebuild_court_search.
+
+
+def effective_price(court: Dict[str, Any]) -> Optional[float]:
+    """Preço efetivamente cobrado por hora (preço promocional, se houver)."""
+    return court.get("discounted_price") or court.get("price_per_hour")
+
+
+# effective_price como expressão de agregação (mesma regra, para atualizações em lote)
+EFFECTIVE_PRICE_EXPRESSION = {"$cond": [
+    {"$gt": ["$discounted_price", 0]}, "$discounted_price", "$price_per_hour"
+]}
+
+
+def build_court_search_doc(court: Dict[str, Any], arena: Dict[str, Any]) -> Dict[str, Any]:
+    """Montar o documento de busca de uma quadra."""
+    address = arena.get("address") or {}
+
+    doc = dict(court)
+    doc["arena_id"] = str(court["arena_id"])
+    doc["arena"] = {
+        "id": str(arena["_id"]),
+        "name": arena.get("name"),
+        "address": address,
+        "rating": arena.get("rating", 0.0)
+    }
+    doc["city"] = address.get("city")
+    doc["state"] = address.get("state")
+    doc["neighborhood"] = address.get("neighborhood")
+    doc["search"] = address_search_keys(address)
+    doc["amenities"] = arena.get("amenities") or []
+    doc["business_hours"] = arena.get("business_hours") or {}
+    doc["rating"] = arena.get("rating", 0.0)
+    doc["effective_price"] = effective_price(court)
+    doc["arena_active"] = arena.get("active", True)
+
+    location = to_geojson_point(address.get("coordinates"))
+    if location:
+        doc["location"] = location
+    else:
+        doc.pop("location", None)
+
+    return doc
+
+
+async def sync_arena(arena_id: str) -> int:
+    """
+    Atualizar os documentos de busca de todas as quadras de uma arena (após
+    alterações na arena: endereço, comodidades, avaliação, ativação...).
+
+    Returns:
+        Número de quadras sincronizadas
+    """
+    arena_id = str(arena_id)
+    arena = await db.db.arenas.find_one({"_id": ObjectId(arena_id)})
+    if not arena:
+        await remove_arena(arena_id)
+        return 0
+
+    courts = await db.db.courts.find(arena_courts_query(arena_id)).to_list(length=None)
+    court_ids = [court["_id"] for court in courts]
+
+    requests = [
+        ReplaceOne({"_id": court["_id"]}, build_court_search_doc(court, arena), upsert=True)
+        for court in courts
+    ]
+    # Remover quadras que não pertencem mais à arena
+    requests.append(DeleteMany({"arena_id": arena_id, "_id": {"$nin": court_ids}}))
+
+    await db.db.court_search.bulk_write(requests, ordered=False)
+    invalidate_search_arena(arena)
+    index_arena(arena)
+    return len(courts)
+
+
+async def sync_court(court_id: str) -> bool:
+    """
+    Atualizar o documento de busca de uma quadra e o resumo de quadras da arena
+    (após criar ou editar a quadra).
+
+    Returns:
+        True se a quadra existe e foi sincronizada
+    """
+    court = await db.db.courts.find_one({"_id": ObjectId(court_id)})
+    if not court:
+        await remove_court(court_id)
+        return False
+
+    # O preço efetivo também fica na quadra (filtros e ordenação por preço)
+    price = effective_price(court)
+    if court.get("effective_price") != price:
+        court["effective_price"] = price
+        await db.db.courts.update_one({"_id": court["_id"]}, {"$set": {"effective_price": price}})
+
+    arena = await db.db.arenas.find_one({"_id": ObjectId(court["arena_id"])})
+    if not arena:
+        await remove_court(court_id)
+        return False
+
+    await db.db.court_search.replace_one(
+        {"_id": court["_id"]},
+        build_court_search_doc(court, arena),
+        upsert=True
+    )
+    await refresh_arena_courts(str(arena["_id"]))
+    invalidate_search_arena(arena)
+
+    # Nome da quadra gravado nas reservas (apenas as que ainda têm o nome antigo)
+    await refresh_booking_names(
+        {"court_id": str(court["_id"]), "court_name": {"$ne": court.get("name")}},
+        {"court_name": court.get("name")}
+    )
+    return True
+
+
+async def remove_court(court_id: str) -> None:
+    """Remover o documento de busca de uma quadra excluída e atualizar o resumo de quadras da arena."""
+    search_doc = await db.db.court_search.find_one_and_delete({"_id": ObjectId(court_id)})
+    if not search_doc:
+        return
+
+    await refresh_arena_courts(search_doc["arena_id"])
+    invalidate_search_arena({"address": search_doc["arena"]["address"]})
+
+
+async def remove_arena(arena_id: str) -> None:
+    """Remover os documentos de busca das quadras de uma arena excluída."""
+    await db.db.court_search.delete_many({"arena_id": str(arena_id)})
+    unindex_arena(arena_id)
+
+
+async def rebuild_effective_prices() -> int:
+    """
+    Recalcular o campo effective_price de todas as quadras (backfill/reparo).
+
+    Returns:
+        Número de quadras alteradas
+    """
+    result = await db.db.courts.update_many(
+        {},
+        [{"$set": {"effective_price": EFFECTIVE_PRICE_EXPRESSION}}]
+    )
+    logger.info(f"Preço efetivo recalculado em {result.modified_count} quadras.")
+    return result.modified_count
+
+
+async def rebuild_court_search() -> int:
+    """
+    Reconstruir toda a projeção de busca a partir das quadras e arenas.
+
+    Returns:
+        Número de documentos gravados
+    """
+    arenas = {
+        str(arena["_id"]): arena
+        async for arena in db.db.arenas.find({})
+    }
+
+    await db.db.court_search.delete_many({})
+
+    total = 0
+    batch: List[Dict[str, Any]] = []
+    async for court in db.db.courts.find({}):
+        arena = arenas.get(str(court.get("arena_id")))
+        if not arena:
+            continue
+
+        batch.append(build_court_search_doc(court, arena))
+        if len(batch) >= 1000:
+            await db.db.court_search.insert_many(batch, ordered=False)
+            total += len(batch)
+            batch = []
+
+    if batch:
+        await db.db.court_search.insert_many(batch, ordered=False)
+        total += len(batch)
+
+    logger.info(f"Projeção de busca de quadras reconstruída: {total} documentos.")
+    return total
@@ -0,0 +1,292 @@
+# app/services/daily_stats.py
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+from app.db.database import db
+from app.services.text_search import fold
+
+logger = logging.getLogger(__name__)
+
+# Agregados diários de reservas e pagamentos (coleção stats_daily)
+# Um documento por dia, arena e tipo de quadra:
+#   {"day": datetime (00:00), "arena_id", "court_type", "city", "city_key" (normalizada),
+#    "bookings_created", "booked_amount",  reservas criadas no dia e seu valor
+#    "bookings": {status: n},              reservas criadas no dia, pelo status atual
+#    "cancellations",                      cancelamentos feitos no dia
+#    "payments_created",
+#    "payments": {status: n},              pagamentos criados no dia, pelo status atual
+#    "revenue", "refunded_amount"}         valor aprovado/reembolsado dos pagamentos do dia
+# Os contadores são atualizados com $inc nas escritas de reservas (criação e
+# mudança de status) e de pagamentos (criação, aprovação e reembolso), e os
+# dashboards e relatórios somam poucas linhas em vez de agregar as coleções
+# originais. Falhas ao atualizar os agregados não interrompem a escrita original;
+# rebuild_stats_daily recalcula tudo a partir de bookings e payments.
+
+RowKey = Tuple[datetime, str, Optional[str]]
+
+
+def _day(value: Any) -> datetime:
+    value = value or datetime.now()
+    return datetime(value.year, value.month, value.day)
+
+
+def _status(value: Any) -> str:
+    return getattr(value, "value", value)
+
+
+async def _court_dimensions(court_ids: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+    """Tipo da quadra, arena e cidade de cada quadra (da projeção court_search)."""
+    object_ids = {ObjectId(str(court_id)) for court_id in court_ids if ObjectId.is_valid(str(court_id))}
+    if not object_ids:
+        return {}
+    cursor = db.db.court_search.find(
+        {"_id": {"$in": list(object_ids)}},
+        {"type": 1, "arena_id": 1, "city": 1}
+    )
+    return {str(court["_id"]): court async for court in cursor}
+
+
+def _row_key(
+    day: datetime,
+    arena_id: Any,
+    court: Optional[Dict[str, Any]]
+) -> RowKey:
+    return _day(day), str(arena_id), _status((court or {}).get("type"))
+
+
+async def _apply(increments: Dict[RowKey, Dict[str, float]], cities: Dict[str, Optional[str]]) -> None:
+    requests = []
+    for (day, arena_id, court_type), fields in increments.items():
+        if not any(fields.values()):
+            continue
+        update = {"$inc": fields}
+        if arena_id in cities:
+            update["$set"] = {"city": cities[arena_id], "city_key": fold(cities[arena_id])}
+        requests.append(UpdateOne(
+            {"day": day, "arena_id": arena_id, "court_type": court_type},
+            update,
+            upsert=True
+        ))
+    if not requests:
+        return
+
+    try:
+        await db.db.stats_daily.bulk_write(requests, ordered=False)
+    except Exception as e:
+        logger.error(f"Erro ao atualizar agregados diários (use o rebuild stats_daily): {e}")
+
+
+async def record_bookings_created(bookings: List[Dict[str, Any]]) -> None:
+    """Contar reservas recém-criadas."""
+    courts = await _court_dimensions(booking["court_id"] for booking in bookings)
+    increments: Dict[RowKey, Dict[str, float]] = defaultdict(lambda: defaultdict(int))
+    cities = {}
+
+    for booking in bookings:
+        court = courts.get(str(booking["court_id"]))
+        key = _row_key(booking.get("created_at"), booking["arena_id"], court)
+        fields = increments[key]
+        fields["bookings_created"] += 1
+        fields["booked_amount"] += booking.get("total_amount") or 0
+        fields[f"bookings.{_status(booking['status'])}"] += 1
+        if court:
+            cities[key[1]] = court.get("city")
+
+    await _apply(increments, cities)
+
+
+async def record_booking_status(bookings: List[Dict[str, Any]], new_status: str) -> None:
+    """
+    Mover reservas entre contadores de status.
+
+    Args:
+        bookings: Documentos das reservas antes da atualização (com o status antigo)
+    """
+    new_status = _status(new_status)
+    bookings = [booking for booking in bookings if _status(booking.get("status")) != new_status]
+    if not bookings:
+        return
+
+    courts = await _court_dimensions(booking["court_id"] for booking in bookings)
+    increments: Dict[RowKey, Dict[str, float]] = defaultdict(lambda: defaultdict(int))
+    cities = {}
+
+    for booking in bookings:
+        court = courts.get(str(booking["court_id"]))
+        fields = increments[_row_key(booking.get("created_at"), booking["arena_id"], court)]
+        fields[f"bookings.{_status(booking.get('status'))}"] -= 1
+        fields[f"bookings.{new_status}"] += 1
+
+        # Cancelamentos contam no dia em que acontecem
+        if new_status == "cancelled":
+            increments[_row_key(datetime.now(), booking["arena_id"], court)]["cancellations"] += 1
+        if court:
+            cities[str(booking["arena_id"])] = court.get("city")
+
+    await _apply(increments, cities)
+
+
+def _payment_fields(payment: Dict[str, Any], sign: int) -> Dict[str, float]:
+    """Contadores de um pagamento no status atual (sign=-1 para retirá-lo)."""
+    payment_status = _status(payment.get("status"))
+    amount = payment.get("amount") or 0
+    fields = {f"payments.{payment_status}": sign}
+    if payment_status == "approved":
+        fields["revenue"] = sign * amount
+    elif payment_status == "refunded":
+        fields["refunded_amount"] = sign * amount
+    return fields
+
+
+async def record_payment(
+    payment: Dict[str, Any],
+    court_id: Any,
+    old_status: Optional[str] = None
+) -> None:
+    """
+    Contar um pagamento criado (old_status None) ou que mudou de status.
+
+    Args:
+        payment: Pagamento com o status novo
+        court_id: Quadra da reserva paga
+        old_status: Status anterior do pagamento
+    """
+    if old_status is not None and _status(old_status) == _status(payment.get("status")):
+        return
+
+    courts = await _court_dimensions([court_id])
+    court = courts.get(str(court_id))
+    key = _row_key(payment.get("created_at"), payment["arena_id"], court)
+
+    fields: Dict[str, float] = defaultdict(int)
+    if old_status is None:
+        fields["payments_created"] += 1
+    else:
+        for field, value in _payment_fields({**payment, "status": old_status}, -1).items():
+            fields[field] += value
+    for field, value in _payment_fields(payment, 1).items():
+        fields[field] += value
+
+    await _apply({key: fields}, {key[1]: (court or {}).get("city")})
+
+
+async def rebuild_stats_daily() -> int:
+    """
+    Recalcular todos os agregados diários a partir de bookings e payments
+    (backfill/reparo).
+
+    Returns:
+        Número de linhas gravadas
+    """
+    courts = {
+        str(court["_id"]): court
+        async for court in db.db.court_search.find({}, {"type": 1, "arena_id": 1, "city": 1})
+    }
+    rows: Dict[RowKey, Dict[str, float]] = defaultdict(lambda: defaultdict(int))
+    cities = {}
+
+    def add(day, arena_id, court_id, fields: Dict[str, float]) -> None:
+        court = courts.get(str(court_id))
+        row = rows[_row_key(day, arena_id, court)]
+        for field, value in fields.items():
+            row[field] += value
+        if court:
+            cities[str(arena_id)] = court.get("city")
+
+    day_expression = {"$dateTrunc": {"date": "$created_at", "unit": "day"}}
+    bookings = db.db.bookings.aggregate([
+        {"$group": {
+            "_id": {
+                "day": day_expression,
+                "arena_id": {"$toString": "$arena_id"},
+                "court_id": {"$toString": "$court_id"},
+                "status": "$status"
+            },
+            "count": {"$sum": 1},
+            "amount": {"$sum": "$total_amount"}
+        }}
+    ])
+    async for group in bookings:
+        key = group["_id"]
+        add(key["day"], key["arena_id"], key["court_id"], {
+            "bookings_created": group["count"],
+            "booked_amount": group["amount"],
+            f"bookings.{key['status']}": group["count"]
+        })
+
+    # Data do cancelamento: última atualização das reservas canceladas
+    cancellations = db.db.bookings.aggregate([
+        {"$match": {"status": "cancelled"}},
+        {"$group": {
+            "_id": {
+                "day": {"$dateTrunc": {"date": {"$ifNull": ["$updated_at", "$created_at"]}, "unit": "day"}},
+                "arena_id": {"$toString": "$arena_id"},
+                "court_id": {"$toString": "$court_id"}
+            },
+            "count": {"$sum": 1}
+        }}
+    ])
+    async for group in cancellations:
+        key = group["_id"]
+        add(key["day"], key["arena_id"], key["court_id"], {"cancellations": group["count"]})
+
+    payments = await db.db.payments.aggregate([
+        {"$group": {
+            "_id": {
+                "day": day_expression,
+                "arena_id": {"$toString": "$arena_id"},
+                "booking_id": "$booking_id",
+                "status": "$status"
+            },
+            "count": {"$sum": 1},
+            "amount": {"$sum": "$amount"}
+        }}
+    ]).to_list(length=None)
+
+    booking_ids = {
+        ObjectId(str(group["_id"]["booking_id"]))
+        for group in payments
+        if ObjectId.is_valid(str(group["_id"].get("booking_id")))
+    }
+    booking_courts = {
+        str(booking["_id"]): booking.get("court_id")
+        async for booking in db.db.bookings.find({"_id": {"$in": list(booking_ids)}}, {"court_id": 1})
+    }
+
+    for group in payments:
+        key = group["_id"]
+        fields = {"payments_created": group["count"], f"payments.{key['status']}": group["count"]}
+        if key["status"] == "approved":
+            fields["revenue"] = group["amount"]
+        elif key["status"] == "refunded":
+            fields["refunded_amount"] = group["amount"]
+        add(key["day"], key["arena_id"], booking_courts.get(str(key.get("booking_id"))), fields)
+
+    documents = []
+    for (day, arena_id, court_type), fields in rows.items():
+        document = {
+            "day": day,
+            "arena_id": arena_id,
+            "court_type": court_type,
+            "city": cities.get(arena_id),
+            "city_key": fold(cities.get(arena_id))
+        }
+        for field, value in fields.items():
+            if "." in field:
+                group, name = field.split(".", 1)
+                document.setdefault(group, {})[name] = value
+            else:
+                document[field] = value
+        documents.append(document)
+
+    await db.db.stats_daily.delete_many({})
+    for start in range(0, len(documents), 1000):
+        await db.db.stats_daily.insert_many(documents[start:start + 1000], ordered=False)
+
+    logger.info(f"Agregados diários recalculados: {len(documents)} linhas.")
+    return len(documents)
@@ -0,0 +1,198 @@
+# app/services/dashboard.py
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.core.constants import DASHBOARD_CACHE_TTL_SECONDS
+from app.db.database import db
+from app.models.user import UserRole
+from app.services.cache import register_cache
+
+# Estatísticas do dashboard administrativo e do dashboard do proprietário
+# Cada coleção é resumida por uma única agregação ($group em uma passada, com os
+# contadores do período calculados por $cond), e as agregações das coleções
+# rodam concorrentemente: a latência do dashboard é a da agregação mais lenta.
+# Reservas e pagamentos vêm dos agregados diários (stats_daily), cujo tamanho não
+# cresce com o número de reservas.
+# O resultado fica em cache por período durante alguns segundos, para que
+# atualizações repetidas da tela não refaçam as agregações.
+
+dashboard_cache = register_cache("dashboard", max_entries=16, ttl_seconds=DASHBOARD_CACHE_TTL_SECONDS)
+
+
+DASHBOARD_PERIODS = ("day", "week", "month", "year")
+
+
+def period_start(period: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """Início do período atual (None se o período for inválido)."""
+    now = now or datetime.now()
+    if period == "day":
+        return datetime(now.year, now.month, now.day)
+    if period == "week":
+        # Início da semana atual (segunda-feira)
+        start = now - timedelta(days=now.weekday())
+        return datetime(start.year, start.month, start.day)
+    if period == "month":
+        return datetime(now.year, now.month, 1)
+    if period == "year":
+        return datetime(now.year, 1, 1)
+    return None
+
+
+def _since(start_date: datetime, field: str = "$created_at") -> Dict[str, Any]:
+    """Expressão 1/0: documento criado a partir de start_date."""
+    return {"$cond": [{"$gte": [field, start_date]}, 1, 0]}
+
+
+async def _aggregate(collection, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return await collection.aggregate(pipeline).to_list(length=None)
+
+
+async def _user_stats(start_date: datetime) -> Dict[str, Any]:
+    groups = await _aggregate(db.db.users, [
+        {"$group": {"_id": "$role", "count": {"$sum": 1}, "new": {"$sum": _since(start_date)}}}
+    ])
+    by_role = {group["_id"]: group["count"] for group in groups}
+    return {
+        "total": sum(group["count"] for group in groups),
+        "new_in_period": sum(group["new"] for group in groups),
+        "by_role": [{"role": role.value, "count": by_role.get(role.value, 0)} for role in UserRole]
+    }
+
+
+async def _arena_stats(start_date: datetime) -> Dict[str, Any]:
+    groups = await _aggregate(db.db.arenas, [
+        {"$group": {
+            "_id": None,
+            "total": {"$sum": 1},
+            "active": {"$sum": {"$cond": [{"$eq": ["$active", True]}, 1, 0]}},
+            "new_in_period": {"$sum": _since(start_date)}
+        }}
+    ])
+    stats = groups[0] if groups else {}
+    return {field: stats.get(field, 0) for field in ("total", "active", "new_in_period")}
+
+
+async def _court_stats() -> Dict[str, Any]:
+    groups = await _aggregate(db.db.courts, [
+        {"$group": {"_id": "$type", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1}}
+    ])
+    return {
+        "total": sum(group["count"] for group in groups),
+        "by_type": [{"type": group["_id"], "count": group["count"]} for group in groups]
+    }
+
+
+def _in_period(start_date: datetime, field: str) -> Dict[str, Any]:
+    """Soma de field nas linhas de stats_daily a partir de start_date."""
+    return {"$sum": {"$cond": [{"$gte": ["$day", start_date]}, f"${field}", 0]}}
+
+
+async def _rollup_stats(start_date: datetime, match: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Reservas e pagamentos a partir dos agregados diários (ver app/services/daily_stats.py)."""
+    groups = await _aggregate(db.db.stats_daily, [
+        {"$match": match},
+        {"$group": {
+            "_id": None,
+            "bookings_total": {"$sum": "$bookings_created"},
+            "bookings_completed": {"$sum": "$bookings.completed"},
+            "bookings_cancelled": {"$sum": "$bookings.cancelled"},
+            "bookings_pending": {"$sum": "$bookings.pending"},
+            "bookings_in_period": _in_period(start_date, "bookings_created"),
+            "payments_total": {"$sum": "$payments_created"},
+            "payments_approved": {"$sum": "$payments.approved"},
+            "total_revenue": {"$sum": "$revenue"},
+            "payments_in_period": _in_period(start_date, "payments_created"),
+            "period_revenue": _in_period(start_date, "revenue")
+        }}
+    ])
+    stats = groups[0] if groups else {}
+    return {
+        "bookings": {
+            "total": stats.get("bookings_total", 0),
+            "completed": stats.get("bookings_completed", 0),
+            "cancelled": stats.get("bookings_cancelled", 0),
+            "pending": stats.get("bookings_pending", 0),
+            "in_period": stats.get("bookings_in_period", 0)
+        },
+        "payments": {
+            "total": stats.get("payments_total", 0),
+            "approved": stats.get("payments_approved", 0),
+            "total_revenue": stats.get("total_revenue", 0),
+            "in_period": stats.get("payments_in_period", 0),
+            "period_revenue": stats.get("period_revenue", 0)
+        }
+    }
+
+
+async def dashboard_snapshot(period: str, start_date: datetime) -> Dict[str, Any]:
+    """
+    Estatísticas do dashboard para o período (em cache por alguns segundos).
+
+    Args:
+        period: Nome do período (day, week, month, year)
+        start_date: Início do período
+    """
+    key = (period, start_date)
+    snapshot = dashboard_cache.get(key)
+    if snapshot is not None:
+        return snapshot
+
+    users, arenas, courts, rollups = await asyncio.gather(
+        _user_stats(start_date),
+        _arena_stats(start_date),
+        _court_stats(),
+        _rollup_stats(start_date, {})
+    )
+    snapshot = {
+        "period": period,
+        "start_date": start_date.isoformat(),
+        "current_date": datetime.now().isoformat(),
+        "users": users,
+        "arenas": arenas,
+        "courts": courts,
+        **rollups
+    }
+    dashboard_cache.set(key, snapshot)
+    return snapshot
+
+
+async def arena_dashboard_snapshot(arena_id: str, period: str, start_date: datetime) -> Dict[str, Any]:
+    """
+    Estatísticas de reservas e pagamentos de uma arena (dashboard do proprietário),
+    com o detalhamento por tipo de quadra no período. Em cache como o dashboard.
+    """
+    key = ("arena", arena_id, period, start_date)
+    snapshot = dashboard_cache.get(key)
+    if snapshot is not None:
+        return snapshot
+
+    match = {"arena_id": str(arena_id)}
+    rollups, by_court_type = await asyncio.gather(
+        _rollup_stats(start_date, match),
+        _aggregate(db.db.stats_daily, [
+            {"$match": {**match, "day": {"$gte": start_date}}},
+            {"$group": {
+                "_id": "$court_type",
+                "bookings": {"$sum": "$bookings_created"},
+                "cancellations": {"$sum": "$cancellations"},
+                "revenue": {"$sum": "$revenue"}
+            }},
+            {"$sort": {"revenue": -1}}
+        ])
+    )
+    snapshot = {
+        "arena_id": str(arena_id),
+        "period": period,
+        "start_date": start_date.isoformat(),
+        "current_date": datetime.now().isoformat(),
+        **rollups,
+        "by_court_type": [
+            {"type": group["_id"], "bookings": group["bookings"],
+             "cancellations": group["cancellations"], "revenue": group["revenue"]}
+            for group in by_court_type
+        ]
+    }
+    dashboard_cache.set(key, snapshot)
+    return snapshot
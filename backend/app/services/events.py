@@ -0,0 +1,158 @@
+# app/services/events.py
+import asyncio
+import json
+from collections import defaultdict
+from datetime import date
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set
+
+from app.core.constants import (
+    AVAILABILITY_STREAM_KEEPALIVE_SECONDS,
+    AVAILABILITY_STREAM_QUEUE_SIZE,
+    BOOKING_SLOT_MINUTES,
+)
+from app.services.occupancy import on_occupancy_change
+
+# Pub/sub em memória dos eventos de ocupação das quadras
+# Cada assinante (uma conexão SSE) acompanha um conjunto de quadras em um intervalo
+# de datas. Os assinantes ficam indexados por quadra, então publicar uma mudança
+# custa apenas o número de assinantes daquela quadra, e assinantes ociosos não
+# custam nada além da fila e do keep-alive. Os eventos são publicados pelo índice
+# de ocupação (toda criação, cancelamento ou mudança de status de reserva que
+# altera a ocupação passa por ele). O broker é local ao processo: cada worker
+# notifica os assinantes das escritas que ele mesmo fez.
+
+
+class Subscription:
+    """Assinatura de um cliente: quadras, intervalo de datas e fila de eventos."""
+
+    def __init__(self, court_ids: Iterable[str], start_date: date, end_date: date):
+        self.court_ids = {str(court_id) for court_id in court_ids}
+        self.start_date = start_date.isoformat()
+        self.end_date = end_date.isoformat()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=AVAILABILITY_STREAM_QUEUE_SIZE)
+        # Cliente lento demais: os eventos pendentes são descartados e ele deve recarregar
+        self.overflowed = False
+
+    def accepts(self, date_str: str) -> bool:
+        return self.start_date <= date_str <= self.end_date
+
+    def push(self, event: Dict[str, Any]) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def request_resync(self) -> None:
+        self.overflowed = True
+        try:
+            # Acordar o consumidor que estiver aguardando na fila
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+
+class AvailabilityBroker:
+    """Distribui os eventos de ocupação para os assinantes de cada quadra."""
+
+    def __init__(self):
+        self._by_court: Dict[str, Set[Subscription]] = defaultdict(set)
+
+    @property
+    def subscribers_count(self) -> int:
+        return len({subscription for subscriptions in self._by_court.values() for subscription in subscriptions})
+
+    def subscribe(self, court_ids: Iterable[str], start_date: date, end_date: date) -> Subscription:
+        subscription = Subscription(court_ids, start_date, end_date)
+        for court_id in subscription.court_ids:
+            self._by_court[court_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for court_id in subscription.court_ids:
+            subscriptions = self._by_court.get(court_id)
+            if subscriptions is None:
+                continue
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._by_court[court_id]
+
+    def publish(self, court_id: str, date_str: str, mask: int, occupied: bool) -> None:
+        """Publicar a mudança de ocupação (bitmap dos slots alterados) de uma quadra em um dia."""
+        subscriptions = self._by_court.get(str(court_id))
+        if not subscriptions:
+            return
+
+        event = {"court_id": str(court_id), "date": date_str, "mask": mask, "occupied": occupied}
+        for subscription in subscriptions:
+            if subscription.accepts(date_str):
+                subscription.push(event)
+
+    def publish_resync(self) -> None:
+        """Pedir a todos os assinantes que recarreguem a disponibilidade (ex.: índice reconstruído)."""
+        for subscriptions in self._by_court.values():
+            for subscription in subscriptions:
+                subscription.request_resync()
+
+
+availability_broker = AvailabilityBroker()
+
+
+@on_occupancy_change
+def _publish_occupancy(masks: Optional[Dict[tuple, int]], occupy: bool) -> None:
+    if masks is None:
+        availability_broker.publish_resync()
+        return
+
+    for (court_id, date_str), mask in masks.items():
+        availability_broker.publish(court_id, date_str, mask, occupy)
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Formatar uma mensagem Server-Sent Events."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def stream_availability(
+    court_ids: Iterable[str],
+    start_date: date,
+    end_date: date,
+    is_disconnected=None
+) -> AsyncIterator[str]:
+    """
+    Gerar o fluxo SSE de mudanças de ocupação das quadras no intervalo de datas.
+
+    Eventos:
+        ready: assinatura ativa ({"slot_minutes"}); bit n de mask = slot que começa em n * slot_minutes
+        slots: {"court_id", "date", "mask", "occupied"} - slots que foram ocupados/liberados
+        resync: eventos foram perdidos; o cliente deve recarregar a disponibilidade
+    """
+    subscription = availability_broker.subscribe(court_ids, start_date, end_date)
+    try:
+        yield format_sse("ready", {"slot_minutes": BOOKING_SLOT_MINUTES})
+
+        while True:
+            if subscription.overflowed:
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.overflowed = False
+                yield format_sse("resync", {})
+                continue
+
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(),
+                    timeout=AVAILABILITY_STREAM_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                if is_disconnected and await is_disconnected():
+                    break
+                # Comentário SSE para manter a conexão aberta
+                yield ": keep-alive\n\n"
+                continue
+
+            if event is not None:
+                yield format_sse("slots", event)
+    finally:
+        availability_broker.unsubscribe(subscription)
@@ -0,0 +1,152 @@
+# app/services/exports.py
+import asyncio
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from bson.objectid import ObjectId
+
+from app.core.constants import EXPORT_CHUNK_ROWS, EXPORT_CURSOR_BATCH_SIZE
+from app.utils.helpers import get_field
+
+# Exportações administrativas (contabilidade e operação) em CSV ou NDJSON
+# As linhas saem direto de um cursor do MongoDB para a resposta em streaming:
+# o cursor traz lotes de EXPORT_CURSOR_BATCH_SIZE documentos (só as colunas
+# exportadas) e as linhas são enviadas em blocos de EXPORT_CHUNK_ROWS. A memória
+# usada não depende do número de linhas, e o próximo lote só é lido depois que o
+# bloco anterior foi entregue ao servidor (que aguarda o cliente consumir). Entre
+# os blocos o gerador devolve o controle ao event loop, para que uma exportação
+# grande não atrase as outras requisições.
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson"
+}
+
+# Colunas de cada exportação (campos do documento, com "." para subcampos)
+BOOKING_EXPORT_FIELDS = (
+    "_id", "created_at", "status", "booking_type",
+    "timeslot.date", "timeslot.start_time", "timeslot.end_time",
+    "monthly_config.start_date", "monthly_config.end_date",
+    "user_id", "user_name", "user_email",
+    "arena_id", "arena_name", "court_id", "court_name",
+    "total_hours", "subtotal", "discount_amount", "total_amount",
+    "requires_payment", "payment_deadline", "updated_at"
+)
+PAYMENT_EXPORT_FIELDS = (
+    "_id", "created_at", "status", "payment_method", "amount",
+    "booking_id", "booking_group_id", "user_id", "arena_id",
+    "gateway_id", "payment_date", "updated_at"
+)
+USER_EXPORT_FIELDS = (
+    "_id", "created_at", "username", "email", "first_name", "last_name",
+    "phone", "role", "is_active", "updated_at"
+)
+
+# Ordenação das exportações (a mesma das listagens, coberta por índices)
+EXPORT_SORT = [("created_at", -1), ("_id", -1)]
+
+# Caracteres que fazem planilhas interpretarem a célula como fórmula
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def admin_payments_filter(
+    status: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    arena_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """Filtro da exportação de pagamentos (intervalo inclusivo da data de criação)."""
+    filter_query: Dict[str, Any] = {}
+
+    if status:
+        filter_query["status"] = status
+    if arena_id:
+        filter_query["arena_id"] = arena_id
+
+    if start_date or end_date:
+        created_at = {}
+        if start_date:
+            created_at["$gte"] = datetime.combine(start_date, datetime.min.time())
+        if end_date:
+            created_at["$lt"] = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+        filter_query["created_at"] = created_at
+
+    return filter_query
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_value, ensure_ascii=False)
+    if isinstance(value, (ObjectId, datetime, date, Enum)):
+        return _json_value(value)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+async def stream_export(
+    collection,
+    filter_query: Dict[str, Any],
+    fields: Sequence[str],
+    export_format: str = "csv",
+    sort: Optional[List[Tuple[str, int]]] = None
+) -> AsyncIterator[bytes]:
+    """
+    Gerar a exportação em blocos de bytes (para StreamingResponse).
+
+    Args:
+        collection: Coleção exportada
+        fields: Colunas exportadas (ver *_EXPORT_FIELDS)
+        export_format: "csv" (uma coluna por campo, com cabeçalho) ou "ndjson"
+            (um objeto JSON por linha, com a estrutura dos documentos)
+    """
+    projection = {field: 1 for field in fields}
+    cursor = collection.find(filter_query, projection, sort=sort or EXPORT_SORT, batch_size=EXPORT_CURSOR_BATCH_SIZE)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == "csv":
+        writer.writerow(fields)
+    rows = 0
+
+    try:
+        async for doc in cursor:
+            if export_format == "csv":
+                writer.writerow([_csv_value(get_field(doc, field)) for field in fields])
+            else:
+                buffer.write(json.dumps(doc, default=_json_value, ensure_ascii=False))
+                buffer.write("\n")
+
+            rows += 1
+            if rows >= EXPORT_CHUNK_ROWS:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+                rows = 0
+                # Os documentos já carregados no lote não passam pelo event loop
+                await asyncio.sleep(0)
+
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+    finally:
+        # Cliente desconectado ou erro: liberar o cursor no servidor
+        await cursor.close()
+
+
+def export_filename(name: str, export_format: str) -> str:
+    """Nome do arquivo da exportação, com data e hora."""
+    return f"{name}-{datetime.now():%Y%m%d-%H%M%S}.{export_format}"
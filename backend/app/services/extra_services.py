@@ -0,0 +1,115 @@
+# app/services/extra_services.py
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson.objectid import ObjectId
+
+from app.core.constants import EXTRA_SERVICES_CACHE_MAX_ARENAS, EXTRA_SERVICES_CACHE_TTL_SECONDS
+from app.db.database import db
+from app.services.cache import register_cache
+
+# Catálogo de serviços extras por arena
+# Cada entrada do cache é o dicionário {service_id: documento (ou None se não
+# existir)} dos serviços de uma arena já consultados. Os serviços que faltam são
+# carregados juntos, com uma única consulta $in, e a precificação de uma reserva
+# (ou de um carrinho) é feita em uma única passagem.
+
+extra_services_cache = register_cache(
+    "extra_services",
+    max_entries=EXTRA_SERVICES_CACHE_MAX_ARENAS,
+    ttl_seconds=EXTRA_SERVICES_CACHE_TTL_SECONDS
+)
+
+
+async def get_services(arena_id: str, service_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Obter os serviços extras de uma arena (no máximo uma consulta ao banco).
+    Serviços inexistentes ou de outra arena são omitidos.
+    """
+    arena_id = str(arena_id)
+    service_ids = {str(service_id) for service_id in service_ids if ObjectId.is_valid(str(service_id))}
+    if not service_ids:
+        return {}
+
+    generation = extra_services_cache.generation
+    catalog = dict(extra_services_cache.get(arena_id) or {})
+
+    missing = [service_id for service_id in service_ids if service_id not in catalog]
+    if missing:
+        for service_id in missing:
+            catalog[service_id] = None
+
+        cursor = db.db.extra_services.find({"_id": {"$in": [ObjectId(service_id) for service_id in missing]}})
+        async for service in cursor:
+            # Serviços de outra arena não podem ser cobrados nesta
+            if service.get("arena_id") and str(service["arena_id"]) != arena_id:
+                continue
+            catalog[str(service["_id"])] = service
+
+        extra_services_cache.set(arena_id, catalog, generation=generation)
+
+    return {
+        service_id: catalog[service_id]
+        for service_id in service_ids
+        if catalog.get(service_id)
+    }
+
+
+def price_extra_services(
+    selected: List[Dict[str, Any]],
+    services: Dict[str, Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], float]:
+    """
+    Precificar os serviços selecionados ({service_id, quantity}) de uma reserva.
+
+    Returns:
+        (itens no formato de BookingExtraService, valor total dos serviços)
+    """
+    extra_services_data = []
+    extra_services_total = 0
+
+    for extra in selected or []:
+        service_id = extra.get("service_id")
+        quantity = extra.get("quantity", 1)
+
+        # Ignorar serviços com quantidade 0 e serviços inexistentes
+        service = services.get(str(service_id))
+        if quantity <= 0 or not service:
+            continue
+
+        price = service.get("discounted_price") or service.get("price")
+        total_price = price * quantity
+
+        extra_services_data.append({
+            "service_id": service_id,
+            "name": service.get("name"),
+            "quantity": quantity,
+            "unit_price": price,
+            "total_price": total_price
+        })
+
+        extra_services_total += total_price
+
+    return extra_services_data, extra_services_total
+
+
+async def price_selected_services(
+    arena_id: str,
+    selected: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], float]:
+    """Carregar (no máximo uma consulta) e precificar os serviços selecionados de uma reserva."""
+    services = await get_services(
+        arena_id,
+        [extra.get("service_id") for extra in selected or [] if extra.get("quantity", 1) > 0]
+    )
+    return price_extra_services(selected, services)
+
+
+def invalidate_services(arena_id: Optional[str] = None) -> None:
+    """
+    Invalidar o catálogo de uma arena (ou de todas, se arena_id não for informado).
+    Deve ser chamada sempre que serviços extras forem criados, editados ou removidos.
+    """
+    if arena_id is None:
+        extra_services_cache.clear()
+    else:
+        extra_services_cache.invalidate(str(arena_id))
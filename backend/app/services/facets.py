@@ -0,0 +1,160 @@
+# app/services/facets.py
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.constants import COURT_PRICE_FACET_BOUNDARIES, SEARCH_FACET_MAX_VALUES
+from app.services.maps import EARTH_RADIUS_KM
+from app.utils.helpers import keyset_query, keyset_sort, split_page
+
+# Contagens por faceta (tipo de quadra, cidade, bairro, faixa de preço) das buscas
+# A página de resultados e as contagens saem de uma única agregação $facet: cada
+# faceta é um ramo do $facet sobre o mesmo filtro, e o ramo "items" aplica o
+# cursor e a ordenação da página. As contagens não dependem da página, então são
+# guardadas no cache de buscas com uma chave própria (sem página/ordenação).
+
+# Faceta -> expressão agrupada ("unwind": campo de lista, uma contagem por item)
+COURT_FACETS = {
+    "type": {"field": "$type"},
+    "city": {"field": "$city"},
+    "neighborhood": {"field": "$neighborhood"},
+    "price": {"buckets": "$effective_price", "boundaries": COURT_PRICE_FACET_BOUNDARIES}
+}
+
+ARENA_FACETS = {
+    "court_type": {"field": "$court_types", "unwind": True},
+    "city": {"field": "$address.city"},
+    "neighborhood": {"field": "$address.neighborhood"}
+}
+
+
+def parse_facets(facets: Optional[str], spec: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Validar o parâmetro facets ("type,city,price") da busca."""
+    if not facets:
+        return []
+
+    names = sorted({name.strip() for name in facets.split(",") if name.strip()})
+    invalid = [name for name in names if name not in spec]
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Faceta inválida: {', '.join(invalid)}. Valores permitidos: {', '.join(spec)}"
+        )
+    return names
+
+
+def within_radius(
+    filter_query: Dict[str, Any],
+    latitude: Optional[float],
+    longitude: Optional[float],
+    distance_km: Optional[float],
+    key: str = "location"
+) -> Dict[str, Any]:
+    """Restringir o filtro ao raio da busca (as contagens não usam $geoNear)."""
+    if latitude is None or longitude is None or not distance_km:
+        return filter_query
+
+    condition = {key: {"$geoWithin": {
+        "$centerSphere": [[longitude, latitude], distance_km / EARTH_RADIUS_KM]
+    }}}
+    if not filter_query:
+        return condition
+    return {"$and": [filter_query, condition]}
+
+
+def facet_stages(spec: Dict[str, Dict[str, Any]], names: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Ramos do $facet das facetas pedidas."""
+    stages = {}
+    for name in names:
+        facet = spec[name]
+        if "buckets" in facet:
+            stages[name] = [{"$bucket": {
+                "groupBy": facet["buckets"],
+                "boundaries": facet["boundaries"],
+                "default": "other",
+                "output": {"count": {"$sum": 1}}
+            }}]
+            continue
+
+        pipeline = []
+        if facet.get("unwind"):
+            pipeline.append({"$unwind": facet["field"]})
+        pipeline += [
+            {"$match": {facet["field"][1:]: {"$nin": [None, ""]}}},
+            {"$group": {"_id": facet["field"], "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+            {"$limit": SEARCH_FACET_MAX_VALUES}
+        ]
+        stages[name] = pipeline
+    return stages
+
+
+def _format_facets(
+    raw: Dict[str, List[Dict[str, Any]]],
+    spec: Dict[str, Dict[str, Any]]
+) -> Dict[str, List[Dict[str, Any]]]:
+    facets = {}
+    for name, buckets in raw.items():
+        boundaries = spec[name].get("boundaries")
+        values = []
+        for bucket in buckets:
+            value = bucket["_id"]
+            if boundaries and value != "other":
+                upper = boundaries[boundaries.index(value) + 1]
+                value = {"min": value, "max": upper}
+            values.append({"value": value, "count": bucket["count"]})
+        facets[name] = values
+    return facets
+
+
+async def count_facets(
+    collection,
+    filter_query: Dict[str, Any],
+    spec: Dict[str, Dict[str, Any]],
+    names: List[str]
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Contar as facetas pedidas sobre o filtro (uma agregação)."""
+    pipeline = [
+        {"$match": filter_query},
+        {"$facet": facet_stages(spec, names)}
+    ]
+    results = await collection.aggregate(pipeline).to_list(length=1)
+    return _format_facets(results[0] if results else {}, spec)
+
+
+async def fetch_faceted_page(
+    collection,
+    filter_query: Dict[str, Any],
+    spec: Dict[str, Dict[str, Any]],
+    names: List[str],
+    cursor: Optional[str] = None,
+    page: int = 1,
+    items_per_page: int = 20,
+    sort_field: str = "_id",
+    direction: int = -1
+) -> Tuple[List[Dict[str, Any]], Optional[str], Dict[str, List[Dict[str, Any]]]]:
+    """
+    Buscar uma página (como fetch_page) e as contagens das facetas em uma única
+    agregação $facet.
+
+    Returns:
+        (documentos da página, cursor da próxima página, contagens por faceta)
+    """
+    items = []
+    if cursor:
+        items.append({"$match": keyset_query({}, cursor, sort_field, direction)})
+    items += [
+        {"$sort": dict(keyset_sort(sort_field, direction))},
+        {"$skip": 0 if cursor else (max(page, 1) - 1) * items_per_page},
+        {"$limit": items_per_page + 1}
+    ]
+
+    pipeline = [
+        {"$match": filter_query},
+        {"$facet": {"items": items, **facet_stages(spec, names)}}
+    ]
+    results = await collection.aggregate(pipeline).to_list(length=1)
+    raw = results[0] if results else {"items": []}
+
+    docs, next_cursor = split_page(raw.pop("items", []), items_per_page, sort_field)
+    return docs, next_cursor, _format_facets(raw, spec)
@@ -1,9 +1,14 @@
 # app/services/maps.py
 import logging
 import httpx
+import numpy as np
 from typing import Dict, Any, List, Optional, Tuple
 
+from pymongo import UpdateOne
+
 from app.core.config import settings
+from app.core.constants import SEARCH_RANKING_MAX_CANDIDATES, SEARCH_RANKING_WEIGHTS
+from app.db.database import db
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +17,237 @@ logger = logging.getLogger(__name__)
 # Cálculo de distâncias entre pontos
 # Busca de locais próximos (restaurantes, estacionamentos, etc.)
 # Geração de URLs para mapas estáticos
+# Ranking local dos resultados de busca (distância, preço e avaliação), sem API externa
+
+def to_geojson_point(coordinates: Optional[Dict[str, float]]) -> Optional[Dict[str, Any]]:
+    """
+    Converter coordenadas {"latitude", "longitude"} em um ponto GeoJSON (usado nos índices 2dsphere).
+    Coordenadas ausentes ou zeradas (valor padrão do modelo) retornam None.
+    """
+    if not coordinates:
+        return None
+    
+    latitude = coordinates.get("latitude")
+    longitude = coordinates.get("longitude")
+    if latitude is None or longitude is None or (latitude == 0 and longitude == 0):
+        return None
+    
+    return {"type": "Point", "coordinates": [longitude, latitude]}
+
+async def rebuild_arena_locations() -> int:
+    """
+    Gravar o ponto GeoJSON (campo location) de todas as arenas a partir de
+    address.coordinates (backfill das arenas criadas antes do campo existir).
+    
+    Returns:
+        Número de arenas com localização
+    """
+    requests = []
+    total = 0
+    async for arena in db.db.arenas.find({}, {"address.coordinates": 1}):
+        location = to_geojson_point((arena.get("address") or {}).get("coordinates"))
+        if location:
+            requests.append(UpdateOne({"_id": arena["_id"]}, {"$set": {"location": location}}))
+            total += 1
+        else:
+            requests.append(UpdateOne({"_id": arena["_id"]}, {"$unset": {"location": ""}}))
+        
+        if len(requests) >= 1000:
+            await db.db.arenas.bulk_write(requests, ordered=False)
+            requests = []
+    
+    if requests:
+        await db.db.arenas.bulk_write(requests, ordered=False)
+    
+    logger.info(f"Localização GeoJSON gravada em {total} arenas.")
+    return total
+
+# Raio médio da Terra (km) usado na fórmula de haversine
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_km(
+    latitude: float,
+    longitude: float,
+    latitudes: np.ndarray,
+    longitudes: np.ndarray
+) -> np.ndarray:
+    """
+    Distância em linha reta (km) de um ponto até vários pontos de uma só vez.
+    Coordenadas ausentes (NaN) resultam em distância NaN.
+    """
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=float))
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(longitudes, dtype=float)) - np.radians(longitude)
+    
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def _document_coordinates(doc: Dict[str, Any]) -> Tuple[float, float]:
+    # Ponto GeoJSON (arenas e projeção court_search) ou coordenadas do endereço
+    location = doc.get("location")
+    if location and location.get("coordinates"):
+        longitude, latitude = location["coordinates"]
+        return latitude, longitude
+    
+    coordinates = (doc.get("address") or {}).get("coordinates")
+    point = to_geojson_point(coordinates)
+    if point:
+        longitude, latitude = point["coordinates"]
+        return latitude, longitude
+    return np.nan, np.nan
+
+def _scale(values: np.ndarray, higher_is_better: bool) -> np.ndarray:
+    # Normalizar para [0, 1] (1 = melhor); valores ausentes valem 0
+    finite = np.isfinite(values)
+    if not finite.any():
+        return np.zeros_like(values)
+    
+    low, high = values[finite].min(), values[finite].max()
+    if high == low:
+        scaled = np.ones_like(values)
+    elif higher_is_better:
+        scaled = (values - low) / (high - low)
+    else:
+        scaled = (high - values) / (high - low)
+    return np.where(finite, scaled, 0.0)
+
+def ranking_scores(
+    docs: List[Dict[str, Any]],
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    weights: Optional[Dict[str, float]] = None,
+    price_field: str = "effective_price",
+    rating_field: str = "rating"
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Calcular a pontuação de ranking de cada documento.
+    
+    A pontuação é a média ponderada (pesos em SEARCH_RANKING_WEIGHTS) de:
+      - distance: proximidade em relação ao ponto informado (mais perto = melhor)
+      - price: preço (mais barato = melhor)
+      - rating: avaliação de 0 a 5
+    Componentes sem dados (ex.: sem ponto de origem, arenas sem preço) são ignorados
+    e os pesos restantes são renormalizados.
+    
+    Returns:
+        (pontuações entre 0 e 1, distâncias em km ou None se não houver ponto de origem)
+    """
+    weights = weights or SEARCH_RANKING_WEIGHTS
+    count = len(docs)
+    
+    prices = np.array([doc.get(price_field) for doc in docs], dtype=float)
+    ratings = np.array([doc.get(rating_field) for doc in docs], dtype=float)
+    
+    components = {
+        "price": _scale(prices, higher_is_better=False) if np.isfinite(prices).any() else None,
+        # A avaliação usa a escala absoluta (0 a 5), não a faixa dos resultados
+        "rating": np.nan_to_num(ratings / 5.0) if np.isfinite(ratings).any() else None
+    }
+    
+    distances = None
+    if latitude is not None and longitude is not None and count:
+        coordinates = np.array([_document_coordinates(doc) for doc in docs], dtype=float)
+        distances = haversine_km(latitude, longitude, coordinates[:, 0], coordinates[:, 1])
+        components["distance"] = _scale(distances, higher_is_better=False)
+    
+    scores = np.zeros(count)
+    total_weight = 0.0
+    for name, values in components.items():
+        weight = weights.get(name, 0.0)
+        if values is None or not weight:
+            continue
+        scores += weight * values
+        total_weight += weight
+    
+    if total_weight:
+        scores /= total_weight
+    return scores, distances
+
+def rank_results(
+    docs: List[Dict[str, Any]],
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    weights: Optional[Dict[str, float]] = None,
+    price_field: str = "effective_price",
+    rating_field: str = "rating",
+    skip: int = 0,
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Reordenar documentos pela pontuação de ranking (maior primeiro) e retornar a
+    fatia [skip, skip + limit). Os documentos retornados recebem "score" e, se
+    houver ponto de origem, "distance" (km).
+    """
+    if not docs:
+        return docs
+    
+    scores, distances = ranking_scores(docs, latitude, longitude, weights, price_field, rating_field)
+    # Ordenação estável: empates mantêm a ordem original
+    order = np.argsort(-scores, kind="stable")
+    order = order[skip:] if limit is None else order[skip:skip + limit]
+    
+    page_scores = np.round(scores[order], 4).tolist()
+    page_distances = np.round(distances[order], 3).tolist() if distances is not None else None
+    
+    ranked = []
+    for position, index in enumerate(order.tolist()):
+        doc = docs[index]
+        doc["score"] = page_scores[position]
+        if page_distances is not None and not np.isnan(page_distances[position]):
+            doc.setdefault("distance", page_distances[position])
+        ranked.append(doc)
+    return ranked
+
+async def fetch_ranked_page(
+    collection,
+    filter_query: Dict[str, Any],
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    page: int = 1,
+    items_per_page: int = 20,
+    max_distance_km: Optional[float] = None,
+    weights: Optional[Dict[str, float]] = None,
+    price_field: str = "effective_price",
+    rating_field: str = "rating"
+) -> List[Dict[str, Any]]:
+    """
+    Buscar os candidatos em uma única consulta, reordenar pela pontuação e
+    retornar a página pedida. A pontuação não é indexável, então a paginação é
+    por número de página.
+    
+    São pontuados no máximo SEARCH_RANKING_MAX_CANDIDATES candidatos: com ponto de
+    origem, os mais próximos (no raio informado), escolhidos pelo $geoNear (sem
+    localização, o documento não é candidato); sem ponto de origem, os mais bem
+    avaliados.
+    """
+    if latitude is not None and longitude is not None:
+        geo_near = {
+            "near": {"type": "Point", "coordinates": [longitude, latitude]},
+            "key": "location",
+            "distanceField": "distance",
+            "distanceMultiplier": 0.001,  # Metros para km
+            "spherical": True,
+            "query": filter_query
+        }
+        if max_distance_km:
+            geo_near["maxDistance"] = max_distance_km * 1000  # Converter km para metros
+        candidates = await collection.aggregate([
+            {"$geoNear": geo_near},
+            {"$limit": SEARCH_RANKING_MAX_CANDIDATES}
+        ]).to_list(length=None)
+        for candidate in candidates:
+            candidate["distance"] = round(candidate["distance"], 3)
+    else:
+        candidates = await collection.find(filter_query).sort(
+            [(rating_field, -1), ("_id", 1)]
+        ).limit(SEARCH_RANKING_MAX_CANDIDATES).to_list(length=None)
+    
+    return rank_results(
+        candidates, latitude, longitude, weights, price_field, rating_field,
+        skip=(max(page, 1) - 1) * items_per_page,
+        limit=items_per_page
+    )
 
 async def geocode_address(address: Dict[str, Any]) -> Optional[Dict[str, float]]:
     """
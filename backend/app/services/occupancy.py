@@ -0,0 +1,278 @@
+# app/services/occupancy.py
+import logging
+from collections import defaultdict
+from datetime import date, time, timedelta
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from bson.int64 import Int64
+from pymongo import UpdateOne
+
+from app.core.constants import (
+    BOOKING_SLOT_MINUTES,
+    OCCUPYING_BOOKING_STATUSES,
+    OPEN_ENDED_MONTHLY_HORIZON_DAYS,
+)
+from app.db.database import db
+
+logger = logging.getLogger(__name__)
+
+# Índice de ocupação das quadras
+# Cada documento da coleção court_occupancy representa um dia de uma quadra:
+#   {"court_id": str, "date": "YYYY-MM-DD", "mask": int}
+# O campo mask é um bitmap com um bit por slot de BOOKING_SLOT_MINUTES minutos
+# (bit 0 = 00:00). Verificações de disponibilidade viram operações bit a bit sobre
+# esse valor. O índice é derivado das ocorrências em booking_occurrences
+# (ver app/services/occurrences.py).
+
+SLOTS_PER_DAY = 24 * 60 // BOOKING_SLOT_MINUTES
+
+# Funções notificadas após cada mudança no índice, com
+# ({(court_id, date): bitmap dos slots alterados}, occupy). Um dicionário None
+# indica que todo o índice mudou (reconstrução).
+_occupancy_listeners: List[Callable[[Optional[Dict[tuple, int]], bool], None]] = []
+
+
+def on_occupancy_change(listener: Callable[[Optional[Dict[tuple, int]], bool], None]):
+    """Registrar uma função a ser notificada das mudanças no índice de ocupação."""
+    _occupancy_listeners.append(listener)
+    return listener
+
+
+def _notify_occupancy_change(masks: Optional[Dict[tuple, int]], occupy: bool) -> None:
+    for listener in _occupancy_listeners:
+        try:
+            listener(masks, occupy)
+        except Exception as e:
+            logger.error(f"Erro ao notificar mudança de ocupação: {e}")
+
+
+def time_to_minutes(value: Union[str, time]) -> int:
+    """Converter um horário ("HH:MM" ou time) em minutos desde 00:00."""
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+    hours, minutes = value.split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def minutes_to_time_str(minutes: int) -> str:
+    """Converter minutos desde 00:00 em string "HH:MM"."""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def slot_mask(start: Union[str, time], end: Union[str, time]) -> int:
+    """
+    Calcular o bitmap dos slots cobertos pelo intervalo [start, end).
+
+    Horários fora da grade de slots são arredondados para fora (início para baixo,
+    término para cima), de modo que o bitmap nunca subestima a ocupação.
+    """
+    start_minutes = time_to_minutes(start)
+    end_minutes = time_to_minutes(end)
+
+    # "00:00" como horário de término representa o fim do dia
+    if end_minutes == 0 and start_minutes > 0:
+        end_minutes = 24 * 60
+
+    if end_minutes <= start_minutes:
+        return 0
+
+    first_slot = start_minutes // BOOKING_SLOT_MINUTES
+    last_slot = -(-end_minutes // BOOKING_SLOT_MINUTES)  # divisão com arredondamento para cima
+    last_slot = min(last_slot, SLOTS_PER_DAY)
+
+    return ((1 << (last_slot - first_slot)) - 1) << first_slot
+
+
+def is_occupying(status: Optional[str]) -> bool:
+    """Indica se uma reserva com este status ocupa o horário da quadra."""
+    return str(getattr(status, "value", status)) in OCCUPYING_BOOKING_STATUSES
+
+
+def booking_window(booking: Dict[str, Any]) -> Optional[tuple]:
+    """Obter (start_time, end_time) de uma reserva avulsa ou mensal."""
+    if booking.get("timeslot"):
+        return booking["timeslot"]["start_time"], booking["timeslot"]["end_time"]
+    if booking.get("monthly_config"):
+        return booking["monthly_config"]["start_time"], booking["monthly_config"]["end_time"]
+    return None
+
+
+def open_ended_until(start_date: date) -> date:
+    """Data limite de materialização de uma reserva mensal sem data de término."""
+    return max(start_date, date.today()) + timedelta(days=OPEN_ENDED_MONTHLY_HORIZON_DAYS)
+
+
+def booking_dates(
+    booking: Dict[str, Any],
+    from_date: Optional[date] = None,
+    until: Optional[date] = None
+) -> List[str]:
+    """
+    Obter as datas (YYYY-MM-DD) ocupadas por uma reserva.
+
+    Reservas mensais são expandidas para cada data cujo dia da semana está em
+    monthly_config.weekdays. Sem data de término, a expansão vai até
+    OPEN_ENDED_MONTHLY_HORIZON_DAYS a partir de hoje.
+
+    Args:
+        booking: Documento (ou dicionário) da reserva
+        from_date: Ignorar datas anteriores a esta
+        until: Ignorar datas posteriores a esta
+    """
+    booking_type = str(getattr(booking.get("booking_type"), "value", booking.get("booking_type")))
+
+    if booking_type == "single" and booking.get("timeslot"):
+        booking_date = date.fromisoformat(booking["timeslot"]["date"][:10])
+        if (from_date and booking_date < from_date) or (until and booking_date > until):
+            return []
+        return [booking_date.isoformat()]
+
+    config = booking.get("monthly_config")
+    if booking_type == "monthly" and config:
+        start_date = date.fromisoformat(config["start_date"][:10])
+        if config.get("end_date"):
+            end_date = date.fromisoformat(config["end_date"][:10])
+        else:
+            end_date = open_ended_until(start_date)
+
+        if from_date:
+            start_date = max(start_date, from_date)
+        if until:
+            end_date = min(end_date, until)
+
+        weekdays = set(config.get("weekdays") or [])
+        dates = []
+        current_date = start_date
+        while current_date <= end_date:
+            if current_date.weekday() in weekdays:
+                dates.append(current_date.isoformat())
+            current_date += timedelta(days=1)
+        return dates
+
+    return []
+
+
+async def _apply_occurrences(occurrences: List[Dict[str, Any]], occupy: bool) -> None:
+    """Ligar (occupy=True) ou desligar no índice os bits das ocorrências informadas."""
+    masks = defaultdict(int)
+    for occurrence in occurrences:
+        key = (str(occurrence["court_id"]), occurrence["date"])
+        masks[key] |= slot_mask(occurrence["start_time"], occurrence["end_time"])
+
+    requests = []
+    for (court_id, date_str), mask in masks.items():
+        if not mask:
+            continue
+        operation = {"or": Int64(mask)} if occupy else {"and": Int64(~mask)}
+        requests.append(UpdateOne(
+            {"court_id": court_id, "date": date_str},
+            {"$bit": {"mask": operation}},
+            upsert=occupy
+        ))
+
+    if requests:
+        await db.db.court_occupancy.bulk_write(requests, ordered=False)
+        _notify_occupancy_change({key: mask for key, mask in masks.items() if mask}, occupy)
+
+
+async def occupy_occurrences(occurrences: List[Dict[str, Any]]) -> None:
+    """Marcar no índice os slots ocupados pelas ocorrências de uma reserva."""
+    await _apply_occurrences(occurrences, True)
+
+
+async def release_occurrences(occurrences: List[Dict[str, Any]]) -> None:
+    """Liberar no índice os slots ocupados pelas ocorrências de uma reserva."""
+    await _apply_occurrences(occurrences, False)
+
+
+async def get_occupancy(court_id: str, start_date: date, end_date: date) -> Dict[str, int]:
+    """Obter os bitmaps de ocupação de uma quadra em um intervalo de datas (uma única consulta)."""
+    cursor = db.db.court_occupancy.find(
+        {
+            "court_id": court_id,
+            "date": {"$gte": start_date.isoformat(), "$lte": end_date.isoformat()}
+        },
+        {"_id": 0, "date": 1, "mask": 1}
+    )
+
+    occupancy = {}
+    async for doc in cursor:
+        occupancy[doc["date"]] = int(doc.get("mask") or 0)
+    return occupancy
+
+
+async def find_conflict(court_id: str, dates: List[str], mask: int) -> Optional[str]:
+    """
+    Verificar se algum dos slots de mask já está ocupado em alguma das datas.
+
+    Returns:
+        A primeira data conflitante encontrada, ou None se o horário estiver livre
+    """
+    if not dates or not mask:
+        return None
+
+    conflict = await db.db.court_occupancy.find_one(
+        {
+            "court_id": court_id,
+            "date": {"$in": dates},
+            "mask": {"$bitsAnySet": Int64(mask)}
+        },
+        {"_id": 0, "date": 1}
+    )
+    return conflict["date"] if conflict else None
+
+
+async def occupied_courts(
+    date_str: str,
+    mask: int,
+    court_ids: Optional[List[str]] = None,
+    all_slots: bool = False
+) -> List[str]:
+    """
+    Obter as quadras com algum dos slots de mask ocupado na data (uma única
+    consulta para todas as quadras, usada para filtrar a busca por horário).
+
+    Args:
+        court_ids: Restringir a estas quadras
+        all_slots: Exigir todos os slots de mask ocupados ($bitsAllSet)
+    """
+    if not mask:
+        return []
+
+    query = {"date": date_str, "mask": {"$bitsAllSet" if all_slots else "$bitsAnySet": Int64(mask)}}
+    if court_ids is not None:
+        query["court_id"] = {"$in": court_ids}
+    return await db.db.court_occupancy.distinct("court_id", query)
+
+
+async def rebuild_occupancy() -> int:
+    """
+    Reconstruir todo o índice de ocupação a partir das ocorrências materializadas
+    (coleção booking_occurrences).
+
+    Returns:
+        Número de documentos (quadra/dia) gravados
+    """
+    masks = defaultdict(int)
+
+    cursor = db.db.booking_occurrences.find(
+        {},
+        {"_id": 0, "court_id": 1, "date": 1, "start_time": 1, "end_time": 1}
+    )
+    async for occurrence in cursor:
+        key = (str(occurrence["court_id"]), occurrence["date"])
+        masks[key] |= slot_mask(occurrence["start_time"], occurrence["end_time"])
+
+    await db.db.court_occupancy.delete_many({})
+
+    documents = [
+        {"court_id": court_id, "date": date_str, "mask": Int64(mask)}
+        for (court_id, date_str), mask in masks.items()
+        if mask
+    ]
+    if documents:
+        await db.db.court_occupancy.insert_many(documents, ordered=False)
+    _notify_occupancy_change(None, True)
+
+    logger.info(f"Índice de ocupação reconstruído: {len(documents)} documentos.")
+    return len(documents)
@@ -0,0 +1,255 @@
+# app/services/occurrences.py
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.core.constants import OCCUPYING_BOOKING_STATUSES
+from app.db.database import db, transaction
+from app.services.daily_stats import record_booking_status
+from app.services.occupancy import (
+    booking_dates,
+    booking_window,
+    is_occupying,
+    occupy_occurrences,
+    open_ended_until,
+    release_occurrences,
+)
+from app.services.slot_claims import claim_slots, claim_slots_many, release_claims, SlotUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# Ocorrências materializadas das reservas
+# Cada documento da coleção booking_occurrences representa uma data e um horário
+# concretos ocupados por uma reserva (avulsa ou mensal):
+#   {"booking_id", "court_id", "arena_id", "booking_type", "date", "start_time", "end_time"}
+# As ocorrências são a fonte dos slots reivindicados (slot_claims) e do índice de
+# ocupação (court_occupancy), sem expandir monthly_config em tempo de consulta.
+
+
+def _is_open_ended(booking: Dict[str, Any]) -> bool:
+    config = booking.get("monthly_config")
+    return bool(config) and not config.get("end_date")
+
+
+def build_occurrences(
+    booking: Dict[str, Any],
+    from_date: Optional[date] = None,
+    until: Optional[date] = None
+) -> List[Dict[str, Any]]:
+    """Gerar (sem gravar) as ocorrências de uma reserva."""
+    window = booking_window(booking)
+    if not window:
+        return []
+
+    start_time, end_time = window
+    booking_type = getattr(booking.get("booking_type"), "value", booking.get("booking_type"))
+
+    return [
+        {
+            "booking_id": str(booking["_id"]),
+            "court_id": str(booking["court_id"]),
+            "arena_id": str(booking["arena_id"]),
+            "booking_type": booking_type,
+            "date": date_str,
+            "start_time": start_time,
+            "end_time": end_time
+        }
+        for date_str in booking_dates(booking, from_date=from_date, until=until)
+    ]
+
+
+async def materialize_booking(
+    booking: Dict[str, Any],
+    from_date: Optional[date] = None,
+    until: Optional[date] = None
+) -> int:
+    """
+    Reivindicar os slots de uma reserva, gravar suas ocorrências e marcar o índice
+    de ocupação. Pode ser chamada antes da inserção da reserva (o _id precisa
+    estar definido), garantindo que ela só seja gravada se o horário estiver livre.
+
+    Raises:
+        SlotUnavailableError: se algum dos slots já pertencer a outra reserva
+
+    Returns:
+        Número de ocorrências geradas
+    """
+    occurrences = build_occurrences(booking, from_date=from_date, until=until)
+
+    if occurrences:
+        await claim_slots(booking["_id"], occurrences)
+        await db.db.booking_occurrences.insert_many(occurrences, ordered=False)
+        await occupy_occurrences(occurrences)
+
+    # Reservas mensais sem data de término guardam até onde já foram materializadas
+    if _is_open_ended(booking):
+        start_date = date.fromisoformat(booking["monthly_config"]["start_date"][:10])
+        materialized_until = (until or open_ended_until(start_date)).isoformat()
+        booking["occurrences_until"] = materialized_until
+        await db.db.bookings.update_one(
+            {"_id": booking["_id"]},
+            {"$set": {"occurrences_until": materialized_until}}
+        )
+
+    return len(occurrences)
+
+
+async def insert_bookings(bookings: List[Dict[str, Any]]) -> int:
+    """
+    Gravar várias reservas avulsas de uma vez (tudo ou nada): todos os slots são
+    reivindicados em uma única escrita e, em seguida, reservas e ocorrências são
+    gravadas com insert_many (em transação, quando o servidor suportar).
+
+    Raises:
+        SlotUnavailableError: se algum dos slots já estiver reservado; nada é gravado
+
+    Returns:
+        Número de ocorrências geradas
+    """
+    occurrences_by_booking = {
+        str(booking["_id"]): build_occurrences(booking) for booking in bookings
+    }
+    occurrences = [
+        occurrence
+        for booking_occurrences in occurrences_by_booking.values()
+        for occurrence in booking_occurrences
+    ]
+
+    await claim_slots_many(occurrences_by_booking)
+
+    try:
+        async with transaction() as session:
+            if occurrences:
+                await db.db.booking_occurrences.insert_many(occurrences, ordered=False, session=session)
+            await db.db.bookings.insert_many(bookings, session=session)
+    except Exception:
+        # Sem transação, desfazer manualmente o que chegou a ser gravado
+        booking_ids = list(occurrences_by_booking)
+        await db.db.bookings.delete_many({"_id": {"$in": [booking["_id"] for booking in bookings]}})
+        await db.db.booking_occurrences.delete_many({"booking_id": {"$in": booking_ids}})
+        for booking_id in booking_ids:
+            await release_claims(booking_id)
+        raise
+
+    await occupy_occurrences(occurrences)
+
+    return len(occurrences)
+
+
+async def trim_booking(booking_id: str, from_date: Optional[date] = None) -> int:
+    """
+    Remover as ocorrências de uma reserva a partir de uma data (padrão: hoje),
+    liberando os slots reivindicados e o índice de ocupação. Ocorrências passadas
+    são mantidas como histórico.
+
+    Returns:
+        Número de ocorrências removidas
+    """
+    from_date = from_date or date.today()
+    query = {"booking_id": str(booking_id), "date": {"$gte": from_date.isoformat()}}
+
+    occurrences = await db.db.booking_occurrences.find(
+        query,
+        {"_id": 0, "court_id": 1, "date": 1, "start_time": 1, "end_time": 1}
+    ).to_list(length=None)
+
+    if occurrences:
+        await release_occurrences(occurrences)
+        await db.db.booking_occurrences.delete_many(query)
+
+    await release_claims(booking_id, from_date=from_date)
+
+    return len(occurrences)
+
+
+async def replace_booking_occurrences(booking: Dict[str, Any]) -> int:
+    """Regenerar as ocorrências futuras de uma reserva editada."""
+    today = date.today()
+    await trim_booking(booking["_id"], from_date=today)
+    return await materialize_booking(booking, from_date=today)
+
+
+async def sync_booking_status(booking: Dict[str, Any], new_status: str) -> None:
+    """
+    Atualizar ocorrências, índice de ocupação e agregados diários após a mudança
+    de status de uma reserva.
+
+    Args:
+        booking: Documento da reserva antes da atualização (com o status antigo)
+        new_status: Novo status da reserva
+    """
+    was_occupying = is_occupying(booking.get("status"))
+    will_occupy = is_occupying(new_status)
+
+    if was_occupying and not will_occupy:
+        await trim_booking(booking["_id"])
+    elif will_occupy and not was_occupying:
+        await materialize_booking(booking, from_date=date.today())
+
+    await record_booking_status([booking], new_status)
+
+
+async def extend_open_ended_bookings() -> int:
+    """
+    Estender as ocorrências das reservas mensais sem data de término até o
+    horizonte de materialização (OPEN_ENDED_MONTHLY_HORIZON_DAYS a partir de hoje).
+
+    Returns:
+        Número de ocorrências geradas
+    """
+    generated = 0
+    try:
+        target = open_ended_until(date.today())
+        cursor = db.db.bookings.find({
+            "booking_type": "monthly",
+            "monthly_config.end_date": None,
+            "status": {"$in": OCCUPYING_BOOKING_STATUSES},
+            "occurrences_until": {"$lt": target.isoformat()}
+        })
+        async for booking in cursor:
+            from_date = date.fromisoformat(booking["occurrences_until"]) + timedelta(days=1)
+            try:
+                generated += await materialize_booking(booking, from_date=from_date, until=target)
+            except SlotUnavailableError as e:
+                logger.warning(f"Não foi possível estender a reserva mensal {booking['_id']}: {e}")
+    except Exception as e:
+        logger.error(f"Erro ao estender ocorrências de reservas mensais: {e}")
+
+    return generated
+
+
+async def rebuild_occurrences() -> int:
+    """
+    Reconstruir todas as ocorrências a partir das reservas ativas.
+    Os slots reivindicados e o índice de ocupação devem ser reconstruídos em
+    seguida (rebuild_claims e rebuild_occupancy).
+
+    Returns:
+        Número de ocorrências gravadas
+    """
+    await db.db.booking_occurrences.delete_many({})
+
+    total = 0
+    batch = []
+    cursor = db.db.bookings.find({"status": {"$in": OCCUPYING_BOOKING_STATUSES}})
+    async for booking in cursor:
+        batch.extend(build_occurrences(booking))
+
+        if _is_open_ended(booking):
+            start_date = date.fromisoformat(booking["monthly_config"]["start_date"][:10])
+            await db.db.bookings.update_one(
+                {"_id": booking["_id"]},
+                {"$set": {"occurrences_until": open_ended_until(start_date).isoformat()}}
+            )
+
+        if len(batch) >= 1000:
+            await db.db.booking_occurrences.insert_many(batch, ordered=False)
+            total += len(batch)
+            batch = []
+
+    if batch:
+        await db.db.booking_occurrences.insert_many(batch, ordered=False)
+        total += len(batch)
+
+    logger.info(f"Ocorrências de reservas reconstruídas: {total} documentos.")
+    return total
@@ -0,0 +1,108 @@
+# app/services/search_cache.py
+from datetime import date
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from app.core.constants import SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_TTL_SECONDS
+from app.services.cache import register_cache
+from app.services.occupancy import on_occupancy_change
+from app.services.text_search import fold
+
+# Resultados da busca pública (GET /arenas/ e GET /courts)
+# A chave é a consulta canônica: nome e localização normalizados (sem acentos,
+# minúsculos, como na busca), listas ordenadas e parâmetros ausentes omitidos,
+# então "São Paulo" e "sao paulo " usam a mesma entrada. Cada entrada guarda a cidade filtrada (ou
+# None, se a busca não filtrou por cidade) para que mudanças em arenas e quadras
+# de uma cidade invalidem apenas as buscas que podem ter sido afetadas. Buscas
+# filtradas por data guardam a data e são invalidadas quando a ocupação de alguma
+# quadra nesse dia muda.
+
+search_cache = register_cache(
+    "search",
+    max_entries=SEARCH_CACHE_MAX_ENTRIES,
+    ttl_seconds=SEARCH_CACHE_TTL_SECONDS
+)
+
+
+# Parâmetros comparados pelas chaves normalizadas (ver app/services/text_search.py)
+FOLDED_PARAMS = {"name", "city", "state", "neighborhood"}
+
+
+def _canonical(name: str, value: Any) -> Any:
+    if isinstance(value, str):
+        return fold(value) if name in FOLDED_PARAMS else value.strip()
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted(_canonical(name, item) for item in value))
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def search_cache_key(endpoint: str, **params: Any) -> Hashable:
+    """Chave canônica de uma busca (parâmetros None ou vazios são ignorados)."""
+    return (endpoint,) + tuple(
+        (name, _canonical(name, value))
+        for name, value in sorted(params.items())
+        if value is not None and value != [] and value != ""
+    )
+
+
+def get_cached_search(key: Hashable) -> Optional[Tuple[List[Any], Optional[str]]]:
+    """Obter (itens, cursor da próxima página) de uma busca em cache."""
+    entry = search_cache.get(key)
+    if entry is None:
+        return None
+    return entry["items"], entry["next_cursor"]
+
+
+def cache_search(
+    key: Hashable,
+    city: Optional[str],
+    items: List[Any],
+    next_cursor: Optional[str],
+    generation: int,
+    date: Optional[date] = None
+) -> None:
+    """
+    Guardar o resultado de uma busca.
+
+    Args:
+        city: Cidade filtrada na busca (None se a busca não filtrou por cidade)
+        generation: search_cache.generation lido antes de executar a busca
+        date: Data filtrada na busca (disponibilidade por horário)
+    """
+    search_cache.set(
+        key,
+        {
+            "city": fold(city) or None,
+            "date": date.isoformat() if date else None,
+            "items": items,
+            "next_cursor": next_cursor
+        },
+        generation=generation
+    )
+
+
+def invalidate_search_city(city: Optional[str]) -> int:
+    """
+    Invalidar as buscas que podem incluir arenas/quadras da cidade: as que
+    filtraram por um prefixo dessa cidade e as que não filtraram por cidade.
+    """
+    city = fold(city)
+    return search_cache.invalidate_where(
+        lambda key, entry: entry["city"] is None or city.startswith(entry["city"])
+    )
+
+
+def invalidate_search_arena(arena: Optional[Dict[str, Any]]) -> int:
+    """Invalidar as buscas afetadas por uma mudança na arena (pela cidade do endereço)."""
+    return invalidate_search_city(((arena or {}).get("address") or {}).get("city"))
+
+
+@on_occupancy_change
+def _invalidate_occupancy(masks: Optional[Dict[tuple, int]], occupy: bool) -> None:
+    if masks is None:
+        search_cache.invalidate_where(lambda key, entry: entry["date"] is not None)
+        return
+
+    dates = {date_str for _, date_str in masks}
+    search_cache.invalidate_where(lambda key, entry: entry["date"] in dates)
@@ -0,0 +1,165 @@
+# app/services/slot_claims.py
+import logging
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError
+
+from app.core.constants import BOOKING_SLOT_MINUTES
+from app.db.database import db
+from app.services.occupancy import minutes_to_time_str, slot_mask, SLOTS_PER_DAY
+
+logger = logging.getLogger(__name__)
+
+# Reivindicação atômica de horários
+# A coleção slot_claims tem um índice único em (court_id, date, slot_start), com um
+# documento por slot de BOOKING_SLOT_MINUTES minutos ocupado por uma reserva.
+# Criar uma reserva insere todos os seus slots de uma vez: um erro de chave
+# duplicada significa que o horário já foi reservado, sem leitura prévia e sem
+# janela para duas requisições concorrentes passarem pela verificação.
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+class SlotUnavailableError(Exception):
+    """Algum dos slots solicitados já pertence a outra reserva."""
+
+    def __init__(self, date: Optional[str] = None, slot_start: Optional[str] = None):
+        self.date = date
+        self.slot_start = slot_start
+        super().__init__(f"Horário indisponível em {date} às {slot_start}")
+
+
+def build_claims(booking_id: str, occurrences: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Gerar os documentos de slot_claims para as ocorrências de uma reserva."""
+    claims = []
+    for occurrence in occurrences:
+        mask = slot_mask(occurrence["start_time"], occurrence["end_time"])
+        for slot in range(SLOTS_PER_DAY):
+            if mask & (1 << slot):
+                claims.append({
+                    "court_id": str(occurrence["court_id"]),
+                    "date": occurrence["date"],
+                    "slot_start": minutes_to_time_str(slot * BOOKING_SLOT_MINUTES),
+                    "booking_id": str(booking_id)
+                })
+    return claims
+
+
+async def claim_slots(booking_id: str, occurrences: List[Dict[str, Any]]) -> int:
+    """
+    Reivindicar todos os slots das ocorrências de uma reserva em uma única escrita.
+
+    Se qualquer slot já estiver reivindicado, os slots inseridos por esta chamada
+    são desfeitos e SlotUnavailableError é lançada.
+
+    Returns:
+        Número de slots reivindicados
+    """
+    return await claim_slots_many({booking_id: occurrences})
+
+
+async def claim_slots_many(occurrences_by_booking: Dict[str, List[Dict[str, Any]]]) -> int:
+    """
+    Reivindicar os slots de várias reservas em uma única escrita (tudo ou nada).
+
+    Args:
+        occurrences_by_booking: Ocorrências de cada reserva, indexadas pelo id da reserva
+
+    Raises:
+        SlotUnavailableError: se algum slot já estiver reivindicado (inclusive por
+            outra reserva do mesmo lote); nenhum slot do lote permanece gravado,
+            e os slots que as reservas já tinham antes da chamada são mantidos
+
+    Returns:
+        Número de slots reivindicados
+    """
+    claims = [
+        claim
+        for booking_id, occurrences in occurrences_by_booking.items()
+        for claim in build_claims(booking_id, occurrences)
+    ]
+    if not claims:
+        return 0
+
+    # _id definido aqui para desfazer apenas o que esta chamada gravou (a reserva
+    # pode já ter slots de antes, ao estender ou reativar uma reserva existente)
+    for claim in claims:
+        claim["_id"] = ObjectId()
+
+    try:
+        await db.db.slot_claims.insert_many(claims, ordered=False)
+    except BulkWriteError as e:
+        # Desfazer os slots que chegaram a ser inseridos por esta chamada
+        await db.db.slot_claims.delete_many({"_id": {"$in": [claim["_id"] for claim in claims]}})
+
+        duplicates = [
+            error for error in e.details.get("writeErrors", [])
+            if error.get("code") == DUPLICATE_KEY_ERROR
+        ]
+        if not duplicates:
+            raise
+
+        taken = claims[duplicates[0]["index"]]
+        raise SlotUnavailableError(taken["date"], taken["slot_start"])
+
+    return len(claims)
+
+
+async def release_claims(booking_id: str, from_date: Optional[date] = None) -> int:
+    """
+    Liberar os slots reivindicados por uma reserva (a partir de uma data, se informada).
+
+    Returns:
+        Número de slots liberados
+    """
+    query = {"booking_id": str(booking_id)}
+    if from_date:
+        query["date"] = {"$gte": from_date.isoformat()}
+
+    result = await db.db.slot_claims.delete_many(query)
+    return result.deleted_count
+
+
+async def rebuild_claims() -> int:
+    """
+    Reconstruir os slots reivindicados a partir das ocorrências futuras.
+    Slots reivindicados por mais de uma reserva (dados anteriores a este
+    mecanismo) ficam com a primeira e são registrados no log.
+
+    Returns:
+        Número de slots gravados
+    """
+    await db.db.slot_claims.delete_many({})
+
+    total = 0
+    duplicates = 0
+    cursor = db.db.booking_occurrences.find({"date": {"$gte": date.today().isoformat()}})
+    batch = []
+    async for occurrence in cursor:
+        batch.extend(build_claims(occurrence["booking_id"], [occurrence]))
+        if len(batch) >= 1000:
+            inserted, skipped = await _insert_ignoring_duplicates(batch)
+            total += inserted
+            duplicates += skipped
+            batch = []
+
+    if batch:
+        inserted, skipped = await _insert_ignoring_duplicates(batch)
+        total += inserted
+        duplicates += skipped
+
+    if duplicates:
+        logger.warning(f"{duplicates} slots reivindicados por mais de uma reserva foram ignorados.")
+    logger.info(f"Slots reivindicados reconstruídos: {total} documentos.")
+    return total
+
+
+async def _insert_ignoring_duplicates(claims: List[Dict[str, Any]]) -> tuple:
+    try:
+        result = await db.db.slot_claims.insert_many(claims, ordered=False)
+        return len(result.inserted_ids), 0
+    except BulkWriteError as e:
+        skipped = len(e.details.get("writeErrors", []))
+        return e.details.get("nInserted", 0), skipped
@@ -0,0 +1,72 @@
+# app/services/tasks.py
+import asyncio
+import logging
+import time
+from datetime import date, datetime
+
+from app.core.constants import AUTOCOMPLETE_REFRESH_SECONDS
+from app.db.database import db
+from app.models.booking import BookingStatus
+from app.services.autocomplete import rebuild_autocomplete
+from app.services.occurrences import extend_open_ended_bookings, sync_booking_status
+
+logger = logging.getLogger(__name__)
+
+# Intervalo (em segundos) entre execuções das tarefas periódicas
+TASKS_INTERVAL_SECONDS = 60
+
+async def expire_unpaid_bookings() -> int:
+    """
+    Cancelar reservas aguardando pagamento cujo prazo expirou, liberando os
+    horários reivindicados.
+    
+    Returns:
+        Número de reservas canceladas
+    """
+    now = datetime.now()
+    expired = 0
+    
+    cursor = db.db.bookings.find({
+        "status": BookingStatus.WAITING_PAYMENT,
+        "payment_deadline": {"$lt": now}
+    })
+    async for booking in cursor:
+        # O filtro por status evita cancelar uma reserva paga neste meio tempo
+        result = await db.db.bookings.update_one(
+            {"_id": booking["_id"], "status": BookingStatus.WAITING_PAYMENT},
+            {"$set": {
+                "status": BookingStatus.CANCELLED,
+                "notes": "Prazo de pagamento expirado",
+                "updated_at": now
+            }}
+        )
+        if result.modified_count:
+            await sync_booking_status(booking, BookingStatus.CANCELLED)
+            expired += 1
+    
+    if expired:
+        logger.info(f"{expired} reservas canceladas por falta de pagamento.")
+    return expired
+
+async def run_periodic_tasks():
+    """Executar as tarefas periódicas de manutenção das reservas."""
+    last_extension = None
+    last_autocomplete = time.monotonic()
+    
+    while True:
+        try:
+            await expire_unpaid_bookings()
+            
+            # Estender reservas mensais sem data de término uma vez por dia
+            if last_extension != date.today():
+                await extend_open_ended_bookings()
+                last_extension = date.today()
+            
+            # Incluir no índice de sugestões as arenas alteradas por outros processos
+            if time.monotonic() - last_autocomplete >= AUTOCOMPLETE_REFRESH_SECONDS:
+                await rebuild_autocomplete()
+                last_autocomplete = time.monotonic()
+        except Exception as e:
+            logger.error(f"Erro ao executar tarefas periódicas: {e}")
+        
+        await asyncio.sleep(TASKS_INTERVAL_SECONDS)
@@ -0,0 +1,139 @@
+# app/services/text_search.py
+import logging
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+from app.db.database import db
+from app.utils.helpers import get_field
+
+logger = logging.getLogger(__name__)
+
+# Busca textual indexada (sem acentos e sem diferenciar maiúsculas)
+# Os documentos pesquisáveis guardam, no campo "search", chaves normalizadas
+# ("São Paulo" -> "sao paulo") mantidas nas escritas:
+#   arenas:       {"name", "city", "state", "neighborhood", "tokens"}
+#   users:        {"tokens"}
+#   court_search: {"city", "state", "neighborhood"} (copiados da arena)
+# "tokens" são as palavras normalizadas dos campos pesquisáveis (índice multikey).
+# As buscas usam apenas expressões regulares ancoradas no início ("^sao pa"),
+# que o MongoDB resolve como um intervalo do índice, em vez de varrer a coleção.
+
+ARENA_SEARCH_FIELDS = ("name", "address.city", "address.state", "address.neighborhood")
+USER_SEARCH_FIELDS = ("first_name", "last_name", "email", "username")
+
+_TOKEN_SEPARATOR = re.compile(r"[^0-9a-z]+")
+
+
+def fold(text: Optional[str]) -> str:
+    """Normalizar um texto para busca: sem acentos, minúsculo e com espaços simples."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.lower().split())
+
+
+def tokenize(*values: Optional[str]) -> List[str]:
+    """Palavras normalizadas (sem repetição, na ordem em que aparecem) dos textos."""
+    tokens: Dict[str, None] = {}
+    for value in values:
+        for token in _TOKEN_SEPARATOR.split(fold(value)):
+            if token:
+                tokens[token] = None
+    return list(tokens)
+
+
+def address_search_keys(address: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Chaves normalizadas da localização de um endereço."""
+    address = address or {}
+    return {
+        "city": fold(address.get("city")),
+        "state": fold(address.get("state")),
+        "neighborhood": fold(address.get("neighborhood"))
+    }
+
+
+def arena_search_keys(arena: Dict[str, Any]) -> Dict[str, Any]:
+    """Chaves de busca de uma arena (campo "search")."""
+    keys = address_search_keys(arena.get("address"))
+    keys["name"] = fold(arena.get("name"))
+    keys["tokens"] = tokenize(*(get_field(arena, field) for field in ARENA_SEARCH_FIELDS))
+    return keys
+
+
+def user_search_keys(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Chaves de busca de um usuário (campo "search")."""
+    return {"tokens": tokenize(*(user.get(field) for field in USER_SEARCH_FIELDS))}
+
+
+def touches_fields(update_data: Dict[str, Any], fields: Iterable[str]) -> bool:
+    """Verificar se uma atualização altera algum dos campos pesquisáveis."""
+    return any(field.split(".")[0] in update_data for field in fields)
+
+
+def prefix_match(value: str) -> Dict[str, Any]:
+    """Condição "começa com" sobre uma chave normalizada (usa o índice da chave)."""
+    return {"$regex": f"^{re.escape(fold(value))}"}
+
+
+def tokens_query(value: str, field: str = "search.tokens") -> Dict[str, Any]:
+    """
+    Filtro de busca livre: cada palavra digitada deve ser o início de alguma
+    palavra do documento ("sao pau" encontra "São Paulo"). Retorna {} se o texto
+    não tiver palavras.
+    """
+    conditions = [{field: {"$regex": f"^{re.escape(token)}"}} for token in tokenize(value)]
+    if not conditions:
+        return {}
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+def add_condition(filter_query: Dict[str, Any], condition: Dict[str, Any]) -> Dict[str, Any]:
+    """Combinar uma condição ao filtro sem sobrescrever $and/$or existentes."""
+    if not condition:
+        return filter_query
+    if not filter_query:
+        return condition
+    return {"$and": [filter_query, condition]}
+
+
+async def _rebuild_collection(collection, build_keys, projection: Dict[str, int]) -> int:
+    requests = []
+    total = 0
+    async for doc in collection.find({}, projection):
+        requests.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search": build_keys(doc)}}))
+        if len(requests) >= 1000:
+            await collection.bulk_write(requests, ordered=False)
+            total += len(requests)
+            requests = []
+
+    if requests:
+        await collection.bulk_write(requests, ordered=False)
+        total += len(requests)
+    return total
+
+
+async def rebuild_search_keys() -> Dict[str, int]:
+    """
+    Recalcular as chaves de busca de arenas e usuários (backfill/reparo).
+    A projeção court_search copia as chaves da arena (ver rebuild_court_search).
+
+    Returns:
+        Número de documentos atualizados por coleção
+    """
+    arenas = await _rebuild_collection(
+        db.db.arenas, arena_search_keys,
+        {field: 1 for field in ARENA_SEARCH_FIELDS}
+    )
+    users = await _rebuild_collection(
+        db.db.users, user_search_keys,
+        {field: 1 for field in USER_SEARCH_FIELDS}
+    )
+
+    logger.info(f"Chaves de busca recalculadas: {arenas} arenas, {users} usuários.")
+    return {"arenas": arenas, "users": users}
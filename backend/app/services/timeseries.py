@@ -0,0 +1,146 @@
+# app/services/timeseries.py
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from bson.objectid import ObjectId
+
+from app.core.constants import TIMESERIES_CACHE_TTL_SECONDS
+from app.db.database import db
+from app.services.cache import register_cache
+from app.services.text_search import fold
+
+# Séries temporais de receita, reservas e cancelamentos (gráficos do admin)
+# Servidas a partir dos agregados diários (stats_daily): as linhas do intervalo
+# são agrupadas por $dateTrunc na granularidade pedida (e, opcionalmente, por
+# arena ou cidade). A resposta é compacta, com um vetor por métrica alinhado à
+# lista de períodos (períodos sem movimento valem 0), e fica em cache pela
+# consulta (intervalo, granularidade, filtros).
+
+GRANULARITIES = ("day", "week", "month")
+BREAKDOWNS = ("arena", "city")
+METRICS = ("revenue", "bookings", "cancellations")
+
+timeseries_cache = register_cache("timeseries", max_entries=256, ttl_seconds=TIMESERIES_CACHE_TTL_SECONDS)
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    """Início do período (dia, semana começando na segunda-feira ou mês) que contém day."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def bucket_starts(start: date, end: date, granularity: str) -> List[date]:
+    """Períodos do intervalo [start, end], em ordem."""
+    buckets = []
+    current = bucket_start(start, granularity)
+    while current <= end:
+        buckets.append(current)
+        if granularity == "month":
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            current += timedelta(days=7 if granularity == "week" else 1)
+    return buckets
+
+
+async def _arena_names(arena_ids: List[str]) -> Dict[str, str]:
+    object_ids = [ObjectId(arena_id) for arena_id in arena_ids if ObjectId.is_valid(arena_id)]
+    cursor = db.db.arenas.find({"_id": {"$in": object_ids}}, {"name": 1})
+    return {str(arena["_id"]): arena.get("name") async for arena in cursor}
+
+
+async def fetch_timeseries(
+    start: date,
+    end: date,
+    granularity: str = "day",
+    arena_id: Optional[str] = None,
+    city: Optional[str] = None,
+    breakdown: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Séries de receita, reservas e cancelamentos por período.
+
+    Args:
+        start, end: Intervalo (inclusive)
+        granularity: day, week ou month
+        arena_id, city: Filtros opcionais
+        breakdown: None (uma série), "arena" ou "city" (uma série por valor)
+
+    Returns:
+        {"granularity", "buckets": [datas ISO], "series": [{"key", "label",
+         "revenue": [...], "bookings": [...], "cancellations": [...]}]}
+    """
+    key = (start, end, granularity, arena_id, fold(city) or None, breakdown)
+    cached = timeseries_cache.get(key)
+    if cached is not None:
+        return cached
+
+    match: Dict[str, Any] = {"day": {
+        "$gte": datetime.combine(start, datetime.min.time()),
+        "$lt": datetime.combine(end + timedelta(days=1), datetime.min.time())
+    }}
+    if arena_id:
+        match["arena_id"] = arena_id
+    if city:
+        match["city_key"] = fold(city)
+
+    truncate: Dict[str, Any] = {"date": "$day", "unit": granularity}
+    if granularity == "week":
+        truncate["startOfWeek"] = "monday"
+    group_key: Dict[str, Any] = {"bucket": {"$dateTrunc": truncate}}
+    if breakdown == "arena":
+        group_key["key"] = "$arena_id"
+    elif breakdown == "city":
+        group_key["key"] = "$city_key"
+
+    groups = await db.db.stats_daily.aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": group_key,
+            "revenue": {"$sum": "$revenue"},
+            "bookings": {"$sum": "$bookings_created"},
+            "cancellations": {"$sum": "$cancellations"},
+            # Nome de exibição da cidade (a chave é a forma normalizada)
+            "label": {"$first": "$city"}
+        }}
+    ]).to_list(length=None)
+
+    buckets = bucket_starts(start, end, granularity)
+    positions = {bucket: index for index, bucket in enumerate(buckets)}
+
+    def empty_series(series_key: Any, label: Optional[str] = None) -> Dict[str, Any]:
+        entry = {"key": series_key, "label": label}
+        entry.update({metric: [0] * len(buckets) for metric in METRICS})
+        return entry
+
+    # Sem detalhamento há sempre uma série (zerada, se não houver movimento)
+    series: Dict[Any, Dict[str, Any]] = {} if breakdown else {None: empty_series(None)}
+    for group in groups:
+        series_key = group["_id"].get("key")
+        entry = series.get(series_key)
+        if entry is None:
+            entry = empty_series(series_key, group.get("label") if breakdown == "city" else None)
+            series[series_key] = entry
+
+        position = positions.get(group["_id"]["bucket"].date())
+        if position is None:
+            continue
+        for metric in METRICS:
+            entry[metric][position] = round(group[metric], 2) if metric == "revenue" else group[metric]
+
+    if breakdown == "arena":
+        names = await _arena_names([entry["key"] for entry in series.values() if entry["key"]])
+        for entry in series.values():
+            entry["label"] = names.get(entry["key"])
+
+    result = {
+        "granularity": granularity,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "buckets": [bucket.isoformat() for bucket in buckets],
+        "series": sorted(series.values(), key=lambda entry: -sum(entry["revenue"]))
+    }
+    timeseries_cache.set(key, result)
+    return result
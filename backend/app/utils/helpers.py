@@ -0,0 +1,216 @@
+# ARQUIVO: backend/app/utils/helpers.py
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, status
+
+from app.core.constants import MAX_PAGE_SIZE
+
+# Paginação por cursor (keyset)
+# O cursor é opaco para o cliente e guarda o valor da chave de ordenação e o _id do
+# último item da página. A próxima página é obtida com um filtro "depois deste
+# item" sobre (chave, _id), que usa o índice em vez de percorrer os itens pulados.
+
+
+def clamp_page_size(items_per_page: int) -> int:
+    """Limitar o tamanho da página a [1, MAX_PAGE_SIZE]."""
+    return max(1, min(items_per_page, MAX_PAGE_SIZE))
+
+
+def get_field(doc: Dict[str, Any], field: str) -> Any:
+    """Valor de um campo do documento ("." para subcampos; None se não existir)."""
+    value = doc
+    for part in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def encode_cursor(value: Any, id_: Any) -> str:
+    """Gerar um cursor opaco a partir do valor da chave de ordenação e do _id."""
+    if isinstance(value, datetime):
+        payload = {"v": value.isoformat(), "t": "dt", "id": str(id_)}
+    else:
+        payload = {"v": value, "id": str(id_)}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, ObjectId]:
+    """Obter (valor, _id) de um cursor gerado por encode_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        value = payload.get("v")
+        if payload.get("t") == "dt":
+            value = datetime.fromisoformat(value)
+        return value, ObjectId(payload["id"])
+    except (ValueError, TypeError, KeyError, InvalidId):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido"
+        )
+
+
+def keyset_sort(sort_field: str = "_id", direction: int = -1) -> List[Tuple[str, int]]:
+    """Ordenação estável (chave, _id) usada pela paginação por cursor."""
+    if sort_field == "_id":
+        return [("_id", direction)]
+    return [(sort_field, direction), ("_id", direction)]
+
+
+def keyset_query(
+    filter_query: Dict[str, Any],
+    cursor: Optional[str],
+    sort_field: str = "_id",
+    direction: int = -1
+) -> Dict[str, Any]:
+    """
+    Combinar o filtro da consulta com a condição "depois do cursor".
+
+    Args:
+        filter_query: Filtro original da listagem
+        cursor: Cursor recebido do cliente (None para a primeira página)
+        sort_field: Chave de ordenação (o _id é usado como desempate)
+        direction: 1 (crescente) ou -1 (decrescente)
+    """
+    if not cursor:
+        return filter_query
+
+    value, last_id = decode_cursor(cursor)
+    op = "$gt" if direction > 0 else "$lt"
+
+    if sort_field == "_id":
+        condition = {"_id": {op: last_id}}
+    elif value is None:
+        # Nulos vêm antes de qualquer valor na ordenação do MongoDB
+        condition = {"$or": [{sort_field: None, "_id": {op: last_id}}]}
+        if direction > 0:
+            condition["$or"].append({sort_field: {"$ne": None}})
+    else:
+        condition = {"$or": [
+            {sort_field: {op: value}},
+            {sort_field: value, "_id": {op: last_id}}
+        ]}
+        if direction < 0:
+            # Em ordem decrescente, nulos/ausentes vêm depois de qualquer valor
+            condition["$or"].append({sort_field: None})
+
+    if not filter_query:
+        return condition
+    return {"$and": [filter_query, condition]}
+
+
+def split_page(
+    docs: List[Dict[str, Any]],
+    items_per_page: int,
+    sort_field: str = "_id"
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Separar a página dos documentos buscados com limit(items_per_page + 1).
+
+    Returns:
+        (documentos da página, cursor da próxima página ou None se for a última)
+    """
+    if len(docs) <= items_per_page:
+        return docs, None
+
+    docs = docs[:items_per_page]
+    last = docs[-1]
+    value = None if sort_field == "_id" else get_field(last, sort_field)
+    return docs, encode_cursor(value, last["_id"])
+
+
+async def fetch_page(
+    collection,
+    filter_query: Dict[str, Any],
+    cursor: Optional[str] = None,
+    page: int = 1,
+    items_per_page: int = 20,
+    sort_field: str = "_id",
+    direction: int = -1
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Buscar uma página de uma coleção. Com cursor, a página começa logo após o
+    item do cursor; sem cursor, a paginação por número de página é mantida.
+
+    Returns:
+        (documentos da página, cursor da próxima página ou None se for a última)
+    """
+    skip = 0 if cursor else (max(page, 1) - 1) * items_per_page
+
+    results = collection.find(keyset_query(filter_query, cursor, sort_field, direction))
+    results = results.sort(keyset_sort(sort_field, direction)).skip(skip).limit(items_per_page + 1)
+
+    docs = await results.to_list(length=items_per_page + 1)
+    return split_page(docs, items_per_page, sort_field)
+
+
+async def fetch_near_page(
+    collection,
+    filter_query: Dict[str, Any],
+    longitude: float,
+    latitude: float,
+    cursor: Optional[str] = None,
+    page: int = 1,
+    items_per_page: int = 20,
+    max_distance_km: Optional[float] = None,
+    key: str = "location"
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Buscar uma página ordenada por distância com $geoNear (índice 2dsphere sobre
+    um ponto GeoJSON). A distância é calculada pelo banco e o cursor guarda
+    (distância em metros, _id) do último item: a próxima página começa em
+    minDistance, sem percorrer os itens das páginas anteriores.
+
+    Returns:
+        (documentos da página com "distance" em km, cursor da próxima página ou None)
+    """
+    geo_near = {
+        "near": {"type": "Point", "coordinates": [longitude, latitude]},
+        "key": key,
+        "distanceField": "distance",
+        "spherical": True,
+        "query": filter_query
+    }
+    if max_distance_km:
+        geo_near["maxDistance"] = max_distance_km * 1000  # Converter km para metros
+
+    after_cursor: List[Dict[str, Any]] = []
+    if cursor:
+        last_distance, _ = decode_cursor(cursor)
+        geo_near["minDistance"] = last_distance
+        after_cursor.append({"$match": keyset_query({}, cursor, "distance", 1)})
+
+    # $geoNear já entrega os documentos por distância: o limite fica logo depois
+    # dele, sem ordenar o resultado inteiro a cada página
+    skip = 0 if cursor else (max(page, 1) - 1) * items_per_page
+    limit = skip + items_per_page + 1
+    docs = await collection.aggregate(
+        [{"$geoNear": geo_near}, *after_cursor, {"$limit": limit}]
+    ).to_list(length=limit)
+
+    # A ordem entre itens à mesma distância (ex.: quadras da mesma arena) não é
+    # definida: se o limite cortou um empate, buscar o restante dele para que o
+    # desempate por _id seja o mesmo em todas as páginas
+    if len(docs) == limit and docs[-1]["distance"] == docs[-2]["distance"]:
+        tie_distance = docs[-1]["distance"]
+        seen = {doc["_id"] for doc in docs}
+        ties = await collection.aggregate([
+            {"$geoNear": {**geo_near, "minDistance": tie_distance, "maxDistance": tie_distance}},
+            *after_cursor
+        ]).to_list(length=None)
+        docs.extend(doc for doc in ties if doc["_id"] not in seen)
+
+    docs.sort(key=lambda doc: (doc["distance"], doc["_id"]))
+    docs, next_cursor = split_page(docs[skip:], items_per_page, "distance")
+
+    for doc in docs:
+        doc["distance"] = round(doc["distance"] / 1000, 3)
+
+    return docs, next_cursor
@@ -0,0 +1,211 @@
+# ARQUIVO: backend/benchmarks/bench_admin_bookings.py
+"""
+Benchmark da listagem administrativa de reservas (GET /admin/bookings).
+
+Gera N reservas fictícias (com usuários, quadras, arenas e pagamentos) e compara
+o tempo para devolver a primeira página e o total, sem filtro, só com status e
+com busca:
+  - legacy: o pipeline antigo sem alterações ($lookup por localField/foreignField
+    de usuário, quadra, arena e pagamentos, regex sem âncora nos nomes) mais um
+    count_documents separado. Como no código antigo, os $lookup comparam os ids
+    gravados como string com o _id ObjectId e não encontram nada, então a página
+    sai vazia; o custo medido é o do filtro, da ordenação e da contagem
+  - faceted: fetch_admin_bookings (app/services/booking_search.py), com página e
+    total em um único $facet e $lookup apenas dos campos exibidos
+
+Uso (requer um MongoDB acessível em MONGODB_URL):
+    python -m benchmarks.bench_admin_bookings --bookings 1000000 --repeat 10
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.db.database import db
+from app.services.booking_search import admin_bookings_filter, booking_names, booking_search_keys, fetch_admin_bookings
+
+PAGE_SIZE = 20
+BATCH_SIZE = 10_000
+SEARCH = "Silva"
+FIRST_NAMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Felipe", "Gabriela", "Hugo"]
+LAST_NAMES = ["Silva", "Souza", "Oliveira", "Santos", "Lima", "Costa", "Pereira", "Almeida"]
+STATUSES = ["pending", "confirmed", "completed", "cancelled"]
+# (status, busca): sem filtro, só status (contagem pelo índice) e busca textual
+SCENARIOS = [(None, None), ("confirmed", None), (None, SEARCH)]
+
+async def seed(bookings: int):
+    random.seed(42)
+    users = [
+        {
+            "_id": ObjectId(),
+            "first_name": random.choice(FIRST_NAMES),
+            "last_name": random.choice(LAST_NAMES),
+            "email": f"cliente{index}@example.com",
+            "username": f"cliente{index}"
+        }
+        for index in range(max(bookings // 50, 1))
+    ]
+    arenas = [{"_id": ObjectId(), "name": f"Arena {index}", "address": {"city": "São Paulo"}} for index in range(200)]
+    courts = [
+        {"_id": ObjectId(), "arena_id": str(arena["_id"]), "name": f"Quadra {index}", "type": "futsal"}
+        for arena in arenas for index in range(5)
+    ]
+    arena_by_id = {str(arena["_id"]): arena for arena in arenas}
+    await db.db.users.insert_many(users)
+    await db.db.arenas.insert_many(arenas)
+    await db.db.courts.insert_many(courts)
+
+    start = datetime.now() - timedelta(days=365)
+    for offset in range(0, bookings, BATCH_SIZE):
+        batch, payments = [], []
+        for index in range(offset, min(offset + BATCH_SIZE, bookings)):
+            user, court = random.choice(users), random.choice(courts)
+            arena = arena_by_id[court["arena_id"]]
+            created_at = start + timedelta(seconds=index * 31_536_000 // bookings)
+            booking = {
+                "_id": ObjectId(),
+                "user_id": str(user["_id"]),
+                "court_id": str(court["_id"]),
+                "arena_id": court["arena_id"],
+                "booking_type": "single",
+                "timeslot": {"date": created_at.date().isoformat(), "start_time": "19:00", "end_time": "20:00"},
+                "status": random.choice(STATUSES),
+                "total_amount": 100.0,
+                "created_at": created_at,
+                **booking_names(user, court, arena)
+            }
+            booking["search"] = booking_search_keys(booking)
+            batch.append(booking)
+            payments.append({"booking_id": str(booking["_id"]), "status": "approved", "created_at": created_at})
+        await db.db.bookings.insert_many(batch, ordered=False)
+        await db.db.payments.insert_many(payments, ordered=False)
+
+    # Índices de reservas e pagamentos criados por init_db usados pelos dois fluxos
+    await db.db.bookings.create_index([("created_at", -1), ("_id", -1)])
+    await db.db.bookings.create_index([("status", 1), ("created_at", -1), ("_id", -1)])
+    await db.db.bookings.create_index([("search.tokens", 1), ("created_at", -1), ("_id", -1)])
+    await db.db.payments.create_index("booking_id")
+
+async def legacy(status, search):
+    # Filtro e pipeline de GET /admin/bookings antes da mudança, sem alterações
+    # (os $lookup comparam os ids gravados como string com o _id ObjectId)
+    filter_query = {}
+    if status:
+        filter_query["status"] = status
+    if search:
+        regex = {"$regex": search, "$options": "i"}
+        filter_query["$or"] = [
+            {"user_name": regex},
+            {"user_email": regex},
+            {"court_name": regex},
+            {"arena_name": regex}
+        ]
+
+    pipeline = [
+        {"$match": filter_query},
+        {"$sort": {"created_at": -1}},
+        {"$skip": 0},
+        {"$limit": PAGE_SIZE},
+        {"$lookup": {"from": "users", "localField": "user_id", "foreignField": "_id", "as": "user"}},
+        {"$unwind": "$user"},
+        {"$lookup": {"from": "courts", "localField": "court_id", "foreignField": "_id", "as": "court"}},
+        {"$unwind": "$court"},
+        {"$lookup": {"from": "arenas", "localField": "arena_id", "foreignField": "_id", "as": "arena"}},
+        {"$unwind": "$arena"},
+        {"$lookup": {"from": "payments", "localField": "_id", "foreignField": "booking_id", "as": "payment"}},
+        {"$unwind": {"path": "$payment", "preserveNullAndEmptyArrays": True}},
+        {"$project": {
+            "_id": {"$toString": "$_id"},
+            "user_id": {"$toString": "$user_id"},
+            "court_id": {"$toString": "$court_id"},
+            "arena_id": {"$toString": "$arena_id"},
+            "booking_type": 1,
+            "timeslot": 1,
+            "monthly_config": 1,
+            "status": 1,
+            "price_per_hour": 1,
+            "total_hours": 1,
+            "subtotal": 1,
+            "extra_services": 1,
+            "total_amount": 1,
+            "discount_amount": 1,
+            "requires_payment": 1,
+            "payment_deadline": 1,
+            "created_at": 1,
+            "updated_at": 1,
+            "payment_status": "$payment.status",
+            "can_cancel": {"$and": [
+                {"$ne": ["$status", "cancelled"]},
+                {"$ne": ["$status", "completed"]}
+            ]},
+            "user": {
+                "id": {"$toString": "$user._id"},
+                "name": {"$concat": ["$user.first_name", " ", "$user.last_name"]},
+                "email": "$user.email",
+                "phone": "$user.phone",
+                "username": "$user.username"
+            },
+            "court": {
+                "id": {"$toString": "$court._id"},
+                "name": "$court.name",
+                "type": "$court.type",
+                "cover_image": "$court.cover_image"
+            },
+            "arena": {
+                "id": {"$toString": "$arena._id"},
+                "name": "$arena.name",
+                "city": "$arena.address.city",
+                "neighborhood": "$arena.address.neighborhood"
+            }
+        }}
+    ]
+    bookings = await db.db.bookings.aggregate(pipeline).to_list(length=None)
+    total = await db.db.bookings.count_documents(filter_query)
+    return bookings, total
+
+async def faceted(status, search):
+    bookings, total, _ = await fetch_admin_bookings(
+        admin_bookings_filter(status=status, search=search), items_per_page=PAGE_SIZE
+    )
+    return bookings, total
+
+async def run(name, fetch, status, search, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        bookings, total = await fetch(status, search)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    print(
+        f"{name:8s} status={status or '-':9s} busca={search or '-':6s} itens={len(bookings):3d} total={total:8d}  "
+        f"p50={statistics.median(latencies):8.1f} ms  min={min(latencies):8.1f} ms"
+    )
+
+async def main(bookings: int, repeat: int):
+    db.client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db.db = db.client[f"{settings.MONGODB_DB}_bench"]
+
+    try:
+        await db.client.drop_database(db.db.name)
+        print(f"Gerando {bookings} reservas...")
+        await seed(bookings)
+
+        for status, search in SCENARIOS:
+            await run("legacy", legacy, status, search, repeat)
+            await run("faceted", faceted, status, search, repeat)
+    finally:
+        await db.client.drop_database(db.db.name)
+        db.client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.bookings, args.repeat))
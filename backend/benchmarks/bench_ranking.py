@@ -0,0 +1,92 @@
+# ARQUIVO: backend/benchmarks/bench_ranking.py
+"""
+Benchmark do ranking local dos resultados de busca.
+
+Gera N arenas/quadras fictícias em torno de São Paulo e compara o tempo para
+pontuar todos os candidatos e devolver a primeira página (como fetch_ranked_page):
+  - python_loop: haversine e pontuação calculados item a item com o módulo math
+  - numpy: rank_results (app/services/maps.py), vetorizado com NumPy
+
+Não requer banco de dados.
+Uso:
+    python -m benchmarks.bench_ranking --items 5000 --repeat 20
+"""
+import argparse
+import math
+import random
+import statistics
+import time
+
+from app.core.constants import SEARCH_RANKING_WEIGHTS
+from app.services.maps import EARTH_RADIUS_KM, rank_results
+
+ORIGIN = (-23.550520, -46.633308)  # São Paulo
+PAGE_SIZE = 20
+
+def make_docs(items: int):
+    random.seed(42)
+    return [
+        {
+            "_id": index,
+            "location": {
+                "type": "Point",
+                "coordinates": [ORIGIN[1] + random.uniform(-0.5, 0.5), ORIGIN[0] + random.uniform(-0.5, 0.5)]
+            },
+            "effective_price": random.choice([80.0, 100.0, 120.0, 150.0, 200.0]),
+            "rating": round(random.uniform(0, 5), 1)
+        }
+        for index in range(items)
+    ]
+
+def python_loop(docs):
+    latitude, longitude = ORIGIN
+    distances = []
+    for doc in docs:
+        lon2, lat2 = doc["location"]["coordinates"]
+        dlat = math.radians(lat2 - latitude)
+        dlon = math.radians(lon2 - longitude)
+        a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(latitude)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
+        distances.append(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a)))
+
+    prices = [doc["effective_price"] for doc in docs]
+    max_distance = max(distances) or 1.0
+    low, high = min(prices), max(prices)
+    weights = SEARCH_RANKING_WEIGHTS
+
+    scored = []
+    for doc, distance in zip(docs, distances):
+        price_score = (high - doc["effective_price"]) / (high - low) if high > low else 1.0
+        score = (
+            weights["distance"] * (1 - distance / max_distance)
+            + weights["price"] * price_score
+            + weights["rating"] * doc["rating"] / 5.0
+        ) / sum(weights.values())
+        scored.append((score, doc))
+
+    scored.sort(key=lambda item: -item[0])
+    return [doc for _, doc in scored[:PAGE_SIZE]]
+
+def numpy_rank(docs):
+    return rank_results(docs, *ORIGIN, limit=PAGE_SIZE)
+
+def run(name, rank, docs, repeat):
+    timings = []
+    for _ in range(repeat):
+        batch = [dict(doc) for doc in docs]
+        start = time.perf_counter()
+        rank(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    print(f"{name:12s} itens={len(docs):6d}  p50={statistics.median(timings):8.2f} ms  min={min(timings):8.2f} ms")
+
+def main(items: int, repeat: int):
+    docs = make_docs(items)
+    run("python_loop", python_loop, docs, repeat)
+    run("numpy", numpy_rank, docs, repeat)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.items, args.repeat)
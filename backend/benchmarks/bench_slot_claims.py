@@ -0,0 +1,91 @@
+# ARQUIVO: backend/benchmarks/bench_slot_claims.py
+"""
+Benchmark de concorrência da reivindicação de horários (slot_claims).
+
+Dispara centenas de tentativas simultâneas de reservar a mesma quadra no mesmo
+horário e compara:
+  - check_then_insert: fluxo antigo (consulta de conflito seguida de insert_one)
+  - slot_claims: insert_many em coleção com índice único (court_id, date, slot_start)
+
+Uso (requer um MongoDB acessível em MONGODB_URL):
+    python -m benchmarks.bench_slot_claims --requests 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date, timedelta
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.db.database import db
+from app.services.slot_claims import claim_slots, SlotUnavailableError
+
+COURT_ID = "bench-court"
+SLOT_DATE = (date.today() + timedelta(days=1)).isoformat()
+OCCURRENCE = {"court_id": COURT_ID, "date": SLOT_DATE, "start_time": "19:00", "end_time": "20:00"}
+
+async def check_then_insert() -> bool:
+    conflict = await db.db.bench_bookings.find_one({
+        "court_id": COURT_ID,
+        "date": SLOT_DATE,
+        "start_time": {"$lt": OCCURRENCE["end_time"]},
+        "end_time": {"$gt": OCCURRENCE["start_time"]}
+    })
+    if conflict:
+        return False
+    await db.db.bench_bookings.insert_one(dict(OCCURRENCE))
+    return True
+
+async def claim() -> bool:
+    try:
+        await claim_slots(str(ObjectId()), [OCCURRENCE])
+        return True
+    except SlotUnavailableError:
+        return False
+
+async def run(name, attempt, requests):
+    latencies = []
+    
+    async def timed():
+        start = time.perf_counter()
+        ok = await attempt()
+        latencies.append((time.perf_counter() - start) * 1000)
+        return ok
+    
+    start = time.perf_counter()
+    results = await asyncio.gather(*[timed() for _ in range(requests)])
+    elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    print(
+        f"{name:18s} reservas aceitas={sum(results):4d}  "
+        f"total={elapsed * 1000:8.1f} ms  "
+        f"p50={statistics.median(latencies):7.1f} ms  "
+        f"p95={latencies[int(len(latencies) * 0.95) - 1]:7.1f} ms"
+    )
+
+async def main(requests: int):
+    db.client = AsyncIOMotorClient(settings.MONGODB_URL, maxPoolSize=requests)
+    db.db = db.client[f"{settings.MONGODB_DB}_bench"]
+    
+    try:
+        await db.client.drop_database(db.db.name)
+        await db.db.bench_bookings.create_index([("court_id", 1), ("date", 1), ("start_time", 1), ("end_time", 1)])
+        await db.db.slot_claims.create_index([("court_id", 1), ("date", 1), ("slot_start", 1)], unique=True)
+        await db.db.slot_claims.create_index([("booking_id", 1), ("date", 1)])
+        
+        print(f"{requests} requisições simultâneas para {COURT_ID} em {SLOT_DATE} 19:00-20:00")
+        await run("check_then_insert", check_then_insert, requests)
+        await run("slot_claims", claim, requests)
+    finally:
+        await db.client.drop_database(db.db.name)
+        db.client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
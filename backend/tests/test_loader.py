@@ -0,0 +1,61 @@
+# ARQUIVO: backend/tests/test_loader.py
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+from bson.objectid import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app.db.database import db
+from app.db.loader import BatchLoader, get_loader
+from app.main import app
+
+ARENA_ID = ObjectId()
+REVIEWS = 30
+
+
+@pytest.fixture(autouse=True)
+def mongo():
+    db.client = AsyncMongoMockClient()
+    db.db = db.client["test"]
+
+    users = [{"_id": ObjectId(), "first_name": "Cliente", "last_name": f"Número {index}"} for index in range(REVIEWS)]
+    asyncio.run(db.db.arenas.insert_one({"_id": ARENA_ID, "name": "Arena"}))
+    asyncio.run(db.db.users.insert_many(users))
+    asyncio.run(db.db.reviews.insert_many([
+        {
+            "rating": 5,
+            "booking_id": str(ObjectId()),
+            "user_id": str(user["_id"]),
+            "arena_id": str(ARENA_ID),
+            "court_id": str(ObjectId()),
+            "created_at": datetime(2030, 1, 1, minute=index)
+        }
+        for index, user in enumerate(users)
+    ]))
+    yield
+    app.dependency_overrides.clear()
+    db.client = None
+    db.db = None
+
+
+async def get(url, **kwargs):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get(url, **kwargs)
+
+
+def list_reviews(items_per_page):
+    loader = BatchLoader()
+    app.dependency_overrides[get_loader] = lambda: loader
+
+    response = asyncio.run(get(f"/api/reviews/arena/{ARENA_ID}", params={"items_per_page": items_per_page}))
+
+    assert response.status_code == 200
+    assert len(response.json()) == items_per_page
+    assert all(review["user"] for review in response.json())
+    return loader.query_count
+
+
+def test_query_count_does_not_depend_on_page_size():
+    assert list_reviews(2) == list_reviews(REVIEWS) == 1
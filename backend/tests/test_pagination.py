@@ -0,0 +1,27 @@
+# ARQUIVO: backend/tests/test_pagination.py
+import asyncio
+from datetime import datetime
+
+from mongomock_motor import AsyncMongoMockClient
+
+from app.utils.helpers import fetch_page
+
+
+def test_descending_cursor_keeps_documents_without_sort_field():
+    collection = AsyncMongoMockClient()["test"]["users"]
+    asyncio.run(collection.insert_many(
+        [{"created_at": datetime(2030, 1, day)} for day in range(1, 4)] + [{"created_at": None}, {}]
+    ))
+
+    seen = []
+    cursor = None
+    while True:
+        docs, cursor = asyncio.run(fetch_page(
+            collection, {}, cursor=cursor, items_per_page=2, sort_field="created_at"
+        ))
+        seen.extend(doc["_id"] for doc in docs)
+        if not cursor:
+            break
+
+    assert len(seen) == 5
+    assert len(set(seen)) == 5
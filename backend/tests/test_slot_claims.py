@@ -0,0 +1,47 @@
+# ARQUIVO: backend/tests/test_slot_claims.py
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app.db.database import db
+from app.services.slot_claims import SlotUnavailableError, claim_slots
+
+COURT_ID = "court-1"
+
+
+def occurrence(date_str, start_time="19:00", end_time="20:00"):
+    return {"court_id": COURT_ID, "date": date_str, "start_time": start_time, "end_time": end_time}
+
+
+@pytest.fixture(autouse=True)
+def mongo():
+    db.client = AsyncMongoMockClient()
+    db.db = db.client["test"]
+    asyncio.run(db.db.slot_claims.create_index([("court_id", 1), ("date", 1), ("slot_start", 1)], unique=True))
+    yield
+    db.client = None
+    db.db = None
+
+
+def claims_of(booking_id):
+    return asyncio.run(db.db.slot_claims.count_documents({"booking_id": booking_id}))
+
+
+def test_conflicting_extension_keeps_existing_claims():
+    # Reserva mensal já materializada até 2030-01-07 e outra reserva em 2030-01-14
+    asyncio.run(claim_slots("monthly", [occurrence("2030-01-07")]))
+    asyncio.run(claim_slots("other", [occurrence("2030-01-14")]))
+    existing = claims_of("monthly")
+
+    # A extensão conflita em 2030-01-14: nada dela é gravado e o que já existia fica
+    with pytest.raises(SlotUnavailableError):
+        asyncio.run(claim_slots("monthly", [occurrence("2030-01-21"), occurrence("2030-01-14")]))
+
+    assert claims_of("monthly") == existing
+    assert claims_of("other") == existing
+    assert asyncio.run(db.db.slot_claims.count_documents({"date": "2030-01-21"})) == 0
+
+    # Os slots da reserva continuam protegidos
+    with pytest.raises(SlotUnavailableError):
+        asyncio.run(claim_slots("new", [occurrence("2030-01-07")]))